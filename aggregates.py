@@ -0,0 +1,159 @@
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from config import Config
+from data_cleaning import clean_frame
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout below changes, so cached files from older code are recomputed
+FORMAT = 1
+
+GENERAL_QUESTIONS = [
+    "What are the current trending games based on player count growth?",
+    "Which price range shows the highest player engagement?",
+    "What patterns do you notice in player activity across different game genres?",
+]
+
+
+def aggregates_path(data_path: str) -> str:
+    """Where the aggregates of a snapshot are cached: next to it."""
+    return f"{data_path}.aggregates.json"
+
+
+def snapshot_stamp(data_path: str) -> Dict[str, Any]:
+    """Identify a snapshot file version; it changes whenever the file is rewritten."""
+    stat = os.stat(data_path)
+    return {"format": FORMAT, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _records(frame: pd.DataFrame, order: np.ndarray) -> List[Dict[str, Any]]:
+    return json.loads(frame.iloc[order].to_json(orient="records"))
+
+
+def _top(values: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n largest values, largest first, without sorting the whole array."""
+    if len(values) > n:
+        candidates = np.argpartition(-values, n)[:n]
+        return candidates[np.argsort(-values[candidates], kind="stable")]
+    return np.argsort(-values, kind="stable")
+
+
+def compute_aggregates(data: pd.DataFrame, top_n: int = Config.AGGREGATES_TOP_N,
+                       min_players: int = Config.AGGREGATES_MIN_PLAYERS) -> Dict[str, Any]:
+    """Dashboard aggregates and suggested questions for the latest day of a snapshot frame.
+
+    Every statistic is computed from the same few numpy arrays: headline
+    counts, top-N games by current players, by peak minus current players
+    and by peak-to-current ratio (among games with at least min_players),
+    engagement per price bucket (the buckets QueryRouter answers with) and
+    the questions the app suggests for this data.
+    """
+    from query_router import QueryRouter
+
+    data = clean_frame(data)
+    if "date" in data and data["date"].notna().any():
+        data = data[data["date"] == data["date"].max()]
+    frame = pd.DataFrame({
+        "name": data["name"].astype(str).to_numpy(),
+        "price": data["price"].to_numpy(dtype=float),
+        "current_players": data["current_players"].to_numpy(dtype=float, na_value=np.nan),
+        "peak_players_today": data["peak_players_today"].to_numpy(dtype=float, na_value=np.nan),
+    })
+    price = frame["price"].to_numpy()
+    current = np.nan_to_num(frame["current_players"].to_numpy())
+    peak = np.nan_to_num(frame["peak_players_today"].to_numpy())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(current > 0, peak / current, np.nan)
+    frame["peak_ratio"] = ratio.round(3)
+
+    codes = np.searchsorted(QueryRouter.PRICE_EDGES, price, side="left")
+    buckets = len(QueryRouter.PRICE_BUCKET_LABELS)
+    counts = np.bincount(codes, minlength=buckets)
+    totals = np.bincount(codes, weights=current, minlength=buckets)
+    # Medians per bucket from one sort by (bucket, players)
+    order = np.lexsort((current, codes))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    medians = [float(np.median(current[order[start:start + count]])) if count else None
+               for start, count in zip(starts, counts)]
+
+    eligible = np.flatnonzero(current >= min_players)
+    peak_over_twice = int((peak > current * 2).sum())
+    free_games = int((price == 0).sum())
+    max_players = float(current.max()) if len(current) else 0.0
+
+    # The fixed suggestions the app always offered, each shown only when the data supports it
+    questions = []
+    if max_players > 100000:
+        questions.append("What game has the highest current player count and why might it be so popular?")
+    if free_games > 0:
+        questions.append("What are the most popular free-to-play games right now?")
+    if peak_over_twice:
+        questions.append("Which games show the biggest difference between peak and current players today?")
+    questions.extend(GENERAL_QUESTIONS)
+
+    date = data["date"].max() if "date" in data else None
+    return {
+        "date": date.strftime("%Y-%m-%d") if pd.notna(date) else None,
+        "games": len(frame),
+        "total_players": float(current.sum()),
+        "max_players": max_players,
+        "free_games": free_games,
+        "peak_over_twice_current": peak_over_twice,
+        "peak_ratio": {"mean": float(np.nanmean(ratio)) if np.isfinite(ratio).any() else None,
+                       "median": float(np.nanmedian(ratio)) if np.isfinite(ratio).any() else None},
+        "top_players": _records(frame, _top(current, top_n)),
+        "top_peak_gap": _records(frame, _top(peak - current, top_n)),
+        "top_peak_ratio": _records(frame, eligible[_top(ratio[eligible], top_n)]),
+        "price_buckets": [
+            {"bucket": label, "games": int(count), "players": float(total),
+             "mean_players": float(total / count) if count else None, "median_players": median}
+            for label, count, total, median in zip(QueryRouter.PRICE_BUCKET_LABELS, counts, totals, medians)
+        ],
+        "suggested_questions": questions,
+    }
+
+
+def load_or_compute_aggregates(data_path: str) -> Dict[str, Any]:
+    """Return a snapshot's aggregates from the file cached next to it, computing and caching them on a miss.
+
+    The cache stores the snapshot's modification time and size, so a
+    republished snapshot is recomputed once and every process and session
+    afterwards reads the same file.
+    """
+    stamp = snapshot_stamp(data_path)
+    path = aggregates_path(data_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("snapshot") == stamp:
+            return cached
+    except (FileNotFoundError, ValueError):
+        pass
+
+    start = time.perf_counter()
+    aggregates = {"snapshot": stamp, **compute_aggregates(pd.read_csv(data_path))}
+    logger.info("Computed aggregates for %s in %.3fs", data_path, time.perf_counter() - start)
+    # Written under a temporary name and renamed, so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(aggregates, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache aggregates next to %s: %s", data_path, e)
+    return aggregates
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compute and cache a snapshot's dashboard aggregates.")
+    parser.add_argument('data', nargs='?', default=Config.DATA_PATH, help='Snapshot CSV')
+    args = parser.parse_args()
+
+    print(json.dumps(load_or_compute_aggregates(args.data), indent=2))
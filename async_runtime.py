@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+
+class AsyncRuntime:
+    """A single background event loop shared by every Streamlit script thread.
+
+    Script threads submit coroutines to the loop and block only on their own
+    result, so many in-flight questions share one loop and one pooled HTTP
+    client instead of each holding a thread for the whole remote call.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the shared loop, starting its thread on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        """Consume an async generator on the shared loop, yielding its items synchronously."""
+        async def next_item():
+            return await agen.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.run(next_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+
+runtime = AsyncRuntime()
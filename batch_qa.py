@@ -0,0 +1,66 @@
+import argparse
+import json
+import logging
+import time
+from typing import Any, Dict, IO, List
+from async_runtime import runtime
+from config import Config
+from shared_resources import get_rag_chain
+
+logger = logging.getLogger(__name__)
+
+
+def read_questions(path: str) -> List[str]:
+    """One question per line; blank lines and lines starting with # are skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def to_record(result: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serialisable form of a batch result, with source documents reduced to their metadata."""
+    record = {key: value for key, value in result.items() if key != "source_documents"}
+    if "source_documents" in result:
+        record["sources"] = [doc.metadata for doc in result["source_documents"]]
+    return record
+
+
+def run_batch(questions: List[str], data_path: str, output: IO[str],
+              concurrency: int = Config.BATCH_CONCURRENCY, retries: int = Config.BATCH_MAX_RETRIES) -> Dict[str, Any]:
+    """Answer questions against the snapshot at data_path, writing one JSON line per answer as it completes."""
+    start = time.perf_counter()
+    rag_chain = get_rag_chain(data_path)
+    load = time.perf_counter() - start
+
+    async def answer_all() -> Dict[str, int]:
+        counts = {"answered": 0, "failed": 0}
+        async for result in rag_chain.abatch_query(questions, concurrency, retries):
+            counts["failed" if "error" in result else "answered"] += 1
+            output.write(json.dumps(to_record(result), default=str) + "\n")
+            output.flush()
+            done = counts["answered"] + counts["failed"]
+            if done % 50 == 0:
+                logger.info("%d of %d questions done", done, len(questions))
+        return counts
+
+    start = time.perf_counter()
+    counts = runtime.run(answer_all())
+    seconds = time.perf_counter() - start
+    return {**counts, "questions": len(questions), "load_seconds": load, "seconds": seconds,
+            "questions_per_min": len(questions) / seconds * 60 if seconds else 0.0}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Answer a file of questions against a snapshot, as JSON lines.")
+    parser.add_argument('questions', help='Text file with one question per line')
+    parser.add_argument('--data', default=Config.DATA_PATH, help='Snapshot CSV to answer against')
+    parser.add_argument('--output', required=True, help='JSON lines file to write answers to')
+    parser.add_argument('--concurrency', type=int, default=Config.BATCH_CONCURRENCY, help='LLM calls in flight')
+    parser.add_argument('--retries', type=int, default=Config.BATCH_MAX_RETRIES, help='Retries per failed LLM call')
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        stats = run_batch(read_questions(args.questions), args.data, f, args.concurrency, args.retries)
+    print(f"Answered {stats['answered']} of {stats['questions']} questions ({stats['failed']} failed) "
+          f"in {stats['seconds']:.1f}s after {stats['load_seconds']:.1f}s loading the index "
+          f"({stats['questions_per_min']:.1f} questions/min)")
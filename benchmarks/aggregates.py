@@ -0,0 +1,71 @@
+"""Suggested questions per session: re-reading the CSV every time vs aggregates cached per snapshot.
+
+Writes one synthetic snapshot of --games games and times what a new
+session paid before (pd.read_csv plus the same filters, per session)
+against the cached aggregates: the one-off computation when a snapshot is
+published, loading the JSON file cached next to it (a restarted process)
+and the shared in-process copy every later session gets.
+
+Usage: python -m benchmarks.aggregates [--games 20000] [--sessions 50]
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from benchmarks.common import print_results, synthetic_snapshots, timer
+from aggregates import aggregates_path, compute_aggregates, load_or_compute_aggregates
+from shared_resources import get_aggregates, registry
+
+
+def legacy_analyse_data(data_path: str) -> list:
+    """What GameInsightApp.analyse_data did for every new session."""
+    df = pd.read_csv(data_path)
+    questions = []
+    if df['current_players'].max() > 100000:
+        questions.append("What game has the highest current player count and why might it be so popular?")
+    if df[df['price'] == 0].shape[0] > 0:
+        questions.append("What are the most popular free-to-play games right now?")
+    if not df[df['peak_players_today'] > df['current_players'] * 2].empty:
+        questions.append("Which games show the biggest difference between peak and current players today?")
+    return questions
+
+
+def per_session_ms(function, sessions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(sessions):
+        function()
+    return (time.perf_counter() - start) / sessions * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=20_000)
+    parser.add_argument('--sessions', type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        data_path = os.path.join(folder, 'games.csv')
+        synthetic_snapshots(args.games, 1).to_csv(data_path, index=False)
+
+        results['per session: read CSV + filters (ms)'] = per_session_ms(
+            lambda: legacy_analyse_data(data_path), args.sessions)
+        # Import query_router before timing so the one-off import is not counted as aggregation
+        compute_aggregates(pd.read_csv(data_path))
+        with timer('once per snapshot: compute all aggregates (s)', results):
+            aggregates = load_or_compute_aggregates(data_path)
+        results['once per process: load cached JSON (ms)'] = per_session_ms(
+            lambda: load_or_compute_aggregates(data_path), args.sessions)
+        get_aggregates(data_path)
+        results['per session: shared copy (ms)'] = per_session_ms(lambda: get_aggregates(data_path), args.sessions)
+        results['cached JSON size (KB)'] = os.path.getsize(aggregates_path(data_path)) / 1024
+        registry.clear()
+
+    print_results(f"Suggested questions and aggregates ({args.games} games, {args.sessions} sessions)", results)
+    print(f"\n{len(aggregates['suggested_questions'])} suggested questions, top {len(aggregates['top_players'])} "
+          f"tables, {len(aggregates['price_buckets'])} price buckets")
+
+
+if __name__ == '__main__':
+    main()
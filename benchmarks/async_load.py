@@ -0,0 +1,81 @@
+"""Load test of sync vs async RetrievalChain queries against a local mock LLM server.
+
+Usage: python -m benchmarks.async_load [--questions 64] [--concurrency 16]
+       [--first-token-latency 0.3] [--tokens-per-second 50] [--completion-tokens 64]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import BACKUP_CSV, create_embeddings, percentiles, print_results
+from benchmarks.mock_llm_server import MockLLMServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--first-token-latency', type=float, default=0.3)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--completion-tokens', type=int, default=64)
+    parser.add_argument('--sequential', action='store_true', help='Also run the one-at-a-time sync baseline')
+    parser.add_argument('--fake-embeddings', action='store_true')
+    args = parser.parse_args()
+
+    server = MockLLMServer(0, args.first_token_latency, args.tokens_per_second, args.completion_tokens).start()
+    os.environ.setdefault("NVIDIA_API_KEY", "mock")
+
+    from config import Config
+    Config.BASE_URL = server.base_url
+    Config.MAX_CONCURRENT_QUERIES = args.concurrency
+
+    from async_runtime import runtime
+    from data_loader import DataLoader
+    from llm_client import NvidiaLLM
+    from retrieval_chain import RetrievalChain
+
+    documents = DataLoader.create_documents(DataLoader.load_data(BACKUP_CSV))
+    chain = RetrievalChain(documents, embeddings=create_embeddings(args.fake_embeddings), llm=NvidiaLLM())
+    questions = [f"Question {i}: which games have the most players right now?" for i in range(args.questions)]
+    results = {}
+
+    def timed_query(question):
+        start = time.perf_counter()
+        chain.query(question)
+        return time.perf_counter() - start
+
+    if args.sequential:
+        start = time.perf_counter()
+        latencies = [timed_query(q) for q in questions]
+        results['sync sequential: questions/sec'] = len(questions) / (time.perf_counter() - start)
+        results['sync sequential: p50 latency (s)'] = statistics.median(latencies)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(timed_query, questions))
+    results[f'sync, {args.concurrency} threads: questions/sec'] = len(questions) / (time.perf_counter() - start)
+    results[f'sync, {args.concurrency} threads: p50 latency (s)'] = statistics.median(latencies)
+    results[f'sync, {args.concurrency} threads: p95 latency (s)'] = percentiles(latencies, (95,))[95]
+
+    async def run_all():
+        return await asyncio.gather(*(chain.aquery(q) for q in questions))
+
+    start = time.perf_counter()
+    answers = runtime.run(run_all())
+    elapsed = time.perf_counter() - start
+    totals = [a["timings"]["total"] for a in answers]
+    first_tokens = [a["timings"]["time_to_first_token"] for a in answers]
+    results[f'async, limit {args.concurrency}: questions/sec'] = len(questions) / elapsed
+    results[f'async, limit {args.concurrency}: p50 latency (s)'] = statistics.median(totals)
+    results[f'async, limit {args.concurrency}: p95 latency (s)'] = percentiles(totals, (95,))[95]
+    results[f'async, limit {args.concurrency}: p50 first token (s)'] = statistics.median(first_tokens)
+    results['mock server requests'] = server.requests
+
+    server.stop()
+    print_results(f"Async load test ({args.questions} questions)", results)
+
+
+if __name__ == '__main__':
+    main()
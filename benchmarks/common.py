@@ -0,0 +1,143 @@
+import resource
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Allow running benchmarks as `python -m benchmarks.<name>` from the repository root
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BACKUP_CSV = str(ROOT / 'games_back-up.csv')
+
+
+@contextmanager
+def timer(label: str, results: dict):
+    """Record the wall-clock duration of a block in seconds under label."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[label] = time.perf_counter() - start
+
+
+def synthetic_history(days: int, seed: int = 0):
+    """Return `days` daily snapshots shaped like games_back-up.csv with jittered player counts."""
+    import numpy as np
+    import pandas as pd
+    from data_loader import DataLoader
+
+    base = DataLoader.load_data(BACKUP_CSV)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for day in range(days):
+        frame = base.copy()
+        jitter = rng.normal(1.0, 0.05, size=len(frame)).clip(0.5, 1.5)
+        frame['current_players'] = (frame['current_players'] * jitter).round().astype('int64')
+        frame['peak_players_today'] = frame[['peak_players_today', 'current_players']].max(axis=1)
+        frame['date'] = base['date'] - pd.Timedelta(days=days - 1 - day)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_snapshots(games: int, days: int, seed: int = 0):
+    """Return `days` daily snapshots of `games` games in the columns of games_back-up.csv.
+
+    The backup's games come first, followed by generated ones with
+    log-normal player counts; every game follows a random walk with a
+    weekly cycle and occasional discounts.
+    """
+    import numpy as np
+    import pandas as pd
+    from data_loader import DataLoader
+
+    base = DataLoader.load_data(BACKUP_CSV)
+    rng = np.random.default_rng(seed)
+    names = list(base['name'])[:games] + [f'Synthetic Game {i}' for i in range(max(0, games - len(base)))]
+    players = np.concatenate([base['current_players'].to_numpy(dtype=float)[:games],
+                              rng.lognormal(7, 2, size=max(0, games - len(base)))])
+    prices = np.concatenate([base['price'].to_numpy(dtype=float)[:games],
+                             rng.choice([0.0, 4.99, 9.99, 19.99, 29.99, 59.99], size=max(0, games - len(base)))])
+
+    walk = np.cumsum(rng.normal(0, 0.03, size=(days, games)), axis=0)
+    weekly = 0.1 * np.sin(2 * np.pi * np.arange(days) / 7)[:, None]
+    current = np.round(players[None, :] * np.exp(walk + weekly)).astype('int64')
+    peak = np.maximum(current, np.round(current * rng.uniform(1.0, 1.3, size=current.shape))).astype('int64')
+    discount = np.where(rng.random((days, games)) < 0.05, 0.75, 1.0)
+    dates = pd.date_range(end=base['date'].max(), periods=days)
+    return pd.DataFrame({
+        'name': np.tile(names, days),
+        'price': np.round(prices[None, :] * discount, 2).ravel(),
+        'current_players': current.ravel(),
+        'peak_players_today': peak.ravel(),
+        'date': np.repeat(dates.strftime('%Y-%m-%d'), games),
+    })
+
+
+def write_snapshots(history, folder) -> list:
+    """Write one CSV per day, named like the scraper's output; returns the paths oldest first."""
+    paths = []
+    for date, frame in history.groupby('date', sort=True):
+        path = Path(folder) / f'games_{date}.csv'
+        frame.reset_index(drop=True).to_csv(path)
+        paths.append(str(path))
+    return paths
+
+
+def percentiles(values, qs=(50, 95, 99)) -> dict:
+    """Nearest-rank percentiles of values, keyed by q."""
+    ordered = sorted(values)
+    return {q: ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] for q in qs}
+
+
+def start_redis_server():
+    """Start redis-server on a free port without persistence; returns (process, url)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        ["redis-server", "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(50):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return process, f"redis://127.0.0.1:{port}/0"
+
+
+def create_embeddings(fake: bool = False):
+    """Return the configured embedding model, or a deterministic fake for I/O-only runs."""
+    if fake:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=768)
+    from config import Config
+    return Config.create_embeddings()
+
+
+def current_rss_mb() -> float:
+    """Return the current resident set size of this process in MB."""
+    with open('/proc/self/statm') as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * resource.getpagesize() / (1024 * 1024)
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def print_results(title: str, results: dict):
+    """Print benchmark results as an aligned table."""
+    print(f"\n{title}")
+    width = max(len(k) for k in results)
+    for label, value in results.items():
+        if isinstance(value, float):
+            print(f"  {label:<{width}}  {value:10.4f}")
+        else:
+            print(f"  {label:<{width}}  {value}")
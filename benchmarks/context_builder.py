@@ -0,0 +1,95 @@
+"""Prompt size and latency: raw "stuff" context with max_tokens=1024 vs compacted, budgeted context.
+
+Indexes --days of synthetic history, so MMR often returns several days of
+the same game, and sends each question to a local mock LLM server whose
+first-token latency grows with prompt length (--prefill-tokens-per-second).
+The "before" prompt joins the retrieved documents as the stuff chain did
+and always asks for 1024 tokens; the "after" prompt goes through
+RetrievalChain.assemble with its per-question max_tokens.
+
+Usage: python -m benchmarks.context_builder [--days 30] [--prefill-tokens-per-second 2000]
+       [--tokens-per-second 100] [--completion-tokens 1024]
+"""
+import argparse
+import os
+import statistics
+import time
+from benchmarks.common import create_embeddings, synthetic_history, print_results
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.query_router import QUESTIONS
+
+
+def stream(llm, prompt: str, max_tokens: int):
+    """Return (time to first token, total) for one streamed completion."""
+    start = time.perf_counter()
+    first = None
+    for token in llm.stream(prompt, max_tokens=max_tokens):
+        if token and first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--first-token-latency', type=float, default=0.05)
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=2000.0)
+    parser.add_argument('--tokens-per-second', type=float, default=100.0)
+    parser.add_argument('--completion-tokens', type=int, default=1024,
+                        help='Tokens the mock model would generate if max_tokens allowed it')
+    parser.add_argument('--fake-embeddings', action='store_true')
+    args = parser.parse_args()
+
+    server = MockLLMServer(0, args.first_token_latency, args.tokens_per_second, args.completion_tokens,
+                           args.prefill_tokens_per_second).start()
+    os.environ.setdefault("NVIDIA_API_KEY", "mock")
+
+    from config import Config
+    Config.BASE_URL = server.base_url
+
+    from context_builder import count_tokens
+    from data_loader import DataLoader
+    from llm_client import NvidiaLLM
+    from retrieval_chain import GamingBuddyPrompt, RetrievalChain
+
+    data = synthetic_history(args.days)
+    llm = NvidiaLLM()
+    chain = RetrievalChain(DataLoader.create_documents(data), embeddings=create_embeddings(args.fake_embeddings),
+                           llm=llm, data=data)
+
+    before = {"prompt": [], "ttft": [], "total": []}
+    after = {"prompt": [], "ttft": [], "total": [], "max_tokens": []}
+    for question in QUESTIONS:
+        documents = chain.retriever.invoke(question)
+        prompt = GamingBuddyPrompt.TEMPLATE.format(
+            context="\n\n".join(doc.page_content for doc in documents), question=question
+        )
+        before["prompt"].append(count_tokens(prompt))
+        ttft, total = stream(llm, prompt, Config.COMPLETION_PARAMS["max_tokens"])
+        before["ttft"].append(ttft)
+        before["total"].append(total)
+
+        assembly = chain.assemble(question, chain.retrieve(question))
+        after["prompt"].append(assembly["prompt_tokens"])
+        after["max_tokens"].append(assembly["max_tokens"])
+        ttft, total = stream(llm, assembly["prompt"], assembly["max_tokens"])
+        after["ttft"].append(ttft)
+        after["total"].append(total)
+    server.stop()
+
+    results = {
+        'questions': len(QUESTIONS),
+        'before: prompt tokens, mean': statistics.mean(before["prompt"]),
+        'after: prompt tokens, mean': statistics.mean(after["prompt"]),
+        'before: max_tokens': Config.COMPLETION_PARAMS["max_tokens"],
+        'after: max_tokens, mean': statistics.mean(after["max_tokens"]),
+        'before: time to first token, mean (s)': statistics.mean(before["ttft"]),
+        'after: time to first token, mean (s)': statistics.mean(after["ttft"]),
+        'before: total latency, mean (s)': statistics.mean(before["total"]),
+        'after: total latency, mean (s)': statistics.mean(after["total"]),
+    }
+    print_results(f"Context assembly benchmark ({args.days} days of history)", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Throughput of the shared cleaning stage against the per-row and regex parsers it replaced.
+
+Writes a synthetic raw CSV of --rows rows, shaped like data_extractor.py's
+output with a mix of price formats (free, coming soon, euro and dollar
+prices, thousands separators, multi-line discounts, missing cells).
+Streams the whole file through data_cleaning.clean_csv and reports rows/sec
+and peak RSS growth, which stays flat as the file grows. Then compares
+the two parsers it replaced with clean_frame on the first --sample rows in memory.
+
+Usage: python -m benchmarks.data_cleaning [--rows 2000000] [--sample 200000] [--chunksize 100000]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from benchmarks.common import current_rss_mb, print_results, timer
+from data_cleaning import clean_csv, clean_frame
+
+PRICES = np.array([
+    "Free To Play", "Coming Soon", "59,99€", "19,99€", "4,99€", "-20%\n59,99€\n47,99€",
+    "-50%\n39,99€\n19,99€", "$29.99", "$1,299.00", "1.299,00€", "Free", "",
+], dtype=object)
+
+
+def write_raw_csv(path: str, rows: int, chunk: int = 200_000, seed: int = 0):
+    """Write rows of raw scraper output in chunks, so generating a large file needs little memory."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        players = rng.lognormal(7, 2, size=n).astype(np.int64)
+        frame = pd.DataFrame({
+            'name': [f"Game {i}" for i in range(start, start + n)],
+            'price': PRICES[rng.integers(0, len(PRICES), size=n)],
+            'current_players': [f"{p:,}" for p in players],
+            'peak_players_today': [f"{p:,}" for p in (players * rng.uniform(1.0, 1.3, size=n)).astype(np.int64)],
+            'date': '2024-11-02 13:45:12.123456',
+        })
+        frame.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+class RSSSampler:
+    """Samples this process's RSS in a background thread; the max growth over the block is in .growth."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.growth = 0.0
+        self._stop = threading.Event()
+
+    def _run(self, baseline: float):
+        while not self._stop.wait(self.interval):
+            self.growth = max(self.growth, current_rss_mb() - baseline)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, args=(current_rss_mb(),), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def legacy_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """The per-row parser steam_game_price_analysis.py used."""
+    def clean_price(price):
+        if not isinstance(price, str):
+            return 0.0
+        if 'Free To Play' in price or 'Coming Soon' in price:
+            return 0.0
+        try:
+            price = price.split('\n')[-1].replace('€', '').replace(',', '.')
+            return float(price)
+        except Exception:
+            return 0.0
+
+    df = df.copy()
+    df['price'] = df['price'].apply(clean_price)
+    df['current_players'] = pd.to_numeric(df['current_players'].str.replace(',', ''), errors='coerce')
+    df['peak_players_today'] = pd.to_numeric(df['peak_players_today'].str.replace(',', ''), errors='coerce')
+    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+    return df
+
+
+def legacy_regex(df: pd.DataFrame) -> pd.DataFrame:
+    """The regex parser SteamScraper.save_to_csv used."""
+    df = df.copy()
+    df['price'] = np.where(
+        df['price'].str.contains('Free To Play|Coming Soon', na=True),
+        0.0,
+        pd.to_numeric(df['price'].str.extract(r'(\d+,\d+|\d+\.\d+)')[0]
+                      .str.replace(',', '.'), errors='coerce').fillna(0.0)
+    )
+    players = ['current_players', 'peak_players_today']
+    df[players] = df[players].replace(',', '', regex=True).apply(pd.to_numeric, errors='coerce')
+    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--sample', type=int, default=200_000, help='Rows compared in memory')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        raw_path = os.path.join(folder, 'raw.csv')
+        with timer('write synthetic raw CSV (s)', results):
+            write_raw_csv(raw_path, args.rows)
+        results['raw CSV size (MB)'] = os.path.getsize(raw_path) / (1024 * 1024)
+
+        with RSSSampler() as rss:
+            stats = clean_csv(raw_path, os.path.join(folder, 'clean.csv'), args.chunksize,
+                              keep=lambda chunk: chunk['price'] > 0)
+        results['clean_csv: rows/sec'] = stats['rows_per_sec']
+        results['clean_csv: paid rows kept'] = stats['rows_out']
+        results['clean_csv: peak RSS growth (MB)'] = rss.growth
+        print_results(f"Streaming clean of {args.rows} rows in chunks of {args.chunksize}", results)
+
+        sample = pd.read_csv(raw_path, nrows=args.sample, dtype=str, keep_default_na=False, na_values=[""])
+
+    results = {}
+    outputs = {}
+    for label, function in (('per-row apply', legacy_apply), ('scraper regex', legacy_regex),
+                            ('clean_frame', clean_frame)):
+        timings = {}
+        with timer(label, timings):
+            outputs[label] = function(sample)
+        results[f'{label}: rows/sec'] = len(sample) / timings[label]
+
+    expected = outputs['clean_frame']['price']
+    for label in ('per-row apply', 'scraper regex'):
+        results[f'{label}: prices differing from clean_frame'] = int((outputs[label]['price'] != expected).sum())
+    print_results(f"In memory, {len(sample)} rows", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Import time, load time, throughput and retrieval quality of each embedding backend.
+
+Every backend runs in a fresh interpreter, so import time includes torch
+or ONNX Runtime as it would at app startup. Models are downloaded by an
+untimed warm-up run first. Throughput embeds --docs snapshot documents
+(the backup CSV repeated); quality asks one question per game for
+--questions games picked with a fixed seed, and scores whether that
+game's row is retrieved in the top --k (hit rate) and at which rank (MRR).
+
+Usage: python -m benchmarks.embedding_backends [--backends mpnet minilm-onnx-int8] [--docs 2000] [--questions 50]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from benchmarks.common import BACKUP_CSV, ROOT, current_rss_mb, print_results
+
+QUESTION_TEMPLATES = [
+    "How many people are playing {name} right now?",
+    "What does {name} cost?",
+    "Is {name} popular today?",
+]
+
+
+def questions(data, count: int, seed: int = 0):
+    """Fixed (question, expected game) pairs for a sample of games."""
+    names = data['name'].drop_duplicates().sample(min(count, data['name'].nunique()), random_state=seed)
+    return [(QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)].format(name=name), name)
+            for i, name in enumerate(names)]
+
+
+def measure(backend: str, docs: int, question_count: int, k: int) -> dict:
+    """Run in a worker process: everything is timed from a cold interpreter."""
+    from config import Config
+    runtime = Config.EMBEDDING_BACKENDS[backend]["runtime"]
+
+    results = {}
+    start = time.perf_counter()
+    if runtime == "onnx":
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    else:
+        import sentence_transformers  # noqa: F401
+    results['import (s)'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embeddings = Config.create_embeddings(backend)
+    results['load model (s)'] = time.perf_counter() - start
+    results['RSS after load (MB)'] = current_rss_mb()
+
+    import numpy as np
+    import faiss
+    from data_loader import DataLoader
+
+    data = DataLoader.load_data(BACKUP_CSV)
+    documents = DataLoader.create_documents(data)
+    texts = [doc.page_content for doc in documents]
+    corpus = (texts * (docs // len(texts) + 1))[:docs]
+    start = time.perf_counter()
+    embeddings.embed_documents(corpus)
+    results['docs/sec'] = docs / (time.perf_counter() - start)
+
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    names = [doc.metadata['name'] for doc in documents]
+
+    pairs = questions(data, question_count)
+    start = time.perf_counter()
+    query = np.asarray([embeddings.embed_query(question) for question, _ in pairs], dtype=np.float32)
+    results['query embed, mean (ms)'] = (time.perf_counter() - start) / len(pairs) * 1000
+    _, found = index.search(query, k)
+    ranks = [next((rank for rank, i in enumerate(row, 1) if names[i] == name), None)
+             for row, (_, name) in zip(found, pairs)]
+    results[f'hit@{k}'] = sum(rank is not None for rank in ranks) / len(ranks)
+    results['MRR'] = sum(1 / rank for rank in ranks if rank) / len(ranks)
+    results['dimension'] = int(vectors.shape[1])
+    return results
+
+
+def run_worker(backend: str, *args: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.embedding_backends', '--worker', backend, *args],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', nargs='+', default=list(Config.EMBEDDING_BACKENDS))
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--k', type=int, default=8)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--download-only', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.download_only:
+            Config.create_embeddings(args.worker)
+            print(json.dumps({}))
+        else:
+            print(json.dumps(measure(args.worker, args.docs, args.questions, args.k)))
+        return
+
+    for backend in args.backends:
+        try:
+            run_worker(backend, '--download-only')
+            results = run_worker(backend, '--docs', str(args.docs), '--questions', str(args.questions),
+                                 '--k', str(args.k))
+        except subprocess.CalledProcessError as e:
+            print(f"\n{backend}: failed\n{e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        print_results(f"{backend} ({Config.embedding_id(backend)})", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Embedding throughput (docs/sec) by batch size, torch threads and encoder processes.
+
+Usage: python -m benchmarks.embedding_pipeline [--days 30] [--batch-sizes 32 64 128]
+       [--threads 1 2 4] [--processes 1 2 4]
+"""
+import argparse
+from benchmarks.common import create_embeddings, synthetic_history, print_results
+from config import Config
+from data_loader import DataLoader
+from embedding_pipeline import EmbeddingPipeline, MultiProcessEmbeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=30, help='Daily snapshots of ~100 rows each')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32, 64, 128])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--fake-embeddings', action='store_true',
+                        help='Use fake embeddings to time the pipeline overhead only')
+    args = parser.parse_args()
+
+    data = synthetic_history(args.days)
+    results = {'documents': len(data)}
+
+    embeddings = create_embeddings(args.fake_embeddings)
+    for threads in args.threads:
+        if not args.fake_embeddings:
+            import torch
+            torch.set_num_threads(threads)
+        for batch_size in args.batch_sizes:
+            if hasattr(embeddings, 'encode_kwargs'):
+                embeddings.encode_kwargs['batch_size'] = batch_size
+            pipeline = EmbeddingPipeline(embeddings, batch_size=batch_size)
+            pipeline.run(DataLoader.iter_documents(data))
+            results[f'threads={threads} batch={batch_size} (docs/sec)'] = pipeline.stats['docs_per_sec']
+
+    if not args.fake_embeddings:
+        for processes in [p for p in args.processes if p > 1]:
+            embeddings = MultiProcessEmbeddings(Config.EMBEDDING_MODEL, processes)
+            try:
+                pipeline = EmbeddingPipeline(embeddings, batch_size=Config.EMBEDDING_BATCH_SIZE * processes * 4)
+                pipeline.run(DataLoader.iter_documents(data))
+            finally:
+                embeddings.close()
+            results[f'processes={processes} (docs/sec)'] = pipeline.stats['docs_per_sec']
+
+    print_results(f"Embedding pipeline throughput ({args.days} days)", results)
+
+
+if __name__ == '__main__':
+    main()
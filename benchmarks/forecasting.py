@@ -0,0 +1,73 @@
+"""Batched forecasting over a large synthetic history vs a per-game loop.
+
+Builds --games x --days of daily price and player snapshots (random walks
+with weekly seasonality), then times pivoting the long frame into the
+games x days matrix and fitting all three models with holdout selection
+for every game at once. The per-game baseline runs the same models one
+game at a time on a sample and is extrapolated to all games.
+
+Usage: python -m benchmarks.forecasting [--games 10000] [--days 365] [--loop-sample 200]
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from benchmarks.common import current_rss_mb, timer, print_results
+from forecasting import Forecaster
+
+
+def synthetic_panel(games: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """Long-format history of random-walk player counts with a weekly cycle and stepwise prices."""
+    rng = np.random.default_rng(seed)
+    base = rng.lognormal(9, 1.5, size=(games, 1))
+    walk = np.cumsum(rng.normal(0, 0.02, size=(games, days)), axis=1)
+    weekly = 0.1 * np.sin(2 * np.pi * np.arange(days) / 7)
+    players = np.round(base * np.exp(walk + weekly)).astype('int64')
+    discounts = rng.random((games, days)) < 0.05
+    prices = np.where(discounts, 0.75, 1.0) * rng.choice([0.0, 4.99, 19.99, 59.99], size=(games, 1))
+    return pd.DataFrame({
+        'name': np.repeat([f'Game {i}' for i in range(games)], days),
+        'date': np.tile(pd.date_range('2024-01-01', periods=days), games),
+        'price': prices.ravel(),
+        'current_players': players.ravel(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--loop-sample', type=int, default=200, help='Games timed one at a time for the baseline')
+    args = parser.parse_args()
+
+    results = {}
+    with timer('generate history (s)', results):
+        history = synthetic_panel(args.games, args.days)
+    results['history rows'] = len(history)
+    forecaster = Forecaster()
+
+    with timer('pivot to games x days (s)', results):
+        _, _, values = Forecaster.panel(history, 'current_players')
+    with timer('fit + select, current_players, all games (s)', results):
+        players = forecaster.fit(history, 'current_players')
+    with timer('fit + select, price and players, all games (s)', results):
+        forecaster.fit_all(history)
+
+    sample = values[:args.loop_sample]
+    loop = {}
+    with timer('loop', loop):
+        for row in sample:
+            row = row[None, :]
+            train, test = row[:, :-forecaster.holdout], row[:, -forecaster.holdout:]
+            errors = np.abs(forecaster._forecasts(train, forecaster.holdout) - test[None]).mean(axis=2)
+            forecaster._forecasts(row, forecaster.horizon)[errors.argmin(axis=0), 0]
+    results[f'per-game loop, extrapolated to {args.games} games (s)'] = loop['loop'] / len(sample) * args.games
+    results['speedup (x)'] = (results[f'per-game loop, extrapolated to {args.games} games (s)']
+                              / results['fit + select, current_players, all games (s)'])
+    results['models chosen'] = players['model'].value_counts().to_dict()
+    results['RSS (MB)'] = current_rss_mb()
+
+    print_results(f"Forecasting benchmark ({args.games} games x {args.days} days)", results)
+
+
+if __name__ == '__main__':
+    main()
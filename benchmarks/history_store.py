@@ -0,0 +1,88 @@
+"""Load time and RSS of per-day CSVs vs the Parquet history store.
+
+Generates `--days` synthetic daily snapshots, writes them both as dated CSVs
+and into a HistoryStore, then times full and filtered loads. Each load runs
+in a fresh subprocess so its RSS is measured in isolation.
+
+Usage: python -m benchmarks.history_store [--days 365] [--range-days 30] [--games 5]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import current_rss_mb, synthetic_history, print_results
+
+
+def run_scenario(scenario: str, workdir: str) -> dict:
+    import pandas as pd
+    from data_loader import DataLoader
+    from history_store import HistoryStore
+
+    with open(os.path.join(workdir, 'query.json')) as f:
+        query = json.load(f)
+    start = time.perf_counter()
+    if scenario.startswith('csv'):
+        frames = [DataLoader.load_data(path) for path in sorted(glob.glob(os.path.join(workdir, 'csv', '*.csv')))]
+        data = pd.concat(frames, ignore_index=True)
+        if scenario == 'csv-filtered':
+            data = data[(data['date'] >= query['start']) & data['name'].isin(query['names'])]
+    elif scenario == 'parquet':
+        data = HistoryStore(os.path.join(workdir, 'history')).read()
+    else:
+        data = HistoryStore(os.path.join(workdir, 'history')).read(start=query['start'], names=query['names'])
+    return {"seconds": time.perf_counter() - start, "rows": len(data), "rss_mb": current_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--range-days', type=int, default=30, help='Date range for the filtered load')
+    parser.add_argument('--games', type=int, default=5, help='Games selected in the filtered load')
+    parser.add_argument('--scenario', nargs=2, metavar=('NAME', 'WORKDIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario[0], args.scenario[1])))
+        return
+
+    import pandas as pd
+    from history_store import HistoryStore
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        history = synthetic_history(args.days)
+        os.makedirs(os.path.join(workdir, 'csv'))
+        for day, rows in history.groupby(history['date'].dt.strftime('%Y-%m-%d')):
+            rows.to_csv(os.path.join(workdir, 'csv', f'{day}_Steam_top100.csv'), index=False)
+
+        store = HistoryStore(os.path.join(workdir, 'history'))
+        start = time.perf_counter()
+        store.import_csv(sorted(glob.glob(os.path.join(workdir, 'csv', '*.csv'))))
+        results['one-shot CSV import (s)'] = time.perf_counter() - start
+
+        query = {
+            "start": str(history['date'].max() - pd.Timedelta(days=args.range_days - 1)),
+            "names": history['name'].drop_duplicates().head(args.games).tolist(),
+        }
+        with open(os.path.join(workdir, 'query.json'), 'w') as f:
+            json.dump(query, f)
+
+        for scenario in ['csv', 'parquet', 'csv-filtered', 'parquet-filtered']:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.history_store', '--scenario', scenario, workdir],
+                check=True, capture_output=True, text=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            results[f'{scenario}: load (s)'] = stats['seconds']
+            results[f'{scenario}: rows'] = stats['rows']
+            results[f'{scenario}: RSS (MB)'] = stats['rss_mb']
+
+    print_results(f"History store benchmark ({args.days} days)", results)
+
+
+if __name__ == '__main__':
+    main()
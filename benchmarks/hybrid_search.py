@@ -0,0 +1,96 @@
+"""Latency and hit rate of questions naming a game: MMR vs BM25 + MMR fusion vs the exact-name shortcut.
+
+Indexes --games games x --days days of synthetic snapshots, then asks one
+question naming a game for --questions games picked with a fixed seed, and
+scores whether that game's rows are among the k retrieved documents (hit
+rate) and what share of them belong to it (precision). Also times building
+the lexical index from scratch against syncing one new day into it, and
+the cost fusion adds to questions that name no game.
+
+Usage: python -m benchmarks.hybrid_search [--games 2000] [--days 7] [--questions 100] [--fake-embeddings]
+"""
+import argparse
+import statistics
+import time
+from langchain_community.llms.fake import FakeListLLM
+from benchmarks.common import create_embeddings, percentiles, print_results, synthetic_snapshots, timer
+from benchmarks.embedding_backends import questions
+from benchmarks.query_router import QUESTIONS
+from config import Config
+from data_cleaning import clean_frame
+from data_loader import DataLoader
+from lexical_index import LexicalIndex
+from retrieval_chain import RetrievalChain
+
+
+def score(run, pairs):
+    """Mean and p95 latency in ms, hit rate and precision of run(question) -> documents."""
+    latencies, hits, precision = [], [], []
+    for question, name in pairs:
+        start = time.perf_counter()
+        documents = run(question)
+        latencies.append(time.perf_counter() - start)
+        names = [doc.metadata.get('name') for doc in documents]
+        hits.append(name in names)
+        precision.append(names.count(name) / len(names) if names else 0.0)
+    return {'mean (ms)': statistics.mean(latencies) * 1000, 'p95 (ms)': percentiles(latencies)[95] * 1000,
+            'hit rate': sum(hits) / len(hits), 'precision': statistics.mean(precision)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--questions', type=int, default=100)
+    parser.add_argument('--fake-embeddings', action='store_true',
+                        help='Use deterministic fake embeddings; hit rates of the vector paths become meaningless')
+    args = parser.parse_args()
+
+    results = {}
+    data = clean_frame(synthetic_snapshots(args.games, args.days))
+    documents = DataLoader.create_documents(data)
+    results['documents'] = len(documents)
+    with timer('build chain (s)', results):
+        chain = RetrievalChain(documents, embeddings=create_embeddings(args.fake_embeddings),
+                               llm=FakeListLLM(responses=[""]), data=data)
+
+    ids = list(chain.vectorstore.index_to_docstore_id.values())
+    stored = [chain.vectorstore.docstore.search(doc_id) for doc_id in ids]
+    with timer('lexical index: build from scratch (s)', results):
+        LexicalIndex().add(ids, stored)
+    latest = max(doc.metadata['date'] for doc in stored)
+    new = [i for i, doc in enumerate(stored) if doc.metadata['date'] == latest]
+    lexical = LexicalIndex()
+    lexical.add(ids, stored)
+    lexical.remove([ids[i] for i in new])
+    with timer('lexical index: sync one new day (s)', results):
+        lexical.sync(chain.vectorstore)
+    print_results(f"Indexes ({args.games} games x {args.days} days)", results)
+
+    kwargs = chain.retriever.search_kwargs
+    named = questions(data, args.questions)
+
+    def mmr(question):
+        return chain.vectorstore.max_marginal_relevance_search_by_vector(chain.embeddings.embed_query(question),
+                                                                         **kwargs)
+
+    def fused(question):
+        return chain.fuse(question, mmr(question))
+
+    results = {}
+    for label, run in (('MMR', mmr), ('BM25 + MMR fusion', fused), ('exact-name shortcut', chain.named_documents)):
+        for metric, value in score(run, named).items():
+            results[f'{label}: {metric}'] = value
+    print_results(f"Questions naming a game ({len(named)}, k={kwargs['k']})", results)
+
+    results = {}
+    generic = [(question, None) for question in QUESTIONS]
+    for label, run in (('MMR', mmr), ('BM25 + MMR fusion', fused)):
+        results[f'{label}: mean (ms)'] = score(run, generic)['mean (ms)']
+    print_results(f"Questions naming no game ({len(generic)})", results)
+    print(f"\nFusion constant HYBRID_RRF_K={Config.HYBRID_RRF_K}, BM25 skips terms in over "
+          f"{Config.LEXICAL_MAX_DF:.0%} of documents")
+
+
+if __name__ == '__main__':
+    main()
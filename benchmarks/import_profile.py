@@ -0,0 +1,101 @@
+"""Startup profile: where `import main` spends its time, and what is deferred to first use.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+breaks the total down by top-level package (self time, so every module
+is counted once). Then times a cold import of each module the app now
+loads only on first use, and the first render of the page with Streamlit's
+AppTest while the RAG chain builds in the background.
+
+Usage: python -m benchmarks.import_profile [--top 15] [--repeat 3] [--skip-render]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from benchmarks.common import ROOT, print_results
+
+# Imported by the builders in shared_resources, the embedding factory or the refresh worker
+DEFERRED = [
+    "retrieval_chain",
+    "llm_client",
+    "openai",
+    "langchain_community.vectorstores.faiss",
+    "langchain_huggingface",
+    "sentence_transformers",
+    "onnx_embeddings",
+    "steam_scraper",
+    "upstash_redis",
+    "redis",
+]
+
+
+def import_profile(module: str) -> dict:
+    """Self time in seconds per top-level package for a cold import of module."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us) / 1e6
+    return packages
+
+
+def cold_import(module: str, repeat: int):
+    """Best wall-clock time to import module in a fresh interpreter, or None if it is not installed."""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    times = []
+    for _ in range(repeat):
+        run = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        if run.returncode != 0:
+            return None
+        times.append(float(run.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def first_render() -> float:
+    """Seconds for the first run of the page script, with the refresh worker disabled."""
+    from streamlit.testing.v1 import AppTest
+
+    script = (
+        "from config import Config\n"
+        "Config.REFRESH_ENABLED = False\n"
+        "import main\n"
+        "app = main.GameInsightApp()\n"
+        "app.run()\n"
+    )
+    start = time.perf_counter()
+    test = AppTest.from_string(script, default_timeout=120).run()
+    elapsed = time.perf_counter() - start
+    if test.exception:
+        raise RuntimeError(test.exception[0].value)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--top', type=int, default=15, help='Packages to list in the breakdown')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-render', action='store_true', help='Skip the Streamlit AppTest render')
+    args = parser.parse_args()
+
+    packages = import_profile('main')
+    breakdown = {'total (s)': sum(packages.values())}
+    for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        breakdown[f'{name} (s)'] = seconds
+    print_results("import main: self time by package", breakdown)
+
+    deferred = {}
+    for module in DEFERRED:
+        seconds = cold_import(module, args.repeat)
+        deferred[f'{module} (s)'] = seconds if seconds is not None else 'not installed'
+    print_results("Deferred to first use: cold import, best of --repeat", deferred)
+
+    if not args.skip_render:
+        print_results("Page", {'first render, chain warming in background (s)': first_render()})
+
+
+if __name__ == '__main__':
+    main()
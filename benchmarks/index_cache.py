@@ -0,0 +1,63 @@
+"""Cold vs warm start and incremental refresh of the FAISS index cache.
+
+Usage: python -m benchmarks.index_cache [--csv games_back-up.csv] [--repeat 5] [--changed 10]
+"""
+import argparse
+import os
+import tempfile
+from benchmarks.common import BACKUP_CSV, create_embeddings, timer, print_results
+from config import Config
+from data_loader import DataLoader
+from index_cache import IndexCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', default=BACKUP_CSV)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--changed', type=int, default=10,
+                        help='Rows whose player counts change in the refreshed snapshot')
+    parser.add_argument('--fake-embeddings', action='store_true',
+                        help='Use deterministic fake embeddings to time FAISS and I/O only')
+    args = parser.parse_args()
+
+    results = {}
+    with timer('load embedding model (s)', results):
+        embeddings = create_embeddings(args.fake_embeddings)
+
+    data = DataLoader.load_data(args.csv)
+    documents = DataLoader.create_documents(data)
+    results['documents'] = len(documents)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = IndexCache(cache_dir)
+        embeddings = cache.cached_embeddings(embeddings, Config.embedding_id())
+        with timer('hash source (s)', results):
+            key = IndexCache.make_key(args.csv, Config.embedding_id())
+
+        with timer('cold start: embed + build + save (s)', results):
+            cache.get_or_build(key, documents, embeddings)
+
+        warm = {}
+        for i in range(args.repeat):
+            with timer(i, warm):
+                vectorstore = cache.get_or_build(key, documents, embeddings)
+        results['warm start: mmap load, best (s)'] = min(warm.values())
+        results['speedup (x)'] = results['cold start: embed + build + save (s)'] / max(min(warm.values()), 1e-9)
+        results['indexed vectors'] = vectorstore.index.ntotal
+
+        # Simulate the next day's snapshot with a few changed rows
+        refreshed = data.copy()
+        refreshed.loc[refreshed.index[:args.changed], 'current_players'] += 1
+        refreshed_csv = os.path.join(cache_dir, 'refreshed.csv')
+        refreshed.to_csv(refreshed_csv, index=False)
+        refreshed_key = IndexCache.make_key(refreshed_csv, Config.embedding_id())
+        refreshed_documents = DataLoader.create_documents(refreshed)
+        with timer(f'incremental refresh, {args.changed} changed rows (s)', results):
+            cache.get_or_build(refreshed_key, refreshed_documents, embeddings)
+
+    print_results(f"Index cache benchmark ({args.csv})", results)
+
+
+if __name__ == '__main__':
+    main()
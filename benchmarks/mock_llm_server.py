@@ -0,0 +1,140 @@
+"""Local OpenAI-compatible chat completions server with configurable latency.
+
+Serves POST /v1/chat/completions, streaming (server-sent events) or not, so
+NvidiaLLM can be benchmarked without an API key. Each response waits
+`first_token_latency` seconds, plus prompt length / `prefill_tokens_per_second`
+when that is set, then emits up to `completion_tokens` tokens (capped by the
+request's max_tokens) at `tokens_per_second`. Prompt tokens are estimated at
+four characters per token and reported in the usage chunk when the request
+asks for stream_options.include_usage.
+
+Usage: python -m benchmarks.mock_llm_server [--port 8000] [--first-token-latency 0.3]
+       [--tokens-per-second 50] [--completion-tokens 64] [--prefill-tokens-per-second 0]
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        settings = self.server.settings
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "mock")
+        n_tokens = min(settings["completion_tokens"], request.get("max_tokens") or settings["completion_tokens"])
+        delay = 1.0 / settings["tokens_per_second"] if settings["tokens_per_second"] else 0.0
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+        self.server.count_request()
+
+        prefill = prompt_tokens / settings["prefill_tokens_per_second"] if settings["prefill_tokens_per_second"] else 0.0
+        time.sleep(settings["first_token_latency"] + prefill)
+
+        if not request.get("stream"):
+            time.sleep(delay * n_tokens)
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "token " * n_tokens}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                          "total_tokens": prompt_tokens + n_tokens},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(n_tokens):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": "token "}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            if i < n_tokens - 1:
+                time.sleep(delay)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                          "total_tokens": prompt_tokens + n_tokens},
+            }
+            self._write_chunk(f"data: {json.dumps(usage)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, first_token_latency: float = 0.3,
+                 tokens_per_second: float = 50.0, completion_tokens: int = 64,
+                 prefill_tokens_per_second: float = 0.0):
+        super().__init__(("127.0.0.1", port), MockLLMHandler)
+        self.settings = {
+            "first_token_latency": first_token_latency,
+            "tokens_per_second": tokens_per_second,
+            "completion_tokens": completion_tokens,
+            "prefill_tokens_per_second": prefill_tokens_per_second,
+        }
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Serve on a background thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--first-token-latency', type=float, default=0.3)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--completion-tokens', type=int, default=64)
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=0.0,
+                        help='Prompt processing speed; 0 makes first-token latency independent of prompt length')
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.port, args.first_token_latency, args.tokens_per_second, args.completion_tokens,
+                           args.prefill_tokens_per_second)
+    print(f"Mock OpenAI-compatible server listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,73 @@
+"""Per-route retrieval latency and context size: routed queries vs MMR for every question.
+
+Runs the app's suggested questions plus a few filter questions through
+RetrievalChain.retrieve and through plain MMR retrieval, over a snapshot
+scaled up to --days of synthetic history. No LLM is called; the context
+size shows how much prompt each route would send.
+
+Usage: python -m benchmarks.query_router [--days 30] [--repeat 5] [--fake-embeddings]
+"""
+import argparse
+import statistics
+from langchain_community.llms.fake import FakeListLLM
+from benchmarks.common import create_embeddings, synthetic_history, timer, print_results
+from data_loader import DataLoader
+from retrieval_chain import RetrievalChain
+
+QUESTIONS = [
+    "What game has the highest current player count and why might it be so popular?",
+    "What are the most popular free-to-play games right now?",
+    "Which games show the biggest difference between peak and current players today?",
+    "Which price range shows the highest player engagement?",
+    "How many games have over 100k players?",
+    "Tell me about free games with a good story",
+    "Any paid games under $20 worth trying?",
+    "What are the current trending games based on player count growth?",
+    "What patterns do you notice in player activity across different game genres?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=30, help='Days of synthetic history to index')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fake-embeddings', action='store_true',
+                        help='Use deterministic fake embeddings to time FAISS and pandas only')
+    args = parser.parse_args()
+
+    results = {}
+    data = synthetic_history(args.days)
+    documents = DataLoader.create_documents(data)
+    results['documents'] = len(documents)
+    with timer('build chain (s)', results):
+        # The LLM is never called; retrieval is what is being timed
+        llm = FakeListLLM(responses=[""])
+        chain = RetrievalChain(documents, embeddings=create_embeddings(args.fake_embeddings), llm=llm, data=data)
+
+    per_route = {}
+    for question in QUESTIONS:
+        routed, mmr = {}, {}
+        for i in range(args.repeat):
+            with timer(i, routed):
+                retrieved = chain.retrieve(question)
+            with timer(i, mmr):
+                documents = chain.retriever.invoke(question)
+        route = retrieved["route"]
+        stats = per_route.setdefault(route, {"routed": [], "mmr": [], "routed_chars": [], "mmr_chars": []})
+        stats["routed"].append(min(routed.values()))
+        stats["mmr"].append(min(mmr.values()))
+        stats["routed_chars"].append(len(chain.build_prompt(question, retrieved["documents"])))
+        stats["mmr_chars"].append(len(chain.build_prompt(question, documents)))
+
+    for route, stats in per_route.items():
+        results[f'{route}: questions'] = len(stats["routed"])
+        results[f'{route}: routed retrieval, mean (ms)'] = statistics.mean(stats["routed"]) * 1000
+        results[f'{route}: MMR retrieval, mean (ms)'] = statistics.mean(stats["mmr"]) * 1000
+        results[f'{route}: routed prompt, mean (chars)'] = statistics.mean(stats["routed_chars"])
+        results[f'{route}: MMR prompt, mean (chars)'] = statistics.mean(stats["mmr_chars"])
+
+    print_results(f"Query router benchmark ({args.days} days of history)", results)
+
+
+if __name__ == '__main__':
+    main()
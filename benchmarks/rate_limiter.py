@@ -0,0 +1,114 @@
+"""Rate limiter decisions/sec under concurrent threads, per backend.
+
+Compares the in-process sliding window with Redis, where the old
+check-then-increment style (GET, then INCR and EXPIRE: several round-trips
+and a race between them) is measured against the single atomic Lua script
+and against pipelined batch checks. Also counts how many requests each
+approach admits when every thread hammers the same key, which shows the
+race in the two-step version.
+
+Redis runs use --redis-url, or a throwaway redis-server started on a free
+port if the binary is on PATH; otherwise only the in-process backend runs.
+
+Usage: python -m benchmarks.rate_limiter [--threads 8] [--decisions 20000] [--batch 100]
+"""
+import argparse
+import shutil
+import threading
+import time
+import uuid
+from benchmarks.common import print_results, start_redis_server
+from rate_limiter import InMemoryBackend, RedisBackend
+
+
+class TwoStepRedisBackend(RedisBackend):
+    """The check-then-increment pattern the limiter used before the Lua script."""
+
+    def consume(self, key, limit, window):
+        count = int(self.redis.get(key) or 0)
+        if count >= limit:
+            return False, 0, time.time() + window
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.incr(key)
+        pipe.expire(key, window)
+        pipe.execute()
+        return True, limit - count - 1, time.time() + window
+
+
+def decisions_per_sec(backend, threads: int, decisions: int, batch: int = 1) -> float:
+    """Run decisions spread over threads, each on its own keys; returns decisions per second."""
+    per_thread = decisions // threads
+    prefix = uuid.uuid4().hex
+
+    def work(thread_id):
+        keys = [f"bench:{prefix}:{thread_id}:{i}" for i in range(per_thread)]
+        if batch > 1:
+            for start in range(0, per_thread, batch):
+                backend.consume_many(keys[start:start + batch], 3, 60)
+        else:
+            for key in keys:
+                backend.consume(key, 3, 60)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def admitted_on_one_key(backend, threads: int, attempts: int, limit: int = 3) -> int:
+    """Hammer one key from every thread and count how many requests were let through."""
+    key = f"bench:{uuid.uuid4().hex}:shared"
+    admitted = []
+
+    def work():
+        admitted.extend(backend.consume(key, limit, 60)[0] for _ in range(attempts))
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(admitted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--decisions', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=100, help='Keys per pipelined batch check')
+    parser.add_argument('--redis-url', help='Use an existing Redis instead of starting redis-server')
+    args = parser.parse_args()
+
+    results = {}
+    memory = InMemoryBackend()
+    results['memory: decisions/sec'] = decisions_per_sec(memory, args.threads, args.decisions)
+    results['memory: admitted on one key (limit 3)'] = admitted_on_one_key(memory, args.threads, 50)
+
+    process, url = None, args.redis_url
+    if url is None and shutil.which('redis-server'):
+        process, url = start_redis_server()
+    if url is None:
+        print("redis-server not found and no --redis-url given; skipping Redis backends")
+    else:
+        try:
+            two_step, lua = TwoStepRedisBackend(url), RedisBackend(url)
+            results['redis GET+INCR+EXPIRE: decisions/sec'] = decisions_per_sec(two_step, args.threads, args.decisions)
+            results['redis Lua script: decisions/sec'] = decisions_per_sec(lua, args.threads, args.decisions)
+            results[f'redis Lua, pipelined x{args.batch}: decisions/sec'] = decisions_per_sec(
+                lua, args.threads, args.decisions, batch=args.batch
+            )
+            results['redis GET+INCR+EXPIRE: admitted on one key (limit 3)'] = admitted_on_one_key(two_step, args.threads, 50)
+            results['redis Lua script: admitted on one key (limit 3)'] = admitted_on_one_key(lua, args.threads, 50)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    print_results(f"Rate limiter benchmark ({args.threads} threads)", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Offline scraper benchmark against saved HTML fixtures served from a local HTTP server.
+
+Compares a fresh Chrome per scrape with a pooled, long-lived browser, and
+concurrent multi-page scraping with several pooled browsers. Requires Chrome
+and chromedriver, but no network access.
+
+Usage: python -m benchmarks.scraper [--repeat 5] [--pages 4] [--pool-size 2]
+"""
+import argparse
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.common import ROOT, timer, print_results
+from steam_scraper import BrowserPool, SteamScraper
+
+FIXTURES = ROOT / 'fixtures'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures() -> ThreadingHTTPServer:
+    """Serve the fixtures directory on a free local port."""
+    handler = functools.partial(QuietHandler, directory=str(FIXTURES))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=4, help='Pages scraped concurrently')
+    parser.add_argument('--pool-size', type=int, default=2)
+    args = parser.parse_args()
+
+    server = serve_fixtures()
+    url = f"http://127.0.0.1:{server.server_address[1]}/steam_mostplayed.html"
+    results = {}
+
+    with timer(f'fresh browser x{args.repeat} (s)', results):
+        for _ in range(args.repeat):
+            scraper = SteamScraper(url=url)
+            rows = scraper.fetch()
+            scraper.close()
+    results['rows per page'] = len(rows)
+
+    scraper = SteamScraper(url=url)
+    scraper.fetch()  # warm the pool
+    with timer(f'pooled browser x{args.repeat} (s)', results):
+        for _ in range(args.repeat):
+            scraper.fetch()
+    scraper.close()
+
+    urls = {f'region-{i}': f"{url}?cc={i}" for i in range(args.pages)}
+    for size in sorted({1, args.pool_size}):
+        scraper = SteamScraper(url=url, pool=BrowserPool(size))
+        scraper.scrape_many(urls)  # start the browsers
+        with timer(f'{args.pages} pages, pool of {size} (s)', results):
+            frames = scraper.scrape_many(urls)
+        scraper.close()
+    results['pages scraped'] = len(frames)
+
+    server.shutdown()
+    print_results("Scraper benchmark (offline fixtures)", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Resident memory with 1 vs many concurrent sessions, shared registry vs per-session chains.
+
+Each session is a thread that obtains a RAG chain and runs a retrieval, as a
+Streamlit script thread would. Every scenario runs in a fresh subprocess so
+RSS numbers are not polluted by earlier scenarios. The LLM is a local fake,
+since only its client object (not the remote model) lives in this process.
+
+Usage: python -m benchmarks.shared_resources [--sessions 50] [--per-session-max 5]
+"""
+import argparse
+import subprocess
+import sys
+import threading
+from benchmarks.common import BACKUP_CSV, create_embeddings, current_rss_mb, print_results
+
+
+def run_scenario(mode: str, sessions: int, csv_path: str, fake: bool) -> float:
+    from langchain_community.llms.fake import FakeListLLM
+    from data_loader import DataLoader
+    from retrieval_chain import RetrievalChain
+    from shared_resources import ResourceRegistry, data_version
+
+    registry = ResourceRegistry()
+    documents = DataLoader.create_documents(DataLoader.load_data(csv_path))
+    sessions_chains = []
+
+    def build():
+        if mode == 'shared':
+            embeddings = registry.get("embeddings", "bench", lambda: create_embeddings(fake))
+        else:
+            embeddings = create_embeddings(fake)
+        return RetrievalChain(documents, embeddings=embeddings, llm=FakeListLLM(responses=["ok"]))
+
+    def session():
+        if mode == 'shared':
+            chain = registry.get("rag_chain", data_version(csv_path), build)
+        else:
+            chain = build()
+        chain.retriever.invoke("Which free games have the most players?")
+        sessions_chains.append(chain)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return current_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', default=BACKUP_CSV)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--per-session-max', type=int, default=5,
+                        help='Session count for the per-session baseline (each loads its own model)')
+    parser.add_argument('--fake-embeddings', action='store_true')
+    parser.add_argument('--scenario', nargs=2, metavar=('MODE', 'SESSIONS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        mode, sessions = args.scenario[0], int(args.scenario[1])
+        print(run_scenario(mode, sessions, args.csv, args.fake_embeddings))
+        return
+
+    scenarios = [('shared', 1), ('shared', args.sessions),
+                 ('per-session', 1), ('per-session', args.per_session_max)]
+    results = {}
+    for mode, sessions in scenarios:
+        command = [sys.executable, '-m', 'benchmarks.shared_resources', '--csv', args.csv,
+                   '--scenario', mode, str(sessions)]
+        if args.fake_embeddings:
+            command.append('--fake-embeddings')
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results[f'{mode}, {sessions} sessions: RSS (MB)'] = float(output.strip().splitlines()[-1])
+
+    print_results("Shared resource registry memory benchmark", results)
+
+
+if __name__ == '__main__':
+    main()
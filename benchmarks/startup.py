@@ -0,0 +1,59 @@
+"""Time until the app has data to serve: synchronous scrape at startup vs background refresh.
+
+The "before" path scrapes synchronously the way GameInsightApp.__init__ used
+to (against the offline fixture, so it needs Chrome but no network). The
+"after" path selects the last good snapshot and starts the refresh worker.
+
+Usage: python -m benchmarks.startup [--repeat 3] [--skip-scrape]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from benchmarks.common import BACKUP_CSV, timer, print_results
+from config import Config
+from refresh_worker import RefreshWorker, is_valid_snapshot, latest_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-scrape', action='store_true', help='Skip the Chrome-based "before" path')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        Config.DATA_PATH = os.path.join(workdir, 'games_fresh.csv')
+        Config.DATA_VERSION_PATH = os.path.join(workdir, 'data_version.json')
+        shutil.copy(BACKUP_CSV, Config.DATA_PATH)
+
+        if not args.skip_scrape:
+            from benchmarks.scraper import serve_fixtures
+            from steam_scraper import SteamScraper
+
+            server = serve_fixtures()
+            url = f"http://127.0.0.1:{server.server_address[1]}/steam_mostplayed.html"
+            runs = {}
+            for i in range(args.repeat):
+                with timer(i, runs):
+                    scraper = SteamScraper(output_path=os.path.join(workdir, 'sync.csv'), url=url)
+                    scraper.scrape()
+                    scraper.close()
+                    is_valid_snapshot(os.path.join(workdir, 'sync.csv'))
+            server.shutdown()
+            results['before: synchronous scrape at startup (s)'] = min(runs.values())
+
+        runs = {}
+        for i in range(args.repeat):
+            with timer(i, runs):
+                worker = RefreshWorker()
+                worker.start()
+                latest_snapshot()
+            worker.stop()
+        results['after: last good snapshot + background worker (s)'] = min(runs.values())
+
+    print_results("Startup latency benchmark", results)
+
+
+if __name__ == '__main__':
+    main()
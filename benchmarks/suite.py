@@ -0,0 +1,194 @@
+"""Offline end-to-end benchmark suite on synthetic Steam snapshots, a mock LLM and a local Redis.
+
+Generates --days daily snapshots of --games games in the columns of
+games_back-up.csv, writes them as per-day CSVs in a temporary directory
+and runs every stage the app runs, without network access:
+
+  ingest      DataLoader.load_data + create_documents of the latest snapshot,
+              import of all snapshots into the Parquet history store, forecasts
+  index       RetrievalChain build with a cold, then a warm FAISS index cache
+  chain       RetrievalChain.query for the query router's question mix
+  app         the page's path for --users concurrent sessions: rate limiter
+              check, shared RAG chain with response cache, streamed answer
+
+The LLM is the local mock server; the rate limiter uses a throwaway
+redis-server when one is on PATH and the in-process backend otherwise.
+Reports wall time, p50/p95/p99 latency, RSS after each phase and the
+per-stage breakdown recorded by the metrics registry.
+
+Usage: python -m benchmarks.suite [--games 2000] [--days 30] [--users 32] [--concurrency 8]
+       [--repeat 3] [--first-token-latency 0.3] [--tokens-per-second 50] [--fake-embeddings]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import (create_embeddings, current_rss_mb, peak_rss_mb, percentiles, print_results,
+                               start_redis_server, synthetic_snapshots, timer, write_snapshots)
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.query_router import QUESTIONS
+
+
+def latency_results(label: str, seconds: list, results: dict):
+    """Add p50/p95/p99 of a list of durations to results, in milliseconds."""
+    for q, value in percentiles(seconds).items():
+        results[f'{label} p{q} (ms)'] = value * 1000
+
+
+def ingest(paths: list, history_dir: str, results: dict):
+    from data_loader import DataLoader
+    from forecasting import forecast_history
+    from history_store import HistoryStore
+
+    with timer('load latest snapshot (s)', results):
+        data = DataLoader.load_data(paths[-1])
+    with timer('create documents (s)', results):
+        documents = DataLoader.create_documents(data)
+    with timer(f'import {len(paths)} snapshots into history store (s)', results):
+        HistoryStore(history_dir).import_csv(paths)
+    with timer('forecast from history (s)', results):
+        forecasts = forecast_history(history_dir)
+    results['documents'] = len(documents)
+    results['RSS after ingest (MB)'] = current_rss_mb()
+    return data, documents, forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=2000, help='Games per daily snapshot')
+    parser.add_argument('--days', type=int, default=30, help='Daily snapshots of history')
+    parser.add_argument('--users', type=int, default=32, help='Concurrent sessions on the app path')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads serving the sessions')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the question mix on the chain path')
+    parser.add_argument('--first-token-latency', type=float, default=0.3)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--completion-tokens', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fake-embeddings', action='store_true',
+                        help='Use deterministic fake embeddings to time everything but the encoder')
+    args = parser.parse_args()
+
+    server = MockLLMServer(0, args.first_token_latency, args.tokens_per_second, args.completion_tokens).start()
+    os.environ.setdefault("NVIDIA_API_KEY", "mock")
+    redis_process = None
+    work_dir = tempfile.mkdtemp(prefix='gameinsight-suite-')
+
+    from config import Config
+    Config.BASE_URL = server.base_url
+    Config.REFRESH_ENABLED = False
+    Config.INDEX_CACHE_DIR = os.path.join(work_dir, 'faiss')
+    Config.HISTORY_DIR = os.path.join(work_dir, 'history')
+    Config.RESPONSE_CACHE_BACKEND = "memory"
+    if shutil.which('redis-server'):
+        redis_process, Config.REDIS_URL = start_redis_server()
+        Config.RATE_LIMIT_BACKEND = "redis"
+    else:
+        Config.RATE_LIMIT_BACKEND = "memory"
+
+    from async_runtime import runtime
+    from metrics import metrics
+    from retrieval_chain import RetrievalChain
+    from shared_resources import get_llm, get_rag_chain, get_rate_limiter, registry
+
+    try:
+        setup = {'RSS at start (MB)': current_rss_mb()}
+        with timer('generate snapshots (s)', setup):
+            history = synthetic_snapshots(args.games, args.days, args.seed)
+        snapshot_dir = os.path.join(work_dir, 'snapshots')
+        os.makedirs(snapshot_dir)
+        with timer('write per-day CSVs (s)', setup):
+            paths = write_snapshots(history, snapshot_dir)
+        del history
+        setup['rate limiter backend'] = Config.RATE_LIMIT_BACKEND
+        with timer('load embedding model (s)', setup):
+            embeddings = registry.get("embeddings", Config.embedding_id(),
+                                      lambda: create_embeddings(args.fake_embeddings))
+        print_results(f"Setup ({args.games} games x {args.days} days)", setup)
+
+        results = {}
+        data, documents, forecasts = ingest(paths, Config.HISTORY_DIR, results)
+        print_results("Ingest", results)
+
+        results = {}
+        for start in ('cold', 'warm'):
+            with timer(f'{start} index cache: build chain (s)', results):
+                chain = RetrievalChain(documents, data=data, forecasts=forecasts, source_path=paths[-1],
+                                       cache_dir=Config.INDEX_CACHE_DIR, embeddings=embeddings, llm=get_llm())
+        results['RSS after index build (MB)'] = current_rss_mb()
+        print_results("Index build", results)
+
+        results = {}
+        latencies = []
+        for _ in range(args.repeat):
+            for question in QUESTIONS:
+                start = time.perf_counter()
+                chain.query(question)
+                latencies.append(time.perf_counter() - start)
+        results['queries'] = len(latencies)
+        latency_results('RetrievalChain.query', latencies, results)
+        results['RSS after chain queries (MB)'] = current_rss_mb()
+        print_results("RetrievalChain (no response cache)", results)
+        del chain
+
+        # The page's path (GameInsightApp.answer): each question is checked against the session's rate limit,
+        # then streamed from the shared chain
+        rng = random.Random(args.seed)
+        limiter_limit = Config.RATE_LIMIT_MAX_REQUESTS
+        sessions = [(f"rate_limit:suite-{i}", [rng.choice(QUESTIONS) for _ in range(limiter_limit + 1)])
+                    for i in range(args.users)]
+        results = {}
+        with timer('first page load: build shared chain (s)', results):
+            rag_chain = get_rag_chain(paths[-1])
+        rate_limiter = get_rate_limiter()
+
+        def session(user_key, questions):
+            timings, rejected = [], 0
+            for question in questions:
+                start = time.perf_counter()
+                if not rate_limiter.is_allowed(user_key):
+                    # The page tells the user when their quota resets
+                    rate_limiter.get_reset_time(user_key)
+                    rejected += 1
+                    continue
+                first_token = None
+                for event in runtime.iterate(rag_chain.aquery_stream(question)):
+                    if first_token is None and event.get("token"):
+                        first_token = time.perf_counter() - start
+                timings.append((first_token or 0.0, time.perf_counter() - start))
+            return timings, rejected
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(lambda s: session(*s), sessions))
+        elapsed = time.perf_counter() - start
+        timings = [t for session_timings, _ in outcomes for t in session_timings]
+        results['answered'] = len(timings)
+        results['rejected by rate limiter'] = sum(rejected for _, rejected in outcomes)
+        results['questions/sec'] = len(timings) / elapsed
+        latency_results('first token', [first for first, _ in timings], results)
+        latency_results('complete answer', [total for _, total in timings], results)
+        results.update({f'response cache {stat}': count for stat, count in rag_chain.response_cache.stats.items()})
+        results['mock LLM requests'] = server.requests
+        results['RSS after app path (MB)'] = current_rss_mb()
+        results['peak RSS (MB)'] = peak_rss_mb()
+        print_results(f"App path ({args.users} sessions, {args.concurrency} threads)", results)
+
+        stages = {}
+        for row in metrics.stage_summary():
+            stages[f"{row['stage']}: count"] = row['count']
+            stages[f"{row['stage']}: p50 / p95 / p99 (ms)"] = \
+                f"{row['p50_ms']:.1f} / {row['p95_ms']:.1f} / {row['p99_ms']:.1f}"
+        print_results("Stages (metrics registry, all phases)", stages)
+    finally:
+        server.stop()
+        if redis_process is not None:
+            redis_process.terminate()
+            redis_process.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
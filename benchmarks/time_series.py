@@ -0,0 +1,75 @@
+"""Per-game history context: raw daily rows vs time-series summaries, and range queries vs pandas.
+
+Builds the time-series store over --games games x --days days of synthetic
+snapshots and, for --questions games, compares a date-range lookup in the
+store with the equivalent boolean filter on the long frame. Then compares
+the prompt each context produces for "how did <game> do over the last
+30 days": every daily row of the game through ContextBuilder, only the k
+rows MMR would pass on, and the summary the named route now injects.
+ContextBuilder already folds a game's rows into one min-max line, so the
+summary costs a few more tokens, but covers every day of the period and
+adds rolling means, deltas and the dates of the low and high.
+
+Usage: python -m benchmarks.time_series [--games 10000] [--days 90] [--questions 200]
+"""
+import argparse
+import statistics
+import time
+from benchmarks.common import print_results, synthetic_snapshots, timer
+from context_builder import ContextBuilder
+from data_cleaning import clean_frame
+from data_loader import DataLoader
+from retrieval_chain import GamingBuddyPrompt
+from time_series import TimeSeriesStore
+
+
+def mean_ms(function, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - start) / len(items) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--k', type=int, default=8, help='Rows MMR passes on per question')
+    args = parser.parse_args()
+
+    data = clean_frame(synthetic_snapshots(args.games, args.days))
+    results = {'rows': len(data)}
+    with timer('build store with rolling stats (s)', results):
+        store = TimeSeriesStore(data)
+    names = list(data['name'].drop_duplicates().sample(min(args.questions, args.games), random_state=0))
+    question = "How did {} do over the last 30 days?"
+    start, end = store.period(question)
+
+    def pandas_range(name):
+        return data[(data['name'] == name) & (data['date'] >= start) & (data['date'] <= end)]
+
+    results['range query: pandas filter (ms)'] = mean_ms(pandas_range, names)
+    results['range query: store (ms)'] = mean_ms(lambda name: store.window(name, start, end), names)
+    results['range query + summary: store (ms)'] = mean_ms(lambda name: store.summary(name, start, end), names)
+    print_results(f"Store ({args.games} games x {args.days} days)", results)
+
+    builder = ContextBuilder(GamingBuddyPrompt.TEMPLATE)
+    rows = {name: DataLoader.create_documents(pandas_range(name)) for name in names}
+    contexts = {
+        'all daily rows': lambda name: rows[name],
+        f'{args.k} rows (MMR)': lambda name: rows[name][-args.k:],
+        'summary': lambda name: store.to_documents([name], start, end),
+    }
+    results = {}
+    for label, context in contexts.items():
+        tokens = [builder.build(question.format(name), context(name))['prompt_tokens'] for name in names]
+        results[f'{label}: prompt tokens'] = statistics.mean(tokens)
+        if label != 'summary':
+            results[f'{label}: days covered'] = statistics.mean(len(context(name)) for name in names)
+    results['summary: days covered'] = statistics.mean(len(store.window(name, start, end)['date']) for name in names)
+    print_results(f"Prompt for a 30-day trend question ({len(names)} games)", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Recall, latency and memory of the FAISS index types in vector_index.
+
+Generates --sizes clustered synthetic vectors of the embedding model's
+dimension, builds every index type and quantization over them, and
+reports recall@k against exact search, build time (training included),
+median single-query latency and serialized index size. The "auto" row
+shows which index the app would pick at that size.
+
+Usage: python -m benchmarks.vector_index [--sizes 10000 100000] [--dim 768] [--queries 200] [--k 10]
+       python -m benchmarks.vector_index --sizes 1000000   # about 3 GB of float32 vectors
+"""
+import argparse
+import time
+import faiss
+import numpy as np
+from benchmarks.common import timer, print_results
+import vector_index
+
+VARIANTS = [
+    ("flat", None),
+    ("flat", "fp16"),
+    ("flat", "int8"),
+    ("ivf_flat", None),
+    ("ivf_flat", "int8"),
+    ("ivf_pq", None),
+    ("hnsw", None),
+    ("hnsw", "fp16"),
+]
+
+
+def clustered_vectors(n: int, dim: int, clusters: int = 256, latent: int = 32, seed: int = 0) -> np.ndarray:
+    """Gaussian blobs in a low-dimensional latent space projected up to dim.
+
+    Sentence embeddings have a low intrinsic dimension; isotropic noise in
+    all dim directions would make every neighbour almost equidistant.
+    """
+    rng = np.random.default_rng(0)
+    projection = rng.normal(size=(latent, dim)).astype(np.float32) / np.sqrt(latent)
+    centres = rng.normal(size=(clusters, latent)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    points = centres[rng.integers(clusters, size=n)] + rng.normal(scale=0.5, size=(n, latent)).astype(np.float32)
+    noise = rng.normal(scale=0.05, size=(n, dim)).astype(np.float32)
+    return points @ projection + noise
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the true k nearest neighbours found per query."""
+    return float(np.mean([len(np.intersect1d(f, t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def run(size: int, dim: int, queries: int, k: int):
+    data = clustered_vectors(size, dim)
+    query = clustered_vectors(queries, dim, seed=1)
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(data)
+    _, truth = exact.search(query, k)
+
+    auto = vector_index.index_spec(size, dim, "auto", None)
+    for index_type, quantization in VARIANTS:
+        spec = vector_index.index_spec(size, dim, index_type, quantization)
+        results = {}
+        with timer('build, incl. training (s)', results):
+            index = vector_index.build_index(data, spec)
+
+        latencies = []
+        for q in query:
+            start = time.perf_counter()
+            index.search(q[None, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        _, found = index.search(query, k)
+
+        results[f'recall@{k}'] = recall(found, truth)
+        results['query p50 (ms)'] = float(np.percentile(latencies, 50))
+        results['query p95 (ms)'] = float(np.percentile(latencies, 95))
+        results['index size (MB)'] = vector_index.memory_bytes(index) / (1024 * 1024)
+        title = f"{size:,} x {dim}: {spec}" + ("  [auto]" if spec == auto else "")
+        print_results(title, results)
+        del index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.dim, args.queries, args.k)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
-from openai import OpenAI
+import os
+from typing import TYPE_CHECKING
 import streamlit as st
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
 class Config:
     """Configuration class for setting up the NVIDIA API."""
 
     # Static class variables
-    BASE_URL = "https://integrate.api.nvidia.com/v1"
+    BASE_URL = os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1")
     MODEL_NAME = "nvidia/llama-3.1-nemotron-70b-instruct"
 
     # Completion request parameters
@@ -16,15 +20,183 @@ class Config:
         "stream": True
     }
 
+    # Published snapshot and background refresh schedule
+    DATA_PATH = "games_fresh.csv"
+    BACKUP_DATA_PATH = "games_back-up.csv"
+    DATA_VERSION_PATH = ".cache/data_version.json"
+    REFRESH_ENABLED = True
+    REFRESH_INTERVAL = 6 * 60 * 60
+    REFRESH_RETRY_INTERVAL = 15 * 60
+    MIN_SNAPSHOT_ROWS = 50
+    CLEAN_CHUNK_SIZE = 100_000  # rows per chunk when cleaning raw snapshot CSVs
+
+    # Embedding backend, one of EMBEDDING_BACKENDS. "torch" backends run sentence-transformers;
+    # "onnx" backends run the model's ONNX export (int8: dynamically quantized) without importing torch.
+    # Their "file" paths follow the sentence-transformers hub layout but are untested against the published
+    # repositories; override "file" if a model's export lives elsewhere
+    EMBEDDING_BACKEND = "mpnet"
+    EMBEDDING_BACKENDS = {
+        "mpnet": {"model": "sentence-transformers/all-mpnet-base-v2", "runtime": "torch"},
+        "mpnet-onnx": {"model": "sentence-transformers/all-mpnet-base-v2", "runtime": "onnx",
+                       "file": "onnx/model.onnx"},
+        "mpnet-onnx-int8": {"model": "sentence-transformers/all-mpnet-base-v2", "runtime": "onnx",
+                            "file": "onnx/model_quint8_avx2.onnx"},
+        "minilm": {"model": "sentence-transformers/all-MiniLM-L6-v2", "runtime": "torch"},
+        "minilm-onnx": {"model": "sentence-transformers/all-MiniLM-L6-v2", "runtime": "onnx",
+                        "file": "onnx/model.onnx"},
+        "minilm-onnx-int8": {"model": "sentence-transformers/all-MiniLM-L6-v2", "runtime": "onnx",
+                             "file": "onnx/model_quint8_avx2.onnx"},
+    }
+    EMBEDDING_MODEL = EMBEDDING_BACKENDS[EMBEDDING_BACKEND]["model"]
+    INDEX_CACHE_DIR = ".cache/faiss"
+
+    # FAISS index type: "auto" picks flat, then IVF-Flat, then IVF-PQ as the corpus grows;
+    # "flat", "ivf_flat", "ivf_pq" or "hnsw" force one. Quantization: None, "fp16" or "int8"
+    INDEX_TYPE = "auto"
+    INDEX_QUANTIZATION = None
+    FLAT_INDEX_MAX_ROWS = 50_000
+    IVF_FLAT_INDEX_MAX_ROWS = 1_000_000
+    IVF_NPROBE = 16
+    HNSW_M = 32
+    HNSW_EF_SEARCH = 64
+    FILTER_EXACT_MAX_ROWS = 50_000  # filtered searches over fewer matching rows are brute force
+
+    # Hybrid retrieval: questions naming a game get that game's rows without an embedding call; other
+    # questions fuse BM25 over the document text with FAISS MMR by reciprocal rank (RRF constant below)
+    HYBRID_SEARCH = True
+    HYBRID_RRF_K = 60
+    LEXICAL_MAX_DF = 0.5  # terms in more than this share of documents are skipped by BM25
+
+    # Date-partitioned Parquet history of daily snapshots
+    HISTORY_DIR = "history"
+
+    # Forecasts over the snapshot history, in days
+    FORECAST_HORIZON = 7
+    FORECAST_SEASON = 7
+    FORECAST_HOLDOUT = 7
+    FORECAST_MIN_DAYS = 3
+
+    # Per-game time series: rolling windows and the period summarised when a question names none, in days
+    TIME_SERIES_WINDOWS = (7, 30)
+    TIME_SERIES_DEFAULT_DAYS = 30
+
+    # Embedding pipeline tuning
+    EMBEDDING_BATCH_SIZE = 64
+    EMBEDDING_THREADS = None  # torch or ONNX Runtime intra-op threads; None keeps the runtime's default
+
+    # LLM response cache
+    RESPONSE_CACHE_BACKEND = "memory"  # "memory" or "sqlite"
+    RESPONSE_CACHE_PATH = ".cache/responses.sqlite3"
+    RESPONSE_CACHE_TTL = 6 * 60 * 60
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD = 0.95  # None disables the semantic tier
+
+    # Async client connection pool and query concurrency
+    MAX_CONNECTIONS = 32
+    MAX_KEEPALIVE_CONNECTIONS = 16
+    KEEPALIVE_EXPIRY = 30.0
+    REQUEST_TIMEOUT = 120.0
+    MAX_CONCURRENT_QUERIES = 16
+
+    # Batch question answering: LLM calls in flight, and retries with exponential backoff from the base delay in seconds
+    BATCH_CONCURRENCY = 16
+    BATCH_MAX_RETRIES = 3
+    BATCH_RETRY_BACKOFF = 1.0
+
+    # Prompt assembly: token budget for the whole prompt and completion budgets per question type
+    PROMPT_TOKEN_BUDGET = 1500
+    MAX_TOKENS_BY_INTENT = {
+        "count": 256,
+        "aggregate": 256,
+        "rank": 384,
+        "price_buckets": 384,
+        "forecast": 384,
+        "filtered": 512,
+        "named": 512,
+        "semantic": 768,
+    }
+    STREAM_USAGE = True  # ask the API to report exact token usage at the end of each stream
+
+    # Query routing: structured answers come from pandas; True has the LLM phrase them
+    ROUTER_LLM_ANSWERS = True
+
+    # Dashboard aggregates and suggested questions, computed once per snapshot and cached next to it as
+    # JSON; AGGREGATES_PREWARM answers the suggested questions into the response cache for each new RAG chain
+    AGGREGATES_TOP_N = 10
+    AGGREGATES_MIN_PLAYERS = 1000  # games ranked by peak-to-current ratio need at least this many players
+    AGGREGATES_PREWARM = False
+
+    # Metrics: Prometheus text endpoint on METRICS_PORT (None disables it), per-query stage timings
+    # appended as JSON lines to METRICS_LOG_PATH (None disables it), and the app's debug panel
+    # (also shown for ?debug=1 in the URL)
+    METRICS_PORT = None
+    METRICS_LOG_PATH = None
+    DEBUG_PANEL = False
+
+    # Per-session rate limiting
+    RATE_LIMIT_BACKEND = "upstash"  # "upstash", "redis" or "memory"
+    REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_MAX_REQUESTS = 3
+    RATE_LIMIT_WINDOW = 24 * 60 * 60
+
     @staticmethod
     def get_api_key():
-        """Get API key from Streamlit secrets."""
-        api_key = st.secrets.get("NVIDIA_API_KEY")
+        """Get API key from Streamlit secrets, falling back to the environment."""
+        try:
+            api_key = st.secrets.get("NVIDIA_API_KEY")
+        except FileNotFoundError:
+            api_key = None
+        api_key = api_key or os.environ.get("NVIDIA_API_KEY")
         if not api_key:
-            raise ValueError("NVIDIA_API_KEY not found in Streamlit secrets")
+            raise ValueError("NVIDIA_API_KEY not found in Streamlit secrets or environment")
         return api_key
 
     @classmethod
-    def create_client(cls) -> OpenAI:
+    def create_client(cls) -> "OpenAI":
         """Create and return an OpenAI client configured for NVIDIA API."""
-        return OpenAI(api_key=cls.get_api_key(), base_url=cls.BASE_URL)
\ No newline at end of file
+        from openai import OpenAI
+        return OpenAI(api_key=cls.get_api_key(), base_url=cls.BASE_URL)
+
+    @classmethod
+    def create_async_client(cls) -> "AsyncOpenAI":
+        """Create an AsyncOpenAI client with a pooled, keep-alive HTTP connection pool."""
+        import httpx
+        from openai import AsyncOpenAI
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=cls.MAX_CONNECTIONS,
+                max_keepalive_connections=cls.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=cls.KEEPALIVE_EXPIRY
+            ),
+            timeout=cls.REQUEST_TIMEOUT
+        )
+        return AsyncOpenAI(api_key=cls.get_api_key(), base_url=cls.BASE_URL, http_client=http_client)
+
+    @classmethod
+    def embedding_id(cls, backend: str = None) -> str:
+        """Identify the vectors a backend produces, for cache keys: the model, plus the ONNX file if any."""
+        settings = cls.EMBEDDING_BACKENDS[backend or cls.EMBEDDING_BACKEND]
+        return settings["model"] if settings["runtime"] == "torch" else f"{settings['model']}/{settings['file']}"
+
+    @classmethod
+    def create_embeddings(cls, backend: str = None):
+        """Create and return the embedding model used for retrieval from the configured backend."""
+        backend = backend or cls.EMBEDDING_BACKEND
+        if backend not in cls.EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {list(cls.EMBEDDING_BACKENDS)}")
+        settings = cls.EMBEDDING_BACKENDS[backend]
+
+        if settings["runtime"] == "onnx":
+            from onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(settings["model"], settings["file"], batch_size=cls.EMBEDDING_BATCH_SIZE,
+                                  threads=cls.EMBEDDING_THREADS)
+
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if cls.EMBEDDING_THREADS:
+            import torch
+            torch.set_num_threads(cls.EMBEDDING_THREADS)
+        return HuggingFaceEmbeddings(
+            model_name=settings["model"],
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'batch_size': cls.EMBEDDING_BATCH_SIZE}
+        )
@@ -0,0 +1,113 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from config import Config
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # optional: without tiktoken token counts are estimated from length
+    _ENCODING = None
+
+ROW_FIELDS = ("name", "price", "current_players", "peak_players_today")
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, else estimate at about four characters per token."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+class ContextBuilder:
+    """Assembles the prompt context from retrieved documents within a token budget.
+
+    Snapshot rows are deduplicated and merged per game into one compact
+    table line (latest values, plus the range over days when the same game
+    was retrieved for several dates). Other documents, such as aggregates
+    and forecasts, are kept as text. Lines are added in retrieval order
+    until the prompt would exceed the budget.
+    """
+
+    HEADER = "Game | Price | Current players | Peak players today | Date"
+
+    def __init__(self, template: str, token_budget: int = Config.PROMPT_TOKEN_BUDGET):
+        self.template = template
+        self.token_budget = token_budget
+        self.template_tokens = count_tokens(template.replace("{context}", "").replace("{question}", ""))
+
+    @staticmethod
+    def _is_row(document: Document) -> bool:
+        return all(document.metadata.get(field) is not None for field in ROW_FIELDS)
+
+    @staticmethod
+    def _format_number(value: Any, decimals: int = 0) -> str:
+        try:
+            return f"{float(value):,.{decimals}f}"
+        except (TypeError, ValueError):
+            return str(value)
+
+    def _merge_rows(self, rows: List[Dict[str, Any]]) -> str:
+        """One table line for a game: its latest snapshot, with the player range across days."""
+        rows = sorted(rows, key=lambda meta: str(meta.get("date", "")))
+        latest = rows[-1]
+        current = self._format_number(latest["current_players"])
+        date = str(latest.get("date", ""))[:10]
+        if len(rows) > 1:
+            players = [float(meta["current_players"]) for meta in rows]
+            current += f" ({min(players):,.0f}-{max(players):,.0f} over {len(rows)} days)"
+            date = f"{str(rows[0].get('date', ''))[:10]} to {date}"
+        return " | ".join([str(latest["name"]), self._format_number(latest["price"], 2), current,
+                           self._format_number(latest["peak_players_today"]), date])
+
+    def compact(self, documents: List[Document]) -> List[Tuple[str, str]]:
+        """Deduplicate documents and merge each game's rows, keeping retrieval order.
+
+        Returns (kind, line) pairs, where kind is "row" for table lines and
+        "text" for documents kept verbatim.
+        """
+        groups: Dict[Tuple[str, str], Optional[Dict[str, Dict[str, Any]]]] = {}
+        for document in documents:
+            if self._is_row(document):
+                rows = groups.setdefault(("row", str(document.metadata["name"])), {})
+                rows[str(document.metadata.get("date"))] = document.metadata
+            else:
+                groups.setdefault(("text", document.page_content), None)
+        return [(kind, self._merge_rows(list(rows.values())) if kind == "row" else key)
+                for (kind, key), rows in groups.items()]
+
+    def build(self, question: str, documents: List[Document]) -> Dict[str, Any]:
+        """Fill the template with compacted context that fits the token budget.
+
+        Returns the prompt with its token count and how many context lines
+        were kept or dropped for the budget.
+        """
+        lines = self.compact(documents)
+        available = self.token_budget - self.template_tokens - count_tokens(question)
+        used = count_tokens(self.HEADER) if any(kind == "row" for kind, _ in lines) else 0
+
+        table, text = [], []
+        dropped = 0
+        for kind, line in lines:
+            cost = count_tokens(line) + 1
+            if used + cost > available:
+                dropped += 1
+                continue
+            (table if kind == "row" else text).append(line)
+            used += cost
+
+        # Table rows go under one header; free-text documents follow as paragraphs
+        parts = (["\n".join([self.HEADER] + table)] if table else []) + text
+        prompt = self.template.format(context="\n\n".join(parts), question=question)
+        return {
+            "prompt": prompt,
+            "prompt_tokens": count_tokens(prompt),
+            "documents": len(documents),
+            "context_lines": len(table) + len(text),
+            "dropped_lines": dropped,
+        }
+
+    @staticmethod
+    def max_tokens(intent: Optional[str]) -> int:
+        """Completion budget for a question type, defaulting to the configured maximum."""
+        return Config.MAX_TOKENS_BY_INTENT.get(intent, Config.COMPLETION_PARAMS["max_tokens"])
@@ -0,0 +1,121 @@
+import argparse
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+import numpy as np
+import pandas as pd
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PLAYER_COLUMNS = ("current_players", "peak_players_today")
+
+# Cells without a price: free games, unreleased games and anything the page shows as plain text
+NO_PRICE_PATTERN = r"(?i)free|coming soon"
+# Thousands separators Steam renders in player counts. The no-break spaces are spelled out because
+# Arrow-backed string columns match \s against ASCII whitespace only
+PLAYER_SEPARATORS = "[,.'\\s\u00a0\u202f]"
+
+
+def _parse_prices(text: pd.Series) -> pd.Series:
+    """Parse distinct raw price strings; see clean_price."""
+    text = text.str.strip()
+    last_line = text.str.replace(r"^[\s\S]*\n", "", regex=True)
+    number = last_line.str.replace(r"[^\d.,]", "", regex=True).str.strip(".,")
+    # A separator followed by one or two final digits is the decimal point; every other separator groups thousands
+    decimals = number.str.extract(r"[.,](\d{1,2})$", expand=False)
+    integer = number.str.replace(r"[.,]\d{1,2}$", "", regex=True).str.replace(r"[.,]", "", regex=True)
+    value = pd.to_numeric(integer + "." + decimals.fillna("0"), errors="coerce")
+    no_price = text.str.contains(NO_PRICE_PATTERN, regex=True).fillna(True)
+    return value.mask(no_price, 0.0).astype("float64").fillna(0.0)
+
+
+def clean_price(prices: pd.Series) -> pd.Series:
+    """Parse raw price cells into floats; free, unreleased and missing prices are 0.0.
+
+    Handles currency symbols on either side, comma or dot decimals with
+    either thousands separator ("1.234,56€", "$1,234.56") and discounted
+    cells, whose last line is the price actually charged ("-20%\\n59,99€\\n47,99€").
+    Already numeric columns are passed through.
+    """
+    if pd.api.types.is_numeric_dtype(prices):
+        return pd.to_numeric(prices, errors="coerce").astype("float64").fillna(0.0)
+
+    # A chart has few distinct price strings, so parse each one once rather than once per row
+    codes, uniques = pd.factorize(prices)
+    parsed = _parse_prices(pd.Series(uniques, dtype="string")).to_numpy()
+    # Missing cells have code -1, which picks the 0.0 appended at the end
+    return pd.Series(np.append(parsed, 0.0)[codes], index=prices.index, dtype="float64")
+
+
+def clean_players(counts: pd.Series) -> pd.Series:
+    """Parse raw player counts such as "1,549,382" into numbers; unparseable counts become NaN."""
+    if pd.api.types.is_numeric_dtype(counts):
+        return pd.to_numeric(counts, errors="coerce")
+    digits = counts.astype("string").str.replace(PLAYER_SEPARATORS, "", regex=True)
+    # Casting validated digit strings is several times faster than pd.to_numeric(errors="coerce")
+    valid = digits.str.fullmatch(r"\d{1,18}").fillna(False)
+    return digits.where(valid).astype("Int64")
+
+
+def clean_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Normalise the price, player count, appid and date columns present in a raw or cleaned snapshot frame."""
+    frame = frame.copy()
+    if "price" in frame:
+        frame["price"] = clean_price(frame["price"])
+    for column in PLAYER_COLUMNS:
+        if column in frame:
+            frame[column] = clean_players(frame[column])
+    if "appid" in frame:
+        frame["appid"] = pd.to_numeric(frame["appid"], errors="coerce").astype("Int64")
+    if "date" in frame:
+        frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+    return frame
+
+
+def iter_clean_chunks(path: str, chunksize: int = Config.CLEAN_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read a raw snapshot CSV in chunks of rows and yield each chunk cleaned."""
+    # Read everything as text so a chunk's dtypes never depend on which rows happen to be in it,
+    # and only treat empty cells as missing so games named e.g. "NA" or "None" survive
+    with pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""]) as reader:
+        for chunk in reader:
+            yield clean_frame(chunk.drop(columns=[c for c in chunk.columns if c.startswith("Unnamed:")]))
+
+
+def clean_csv(
+        source: str,
+        destination: str,
+        chunksize: int = Config.CLEAN_CHUNK_SIZE,
+        keep: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+) -> Dict[str, Any]:
+    """Clean a raw snapshot CSV of any size into destination, one chunk in memory at a time.
+
+    keep optionally selects the rows to write, e.g. lambda chunk: chunk["price"] > 0.
+    """
+    start = time.perf_counter()
+    rows_in = rows_out = 0
+    for i, chunk in enumerate(iter_clean_chunks(source, chunksize)):
+        rows_in += len(chunk)
+        if keep is not None:
+            chunk = chunk[keep(chunk)]
+        rows_out += len(chunk)
+        chunk.to_csv(destination, mode="w" if i == 0 else "a", header=i == 0, index=False, date_format="%Y-%m-%d")
+    seconds = time.perf_counter() - start
+    logger.info("Cleaned %d rows into %s (%d kept) in %.2fs", rows_in, destination, rows_out, seconds)
+    return {"rows_in": rows_in, "rows_out": rows_out, "seconds": seconds,
+            "rows_per_sec": rows_in / seconds if seconds else 0.0}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Clean a raw snapshot CSV in bounded memory.")
+    parser.add_argument('source', help='Raw snapshot CSV, e.g. from data_extractor.py')
+    parser.add_argument('destination', help='CSV to write the cleaned rows to')
+    parser.add_argument('--chunksize', type=int, default=Config.CLEAN_CHUNK_SIZE, help='Rows per chunk')
+    parser.add_argument('--paid-only', action='store_true', help='Keep only games with a price')
+    args = parser.parse_args()
+
+    keep = (lambda chunk: chunk["price"] > 0) if args.paid_only else None
+    stats = clean_csv(args.source, args.destination, args.chunksize, keep)
+    print(f"Cleaned {stats['rows_in']} rows ({stats['rows_out']} kept) in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/sec)")
@@ -1,46 +1,107 @@
-from typing import List
+import hashlib
+import logging
+from typing import Iterator, List, Optional
 import pandas as pd
 from langchain_core.documents import Document
+from data_cleaning import clean_frame
+from history_store import HistoryStore
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class DataLoader:
     """Class for loading and processing CSV data into LangChain Documents."""
 
+    METADATA_COLUMNS = ['name', 'date', 'price', 'current_players', 'peak_players_today']
+
     @staticmethod
+    @metrics.timed("load_data")
     def load_data(filepath: str) -> pd.DataFrame:
         """Load and preprocess game data from a CSV file."""
         try:
-            data = pd.read_csv(filepath)
-            data['current_players'] = pd.to_numeric(data['current_players'], errors='coerce')
-            data['peak_players_today'] = pd.to_numeric(data['peak_players_today'], errors='coerce')
-            data['date'] = pd.to_datetime(data['date'])
-            return data
+            return clean_frame(pd.read_csv(filepath))
         except Exception as e:
             raise ValueError(f"Error loading data: {str(e)}")
 
     @staticmethod
-    def create_documents(data: pd.DataFrame) -> List[Document]:
+    def load_history(root: str, start=None, end=None, names=None, columns=None) -> pd.DataFrame:
+        """Load snapshots from the Parquet history store, filtered by date range and game."""
+        return HistoryStore(root).read(start, end, names, columns)
+
+    @staticmethod
+    def document_id(document: Document) -> str:
+        """Return a stable content hash identifying a document across snapshots."""
+        return hashlib.sha1(document.page_content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _format_dates(dates: pd.Series, fmt: str) -> pd.Series:
+        """Format datetimes, running strftime once per distinct date rather than once per row."""
+        codes, uniques = pd.factorize(dates)
+        formatted = pd.Index(uniques).strftime(fmt).to_numpy(dtype=object)
+        return pd.Series(formatted[codes], index=dates.index)
+
+    @staticmethod
+    def _build_chunk(chunk: pd.DataFrame, skipped: List[int]) -> List[Document]:
+        """Format one chunk of rows into Documents using column-wise string operations."""
+        dates = pd.to_datetime(chunk['date'], errors='coerce')
+        valid = dates.notna() & chunk['name'].notna()
+        if not valid.all():
+            skipped.extend(chunk.index[~valid].tolist())
+            chunk, dates = chunk[valid], dates[valid]
+
+        content = (
+            "Game: " + chunk['name'].astype(str)
+            + ", Price: " + chunk['price'].astype(str)
+            + ", Current Players: " + chunk['current_players'].astype(str)
+            + ", Peak Players Today: " + chunk['peak_players_today'].astype(str)
+            + ", Date: " + DataLoader._format_dates(dates, '%Y-%m-%d')
+        )
+
+        # Column lists zipped into dicts are much cheaper than DataFrame.to_dict('records')
+        columns = chunk.assign(date=DataLoader._format_dates(dates, '%Y-%m-%dT%H:%M:%S'))
+        values = [columns[col].tolist() for col in DataLoader.METADATA_COLUMNS]
+        metadata = [dict(zip(DataLoader.METADATA_COLUMNS, row)) for row in zip(*values)]
+
+        return [
+            Document(page_content=text, metadata=meta)
+            for text, meta in zip(content.tolist(), metadata)
+        ]
+
+    @staticmethod
+    def iter_documents(
+            data: pd.DataFrame,
+            chunk_size: int = 10000,
+            errors: Optional[List[str]] = None,
+    ) -> Iterator[List[Document]]:
+        """Yield Documents in chunks so they can be streamed into the embedder.
+
+        Rows without a name or a parseable date are skipped. They are reported
+        once as a summary, appended to errors if given and logged otherwise.
+        """
+        missing = set(DataLoader.METADATA_COLUMNS) - set(data.columns)
+        if missing:
+            raise ValueError(f"Error creating documents: missing columns {sorted(missing)}")
+
+        skipped = []
+        for start in range(0, len(data), chunk_size):
+            documents = DataLoader._build_chunk(data.iloc[start:start + chunk_size], skipped)
+            if documents:
+                yield documents
+
+        if skipped:
+            summary = (f"Skipped {len(skipped)} of {len(data)} rows with a missing name or date "
+                       f"(first rows: {skipped[:10]})")
+            if errors is not None:
+                errors.append(summary)
+            else:
+                logger.warning(summary)
+
+    @staticmethod
+    @metrics.timed("create_documents")
+    def create_documents(data: pd.DataFrame, errors: Optional[List[str]] = None) -> List[Document]:
         """Convert data rows into LangChain Document format."""
-        documents = []
-        for _, row in data.iterrows():
-            try:
-                content = (
-                    f"Game: {row['name']}, Price: {row['price']}, "
-                    f"Current Players: {row['current_players']}, "
-                    f"Peak Players Today: {row['peak_players_today']}, "
-                    f"Date: {row['date'].strftime('%Y-%m-%d')}"
-                )
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        "name": row['name'],
-                        "date": row['date'].isoformat(),
-                        "price": row['price'],
-                        "current_players": row['current_players'],
-                        "peak_players_today": row['peak_players_today']
-                    }
-                )
-                documents.append(doc)
-            except Exception as e:
-                print(f"Warning: Skipping row due to error: {str(e)}")
-        return documents
\ No newline at end of file
+        chunk_size = max(len(data), 1)
+        documents = [doc for chunk in DataLoader.iter_documents(data, chunk_size, errors) for doc in chunk]
+        metrics.inc("documents_created_total", len(documents))
+        return documents
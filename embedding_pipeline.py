@@ -0,0 +1,199 @@
+import argparse
+import logging
+import threading
+import time
+from queue import Full, Queue
+from typing import Dict, Iterable, List, Optional, Union
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from config import Config
+from data_loader import DataLoader
+from metrics import metrics
+import vector_index
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class MultiProcessEmbeddings(Embeddings):
+    """Sentence-transformers encoder that spreads batches over a persistent process pool.
+
+    Intended for large backfills; each worker process holds its own copy of
+    the model, so memory grows with the number of processes.
+    """
+
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL, processes: int = 2,
+                 batch_size: int = Config.EMBEDDING_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.batch_size = batch_size
+        self.pool = self.model.start_multi_process_pool(['cpu'] * processes)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts across the worker processes."""
+        return self.model.encode_multi_process(texts, self.pool, batch_size=self.batch_size).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Encode a single query in this process."""
+        return self.model.encode(text).tolist()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self.model.stop_multi_process_pool(self.pool)
+
+
+class EmbeddingPipeline:
+    """Batched embedding stage that overlaps document creation with encoding.
+
+    Documents (or chunks of documents, as yielded by DataLoader.iter_documents)
+    are consumed on a producer thread and grouped into batches, while the
+    calling thread embeds each batch and adds it to a FAISS vector store.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = Config.EMBEDDING_BATCH_SIZE,
+                 prefetch: int = 4):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.stats: Dict[str, float] = {}
+
+    @staticmethod
+    def _put(queue: Queue, item, stop: threading.Event) -> bool:
+        """Put item on the bounded queue unless the consumer stops first; returns whether it was put."""
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _produce(self, documents: Iterable[Union[Document, List[Document]]], queue: Queue,
+                 stop: threading.Event) -> None:
+        items = iter(documents)
+        try:
+            batch = []
+            for item in items:
+                for document in (item if isinstance(item, list) else [item]):
+                    batch.append(document)
+                    if len(batch) == self.batch_size:
+                        if not self._put(queue, batch, stop):
+                            return
+                        batch = []
+            if batch and not self._put(queue, batch, stop):
+                return
+        except Exception as e:
+            self._put(queue, e, stop)
+            return
+        finally:
+            # Release the document source (e.g. an open CSV reader), also when the consumer stopped early
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+        self._put(queue, _DONE, stop)
+
+    @metrics.timed("embed_documents")
+    def run(self, documents: Iterable[Union[Document, List[Document]]],
+            vectorstore: Optional[FAISS] = None) -> FAISS:
+        """Embed documents in batches and add them to vectorstore, creating it if needed.
+
+        Documents already present in the store (by content hash) are skipped.
+        """
+        queue = Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(documents, queue, stop), daemon=True)
+        producer.start()
+
+        seen = set(vectorstore.index_to_docstore_id.values()) if vectorstore is not None else set()
+        embedded = 0
+        encode_seconds = 0.0
+        start = time.perf_counter()
+
+        try:
+            while True:
+                batch = queue.get()
+                if batch is _DONE:
+                    break
+                if isinstance(batch, Exception):
+                    raise ValueError(f"Error creating documents: {str(batch)}")
+
+                ids, texts, metadatas = [], [], []
+                for document in batch:
+                    doc_id = DataLoader.document_id(document)
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    ids.append(doc_id)
+                    texts.append(document.page_content)
+                    metadatas.append(document.metadata)
+                if not texts:
+                    continue
+
+                encode_start = time.perf_counter()
+                vectors = self.embeddings.embed_documents(texts)
+                encode_seconds += time.perf_counter() - encode_start
+
+                text_embeddings = list(zip(texts, vectors))
+                if vectorstore is None:
+                    vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+                else:
+                    vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+                embedded += len(texts)
+        finally:
+            # Unblocks a producer waiting on the full queue when embedding fails, and waits for it to close the source
+            stop.set()
+            producer.join()
+
+        if vectorstore is None:
+            raise ValueError("Error creating vector store: no documents to index")
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "documents": embedded,
+            "seconds": elapsed,
+            "encode_seconds": encode_seconds,
+            "docs_per_sec": embedded / elapsed if elapsed else 0.0,
+        }
+        logger.info("Embedded %d documents in %.2fs (%.1f docs/sec)",
+                    embedded, elapsed, self.stats["docs_per_sec"])
+        return vectorstore
+
+
+def backfill(paths: List[str], output: str, processes: int = 1,
+             batch_size: int = Config.EMBEDDING_BATCH_SIZE) -> Dict[str, float]:
+    """Embed every snapshot CSV into one FAISS index saved at output."""
+    if processes > 1:
+        embeddings = MultiProcessEmbeddings(processes=processes, batch_size=batch_size)
+        # Larger batches keep every worker process busy
+        batch_size *= processes * 4
+    else:
+        embeddings = Config.create_embeddings()
+
+    def documents():
+        for path in paths:
+            yield from DataLoader.iter_documents(DataLoader.load_data(path))
+
+    pipeline = EmbeddingPipeline(embeddings, batch_size=batch_size)
+    try:
+        vectorstore = pipeline.run(documents())
+    finally:
+        if isinstance(embeddings, MultiProcessEmbeddings):
+            embeddings.close()
+    vector_index.fit_index(vectorstore)
+    vectorstore.save_local(output)
+    return pipeline.stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill a FAISS index from snapshot CSVs.")
+    parser.add_argument('paths', nargs='+', help='Snapshot CSV files')
+    parser.add_argument('--output', required=True, help='Folder to save the FAISS index to')
+    parser.add_argument('--processes', type=int, default=1, help='Encoder processes (one per core)')
+    parser.add_argument('--batch-size', type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+
+    stats = backfill(args.paths, args.output, args.processes, args.batch_size)
+    print(f"Embedded {stats['documents']} documents in {stats['seconds']:.2f}s "
+          f"({stats['docs_per_sec']:.1f} docs/sec)")
@@ -0,0 +1,201 @@
+import argparse
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from config import Config
+from data_loader import DataLoader
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Forecaster:
+    """Batched forecasts of price and player counts for every game in the history.
+
+    The history is pivoted into one games x days matrix per column and each
+    model is fitted to all games at once with array operations: simple
+    exponential smoothing (alpha picked per game from a small grid), a
+    least-squares linear trend and a seasonal-naive repeat of the last
+    season. The model with the lowest error on the last `holdout` days is
+    chosen per game and refitted on the full history.
+    """
+
+    MODELS = ("exponential_smoothing", "linear_trend", "seasonal_naive")
+
+    def __init__(
+            self,
+            horizon: int = Config.FORECAST_HORIZON,
+            season: int = Config.FORECAST_SEASON,
+            holdout: int = Config.FORECAST_HOLDOUT,
+            alphas: Sequence[float] = (0.1, 0.3, 0.5, 0.8),
+    ):
+        self.horizon = horizon
+        self.season = season
+        self.holdout = holdout
+        self.alphas = np.asarray(alphas, dtype=float)
+
+    @staticmethod
+    def panel(history: pd.DataFrame, column: str) -> Tuple[pd.Index, pd.Timestamp, np.ndarray]:
+        """Pivot long history into (games, last date, games x days matrix) without a per-game loop.
+
+        Days a game is missing from the chart are carried forward from its
+        last snapshot; days before its first snapshot take its first value.
+        """
+        dates = pd.to_datetime(history["date"]).dt.normalize()
+        codes, names = pd.factorize(history["name"])
+        first = dates.min()
+        days = (dates - first).dt.days.to_numpy()
+        values = np.full((len(names), days.max() + 1), np.nan)
+        values[codes, days] = pd.to_numeric(history[column], errors="coerce").to_numpy(dtype=float)
+
+        # Forward fill along time, then back fill the leading gap of games that joined later
+        steps = np.arange(values.shape[1])
+        filled = np.maximum.accumulate(np.where(np.isnan(values), 0, steps), axis=1)
+        values = values[np.arange(len(names))[:, None], filled]
+        reverse = values[:, ::-1]
+        filled = np.maximum.accumulate(np.where(np.isnan(reverse), 0, steps), axis=1)
+        values = reverse[np.arange(len(names))[:, None], filled][:, ::-1]
+        return pd.Index(names), first + pd.Timedelta(days=values.shape[1] - 1), values
+
+    def exponential_smoothing(self, values: np.ndarray, horizon: int) -> np.ndarray:
+        """Flat forecast from the smoothed level, with alpha chosen per game by one-step-ahead error."""
+        level = np.repeat(values[None, :, 0], len(self.alphas), axis=0)
+        alphas = self.alphas[:, None]
+        sse = np.zeros_like(level)
+        # The recursion runs over days; every step updates all games and alphas at once
+        for t in range(1, values.shape[1]):
+            error = values[:, t] - level
+            sse += error * error
+            level += alphas * error
+        best = sse.argmin(axis=0)
+        return np.repeat(level[best, np.arange(values.shape[0])][:, None], horizon, axis=1)
+
+    @staticmethod
+    def linear_trend(values: np.ndarray, horizon: int) -> np.ndarray:
+        """Least-squares line per game, extrapolated horizon days ahead."""
+        steps = np.arange(values.shape[1], dtype=float)
+        centred = steps - steps.mean()
+        slope = (values - values.mean(axis=1, keepdims=True)) @ centred / max(centred @ centred, 1e-12)
+        intercept = values.mean(axis=1) - slope * steps.mean()
+        future = np.arange(values.shape[1], values.shape[1] + horizon, dtype=float)
+        return intercept[:, None] + slope[:, None] * future[None, :]
+
+    def seasonal_naive(self, values: np.ndarray, horizon: int) -> np.ndarray:
+        """Repeat the last full season; the last value when the history is shorter than a season."""
+        season = min(self.season, values.shape[1])
+        return values[:, values.shape[1] - season + np.arange(horizon) % season]
+
+    def _forecasts(self, values: np.ndarray, horizon: int) -> np.ndarray:
+        """Forecasts of every model, shaped models x games x horizon."""
+        return np.stack([
+            self.exponential_smoothing(values, horizon),
+            self.linear_trend(values, horizon),
+            self.seasonal_naive(values, horizon),
+        ])
+
+    def fit(self, history: pd.DataFrame, column: str = "price") -> pd.DataFrame:
+        """Forecast column for every game in a long history frame.
+
+        Returns one row per game with the chosen model, its mean absolute
+        error on the holdout days, the last observed value, the forecast for
+        each of the next `horizon` days (day_1 ... day_N) and the relative
+        change from the last value to the end of the horizon.
+        """
+        names, last_date, values = self.panel(history, column)
+        valid = ~np.isnan(values).any(axis=1)
+        names, values = names[valid], values[valid]
+
+        if values.shape[1] > self.holdout + 1:
+            train, test = values[:, :-self.holdout], values[:, -self.holdout:]
+            errors = np.abs(self._forecasts(train, self.holdout) - test[None]).mean(axis=2)
+            best = errors.argmin(axis=0)
+            mae = errors[best, np.arange(len(names))]
+        else:
+            # Too short to hold any days out; smoothing is the safest default
+            best = np.zeros(len(names), dtype=int)
+            mae = np.full(len(names), np.nan)
+
+        # Prices and player counts cannot go negative, however steep the trend
+        forecast = np.maximum(self._forecasts(values, self.horizon)[best, np.arange(len(names))], 0.0)
+
+        last = values[:, -1]
+        frame = pd.DataFrame({
+            "name": names,
+            "model": np.asarray(self.MODELS)[best],
+            "mae": mae,
+            "last": last,
+        })
+        days = pd.DataFrame(forecast, columns=[f"day_{h}" for h in range(1, self.horizon + 1)])
+        frame = pd.concat([frame, days], axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frame["change"] = np.where(last != 0, (forecast[:, -1] - last) / np.abs(last), 0.0)
+        frame.attrs["last_date"] = last_date
+        return frame
+
+    def fit_all(self, history: pd.DataFrame, columns: Sequence[str] = ("price", "current_players")) -> Dict[str, pd.DataFrame]:
+        """Forecast several columns of the same history."""
+        return {column: self.fit(history, column) for column in columns}
+
+    @staticmethod
+    def _describe(name: str, rows: Dict[str, pd.Series], horizon: int) -> str:
+        parts = []
+        for column, row in rows.items():
+            end = row[f"day_{horizon}"]
+            if column == "price":
+                values = f"${row['last']:,.2f} now, ${end:,.2f} in {horizon} days"
+            else:
+                values = f"{row['last']:,.0f} now, {end:,.0f} in {horizon} days"
+            parts.append(f"{column.replace('_', ' ')} {values} ({row['change']:+.1%}, {row['model'].replace('_', ' ')})")
+        return f"Forecast for {name}: " + "; ".join(parts)
+
+    @classmethod
+    def to_documents(cls, forecasts: Dict[str, pd.DataFrame], names: Optional[Sequence[str]] = None) -> List[Document]:
+        """Forecast context documents, one per game (all forecast games unless names are given)."""
+        if not forecasts:
+            return []
+        indexed = {column: frame.set_index("name") for column, frame in forecasts.items()}
+        horizon = sum(c.startswith("day_") for c in next(iter(forecasts.values())).columns)
+        if names is None:
+            names = next(iter(indexed.values())).index
+        documents = []
+        for name in names:
+            rows = {column: frame.loc[name] for column, frame in indexed.items() if name in frame.index}
+            if rows:
+                documents.append(Document(page_content=cls._describe(name, rows, horizon),
+                                          metadata={"name": name, "route": "forecast"}))
+        return documents
+
+
+@metrics.timed("forecast")
+def forecast_history(
+        root: str = Config.HISTORY_DIR,
+        columns: Sequence[str] = ("price", "current_players"),
+        min_days: int = Config.FORECAST_MIN_DAYS,
+        forecaster: Optional[Forecaster] = None,
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """Forecast columns from the history store, or None if there is too little history."""
+    try:
+        history = DataLoader.load_history(root, columns=["name", "date", *columns])
+    except ValueError as e:
+        logger.info("No forecasts: %s", e)
+        return None
+    if history.empty or history["date"].nunique() < min_days:
+        logger.info("No forecasts: fewer than %d days of history", min_days)
+        return None
+    return (forecaster or Forecaster()).fit_all(history, columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Forecast prices and player counts from the snapshot history.")
+    parser.add_argument('--root', default=Config.HISTORY_DIR)
+    parser.add_argument('--column', default='current_players', choices=['price', 'current_players', 'peak_players_today'])
+    parser.add_argument('--top', type=int, default=10, help='Games with the largest forecast change to print')
+    args = parser.parse_args()
+
+    forecasts = forecast_history(args.root, columns=[args.column], min_days=1)
+    if forecasts is None:
+        raise SystemExit(f"No history under {args.root}")
+    frame = forecasts[args.column]
+    print(frame.loc[frame["change"].abs().sort_values(ascending=False).index].head(args.top).to_string(index=False))
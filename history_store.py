@@ -0,0 +1,158 @@
+import argparse
+import logging
+import os
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from config import Config
+from data_cleaning import iter_clean_chunks
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, pd.Timestamp]
+
+
+class HistoryStore:
+    """Append-only history of daily snapshots stored as Parquet, partitioned by date.
+
+    Each snapshot lands under `<root>/date=YYYY-MM-DD/` with a typed schema,
+    so reads can prune whole days by date range, push game filters down to
+    Parquet row groups and memory-map the files instead of parsing CSV.
+    """
+
+    SCHEMA = pa.schema([
+        ("name", pa.string()),
+        ("appid", pa.int64()),
+        ("price", pa.float64()),
+        ("current_players", pa.int64()),
+        ("peak_players_today", pa.int64()),
+    ])
+    PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+    def __init__(self, root: str = Config.HISTORY_DIR):
+        self.root = Path(root)
+
+    def _to_table(self, frame: pd.DataFrame) -> pa.Table:
+        """Coerce a snapshot frame to the store schema."""
+        columns = {
+            "name": frame["name"].astype("string"),
+            "appid": pd.to_numeric(frame["appid"], errors="coerce").astype("Int64")
+            if "appid" in frame else pd.Series(pd.NA, index=frame.index, dtype="Int64"),
+            "price": pd.to_numeric(frame["price"], errors="coerce").astype("float64"),
+            "current_players": pd.to_numeric(frame["current_players"], errors="coerce").round().astype("Int64"),
+            "peak_players_today": pd.to_numeric(frame["peak_players_today"], errors="coerce").round().astype("Int64"),
+        }
+        return pa.Table.from_pandas(pd.DataFrame(columns), schema=self.SCHEMA, preserve_index=False)
+
+    def dates(self) -> List[date]:
+        """Return the dates that have at least one snapshot, oldest first."""
+        if not self.root.is_dir():
+            return []
+        return sorted(date.fromisoformat(p.name.split("=", 1)[1])
+                      for p in self.root.glob("date=*") if p.is_dir())
+
+    def append(self, frame: pd.DataFrame, if_exists: str = "append") -> List[date]:
+        """Append a snapshot frame, writing one Parquet file per date. Returns the dates written.
+
+        if_exists controls dates that already have data: "append" adds another
+        file, "skip" leaves the date untouched and "replace" swaps in the new rows.
+        """
+        if if_exists not in ("append", "skip", "replace"):
+            raise ValueError(f"Invalid if_exists: {if_exists!r}")
+        dates = pd.to_datetime(frame["date"], errors="coerce").dt.date
+        existing = set(self.dates())
+        written = []
+
+        for day, rows in frame[dates.notna()].groupby(dates[dates.notna()]):
+            if day in existing and if_exists == "skip":
+                logger.info("Skipping %s: already in the history store", day)
+                continue
+            partition = self.root / f"date={day.isoformat()}"
+            partition.mkdir(parents=True, exist_ok=True)
+            previous = list(partition.glob("part-*.parquet")) if if_exists == "replace" else []
+
+            # Write under a hidden name and rename, so readers never see a partial file
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            tmp_path = partition / f".{name}"
+            pq.write_table(self._to_table(rows), tmp_path)
+            os.replace(tmp_path, partition / name)
+            for path in previous:
+                path.unlink(missing_ok=True)
+            written.append(day)
+        return written
+
+    def dataset(self) -> ds.Dataset:
+        """Open the store as a memory-mapped Arrow dataset."""
+        return ds.dataset(
+            str(self.root),
+            schema=self.SCHEMA.append(pa.field("date", pa.date32())),
+            format="parquet",
+            partitioning=self.PARTITIONING,
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+            exclude_invalid_files=False,
+            ignore_prefixes=[".", "_"],
+        )
+
+    def read(
+            self,
+            start: Optional[DateLike] = None,
+            end: Optional[DateLike] = None,
+            names: Optional[Iterable[str]] = None,
+            columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Read snapshots between start and end (inclusive), optionally for some games only."""
+        if not self.root.is_dir():
+            raise ValueError(f"Error loading data: no history store at {self.root}")
+
+        predicate = None
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field("date") >= pd.Timestamp(start).date())
+        if end is not None:
+            conditions.append(ds.field("date") <= pd.Timestamp(end).date())
+        if names is not None:
+            conditions.append(ds.field("name").isin(list(names)))
+        for condition in conditions:
+            predicate = condition if predicate is None else predicate & condition
+
+        table = self.dataset().to_table(columns=columns, filter=predicate)
+        data = table.to_pandas(date_as_object=False)
+        if "date" in data:
+            data["date"] = data["date"].astype("datetime64[ns]")
+            data = data.sort_values("date", kind="stable", ignore_index=True)
+        return data
+
+    def import_csv(self, paths: Iterable[str], chunksize: int = Config.CLEAN_CHUNK_SIZE) -> List[date]:
+        """One-shot import of existing snapshot CSVs, skipping dates already stored.
+
+        Files are read and cleaned chunk by chunk with the shared cleaning
+        stage, so raw exports of any size import in bounded memory.
+        """
+        existing = set(self.dates())
+        written = []
+        for path in paths:
+            days = set()
+            for chunk in iter_clean_chunks(path, chunksize):
+                # A date can span several chunks: skip only dates stored before this file
+                days.update(self.append(chunk[~chunk["date"].dt.date.isin(existing)], if_exists="append"))
+            logger.info("Imported %s: %d day(s)", path, len(days))
+            existing |= days
+            written.extend(sorted(days))
+        return written
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import snapshot CSVs into the Parquet history store.")
+    parser.add_argument('paths', nargs='+', help='Snapshot CSV files, e.g. games_back-up.csv')
+    parser.add_argument('--root', default=Config.HISTORY_DIR)
+    args = parser.parse_args()
+
+    imported = HistoryStore(args.root).import_csv(args.paths)
+    print(f"Imported {len(imported)} day(s) into {args.root}")
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+import faiss
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from data_loader import DataLoader
+from embedding_pipeline import EmbeddingPipeline
+from lexical_index import LexicalIndex
+from metrics import metrics
+import vector_index
+
+
+class IndexCache:
+    """Content-addressed on-disk cache for FAISS vector stores."""
+
+    INDEX_FILE = "index.faiss"
+    DOCSTORE_FILE = "index.pkl"
+    LEXICAL_FILE = "lexical.pkl"
+    EMBEDDING_STORE = ".embeddings"
+    TRAINED_DIR = ".trained"
+
+    def __init__(self, cache_dir: str, max_entries: int = 4):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        """Return the SHA-256 hex digest of a file's contents."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def model_prefix(model_name: str) -> str:
+        """Return the key prefix shared by all entries built with one embedding model."""
+        return hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def make_key(cls, source_path: str, model_name: str) -> str:
+        """Build a cache key from the embedding model name and the source data."""
+        return f"{cls.model_prefix(model_name)}-{cls.file_digest(source_path)[:20]}"
+
+    def cached_embeddings(self, embeddings: Embeddings, model_name: str) -> Embeddings:
+        """Wrap embeddings with a per-row on-disk cache shared by all snapshots."""
+        store = LocalFileStore(str(self.cache_dir / self.EMBEDDING_STORE))
+        return CacheBackedEmbeddings.from_bytes_store(
+            embeddings, store, namespace=self.model_prefix(model_name)
+        )
+
+    def load(self, key: str, embeddings: Embeddings, mmap: bool = True) -> Optional[FAISS]:
+        """Load a cached vector store, memory-mapping the index by default. Returns None on a miss."""
+        folder = self.cache_dir / key
+        index_path = folder / self.INDEX_FILE
+        docstore_path = folder / self.DOCSTORE_FILE
+        if not index_path.is_file() or not docstore_path.is_file():
+            return None
+
+        try:
+            io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            index = faiss.read_index(str(index_path), io_flags)
+            with open(docstore_path, 'rb') as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        except Exception:
+            # A corrupt or incompatible entry is treated as a miss and rebuilt
+            shutil.rmtree(folder, ignore_errors=True)
+            return None
+
+        # Touch the entry so pruning keeps recently used indexes
+        os.utime(folder)
+        return FAISS(embeddings, vector_index.configure(index), docstore, index_to_docstore_id)
+
+    def save(self, key: str, vectorstore: FAISS, replace: bool = False) -> None:
+        """Atomically persist a vector store under the given key.
+
+        An existing entry is kept unless replace is set, in which case it is
+        swapped out for the new one.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        folder = self.cache_dir / key
+        tmp_folder = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir)
+        old_folder = None
+        try:
+            vectorstore.save_local(tmp_folder)
+            if folder.exists():
+                if not replace:
+                    # Another process already published this key
+                    return
+                old_folder = tempfile.mkdtemp(prefix=f".{key}-old-", dir=self.cache_dir)
+                os.replace(folder, Path(old_folder) / key)
+            os.replace(tmp_folder, folder)
+        finally:
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            if old_folder is not None:
+                shutil.rmtree(old_folder, ignore_errors=True)
+        self.prune()
+
+    def _entries(self, prefix: str = '') -> List[Path]:
+        """Return published entries, most recently used first."""
+        if not self.cache_dir.is_dir():
+            return []
+        entries = [p for p in self.cache_dir.iterdir()
+                   if p.is_dir() and not p.name.startswith('.') and p.name.startswith(prefix)]
+        entries.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        return entries
+
+    def prune(self) -> None:
+        """Remove the least recently used entries beyond max_entries."""
+        for stale in self._entries()[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def load_latest(self, key: str, embeddings: Embeddings) -> Optional[FAISS]:
+        """Load an in-memory copy of the most recent entry built with the same model as key."""
+        prefix = key.split('-', 1)[0]
+        for entry in self._entries(prefix):
+            vectorstore = self.load(entry.name, embeddings, mmap=False)
+            if vectorstore is not None:
+                return vectorstore
+        return None
+
+    @staticmethod
+    def sync_documents(vectorstore: FAISS, documents: List[Document], embeddings: Embeddings) -> Dict[str, int]:
+        """Bring a vector store in line with a snapshot, embedding only new or changed rows."""
+        snapshot = {DataLoader.document_id(doc): doc for doc in documents}
+        indexed = set(vectorstore.index_to_docstore_id.values())
+
+        removed = [doc_id for doc_id in indexed if doc_id not in snapshot]
+        added = [doc_id for doc_id in snapshot if doc_id not in indexed]
+
+        if removed:
+            vector_index.remove(vectorstore, removed)
+        if added:
+            EmbeddingPipeline(embeddings).run([snapshot[doc_id] for doc_id in added], vectorstore)
+        return {"added": len(added), "removed": len(removed), "unchanged": len(snapshot) - len(added)}
+
+    @metrics.timed("index_load_or_build")
+    def get_or_build(self, key: str, documents: List[Document], embeddings: Embeddings) -> FAISS:
+        """Return the cached vector store for key.
+
+        On a miss the latest index for the same model is updated incrementally
+        with the new snapshot, or built from scratch if there is none. The
+        index is then converted to the configured type for its size (see
+        vector_index), reusing persisted training where it can.
+        """
+        vectorstore = self.load(key, embeddings)
+        if vectorstore is not None and not vector_index.needs_rebuild(vectorstore.index):
+            return vectorstore
+        replace = vectorstore is not None
+
+        vectorstore = self.load_latest(key, embeddings)
+        if vectorstore is None:
+            vectorstore = EmbeddingPipeline(embeddings).run(documents)
+        else:
+            self.sync_documents(vectorstore, documents, embeddings)
+
+        vector_index.fit_index(vectorstore, trained_dir=str(self.cache_dir / self.TRAINED_DIR))
+        self.save(key, vectorstore, replace=replace)
+        return vectorstore
+
+    @metrics.timed("lexical_load_or_build")
+    def get_or_build_lexical(self, key: str, vectorstore: FAISS) -> LexicalIndex:
+        """Return the lexical index for the vector store cached under key.
+
+        A missing index starts from the latest one built with the same model
+        and is synced with the vector store's documents, so only rows that
+        changed since that snapshot are tokenized.
+        """
+        path = self.cache_dir / key / self.LEXICAL_FILE
+        lexical = LexicalIndex.load(path)
+        if lexical is None:
+            previous = (LexicalIndex.load(entry / self.LEXICAL_FILE)
+                        for entry in self._entries(key.split('-', 1)[0]) if entry.name != key)
+            lexical = next((index for index in previous if index is not None), None) or LexicalIndex()
+        changes = lexical.sync(vectorstore)
+        if (changes["added"] or changes["removed"] or not path.is_file()) and path.parent.is_dir():
+            lexical.save(path)
+        return lexical
@@ -0,0 +1,157 @@
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.documents import Document
+from config import Config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case alphanumeric tokens, ignoring trademark signs and punctuation."""
+    return TOKEN_PATTERN.findall(re.sub(r"[™®©]", "", str(text).lower()))
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over document text, plus an exact index of game names.
+
+    Documents are keyed by the vector store's docstore ids, so the index is
+    kept in step with a FAISS store by adding and removing the ids that
+    changed (see sync) instead of being rebuilt. Game names are matched as
+    whole token sequences, so "Rust" is found in "how is Rust doing" but
+    not in "do you trust".
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.terms: Dict[str, Tuple[str, ...]] = {}
+        self.total_length = 0
+        # Game name tokens -> doc ids, and first token -> names starting with it, longest first
+        self.names: Dict[Tuple[str, ...], Set[str]] = defaultdict(set)
+        self.name_heads: Dict[str, List[Tuple[str, ...]]] = defaultdict(list)
+        self.doc_names: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_ids: Iterable[str], documents: Iterable[Document]) -> None:
+        """Index documents under their docstore ids."""
+        for doc_id, document in zip(doc_ids, documents):
+            if doc_id in self.lengths:
+                continue
+            counts = Counter(tokenize(document.page_content))
+            for term, count in counts.items():
+                self.postings[term][doc_id] = count
+            self.terms[doc_id] = tuple(counts)
+            self.lengths[doc_id] = sum(counts.values())
+            self.total_length += self.lengths[doc_id]
+
+            name = tuple(tokenize(document.metadata.get("name", "")))
+            if name and len("".join(name)) >= 3:
+                if not self.names[name]:
+                    heads = self.name_heads[name[0]]
+                    heads.append(name)
+                    heads.sort(key=len, reverse=True)
+                self.names[name].add(doc_id)
+                self.doc_names[doc_id] = name
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        """Drop documents from the index."""
+        for doc_id in doc_ids:
+            if doc_id not in self.lengths:
+                continue
+            for term in self.terms.pop(doc_id):
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.lengths.pop(doc_id)
+
+            name = self.doc_names.pop(doc_id, None)
+            if name is not None:
+                self.names[name].discard(doc_id)
+                if not self.names[name]:
+                    del self.names[name]
+                    self.name_heads[name[0]].remove(name)
+
+    def sync(self, vectorstore: FAISS) -> Dict[str, int]:
+        """Add the vector store's documents missing from the index and drop those no longer in it."""
+        indexed = set(vectorstore.index_to_docstore_id.values())
+        removed = [doc_id for doc_id in self.lengths if doc_id not in indexed]
+        added = [doc_id for doc_id in indexed if doc_id not in self.lengths]
+        self.remove(removed)
+        self.add(added, (vectorstore.docstore.search(doc_id) for doc_id in added))
+        return {"added": len(added), "removed": len(removed)}
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS) -> "LexicalIndex":
+        index = cls()
+        index.sync(vectorstore)
+        return index
+
+    def match_names(self, question: str) -> List[Tuple[str, ...]]:
+        """Game names mentioned in the question, longest match first at each position."""
+        tokens = tokenize(question)
+        found = []
+        i = 0
+        while i < len(tokens):
+            name = next((name for name in self.name_heads.get(tokens[i], ())
+                         if tuple(tokens[i:i + len(name)]) == name), None)
+            if name is None:
+                i += 1
+            else:
+                found.append(name)
+                i += len(name)
+        return list(dict.fromkeys(found))
+
+    def name_matches(self, question: str) -> List[List[str]]:
+        """Doc ids of each game named in the question, one list per game."""
+        return [sorted(self.names[name]) for name in self.match_names(question)]
+
+    def search(self, question: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Top k (doc id, BM25 score) for the question.
+
+        Terms in more than Config.LEXICAL_MAX_DF of the documents ("game",
+        "price", the snapshot date) carry almost no weight, so they are
+        skipped rather than scored over every posting.
+        """
+        n = len(self.lengths)
+        if n == 0:
+            return []
+        average = self.total_length / n
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings or len(postings) > Config.LEXICAL_MAX_DF * n:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: str) -> None:
+        """Atomically pickle the index to path."""
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> Optional["LexicalIndex"]:
+        """Load a pickled index, or None if there is none or it cannot be read."""
+        try:
+            with open(path, "rb") as f:
+                index = pickle.load(f)
+        except Exception:
+            return None
+        return index if isinstance(index, LexicalIndex) else None
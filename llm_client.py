@@ -1,9 +1,13 @@
-from typing import Optional, List, Any, Dict
+import logging
+from typing import Optional, List, Any, Dict, Iterator, AsyncIterator
 from config import Config
 from langchain_core.language_models.llms import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.outputs import GenerationChunk
 from pydantic import PrivateAttr, Field
 
+logger = logging.getLogger(__name__)
+
 
 class NvidiaLLM(LLM):
     """Custom LangChain-compatible LLM for Nvidia API integration."""
@@ -13,6 +17,7 @@ class NvidiaLLM(LLM):
     max_tokens: int = Field(default=1024)
 
     _client: Any = PrivateAttr()
+    _async_client: Any = PrivateAttr(default=None)
     _params: Dict = PrivateAttr()
 
     def __init__(self, **kwargs):
@@ -20,34 +25,106 @@ class NvidiaLLM(LLM):
         self._client = Config.create_client()
         self._params = Config.COMPLETION_PARAMS
 
+    @property
+    def async_client(self) -> Any:
+        """Pooled AsyncOpenAI client, created on first use inside the event loop that owns it."""
+        if self._async_client is None:
+            self._async_client = Config.create_async_client()
+        return self._async_client
+
+    def _request_params(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Completion parameters: config defaults, this model's settings, then per-call overrides."""
+        params = {**self._params, "temperature": self.temperature, "max_tokens": self.max_tokens, **kwargs,
+                  "stream": True}
+        if Config.STREAM_USAGE:
+            params.setdefault("stream_options", {"include_usage": True})
+        return params
+
+    @staticmethod
+    def _usage_chunk(usage: Any) -> GenerationChunk:
+        """Empty chunk carrying the token usage the API reports at the end of a stream."""
+        usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+        logger.info("Nvidia API usage: %d prompt tokens, %d completion tokens",
+                    usage["prompt_tokens"], usage["completion_tokens"])
+        return GenerationChunk(text="", generation_info={"usage": usage})
+
     @property
     def _llm_type(self) -> str:
         """Return identifier for this LLM."""
         return "nvidia_custom"
 
-    def _call(
+    def _stream(
             self,
             prompt: str,
             stop: Optional[List[str]] = None,
             run_manager: Optional[CallbackManagerForLLMRun] = None,
             **kwargs: Any,
-    ) -> str:
-        """Execute the LLM call with the provided prompt."""
+    ) -> Iterator[GenerationChunk]:
+        """Stream the LLM response token by token as it is generated."""
         try:
             completion = self._client.chat.completions.create(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
-                **{**self._params, **kwargs}
+                **self._request_params(kwargs)
             )
 
-            response = ""
             for chunk in completion:
-                if chunk.choices[0].delta.content is not None:
+                if getattr(chunk, "usage", None):
+                    yield self._usage_chunk(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content is not None:
                     content = chunk.choices[0].delta.content
-                    response += content
+                    generation = GenerationChunk(text=content)
                     if run_manager:
-                        run_manager.on_llm_new_token(content)
+                        run_manager.on_llm_new_token(content, chunk=generation)
+                    yield generation
+        except Exception as e:
+            raise ValueError(f"Error calling Nvidia API: {str(e)}")
+
+    def _call(
+            self,
+            prompt: str,
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> str:
+        """Execute the LLM call with the provided prompt."""
+        response = "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+        return response.strip()
 
-            return response.strip()
+    async def _astream(
+            self,
+            prompt: str,
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Asynchronously stream the LLM response over the pooled client."""
+        try:
+            completion = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                **self._request_params(kwargs)
+            )
+
+            async for chunk in completion:
+                if getattr(chunk, "usage", None):
+                    yield self._usage_chunk(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    content = chunk.choices[0].delta.content
+                    generation = GenerationChunk(text=content)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(content, chunk=generation)
+                    yield generation
         except Exception as e:
-            raise ValueError(f"Error calling Nvidia API: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error calling Nvidia API: {str(e)}")
+
+    async def _acall(
+            self,
+            prompt: str,
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> str:
+        """Asynchronously execute the LLM call with the provided prompt."""
+        response = "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+        return response.strip()
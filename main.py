@@ -1,13 +1,16 @@
-from pathlib import Path
 import pandas as pd
 import streamlit as st
-from typing import List
-from data_loader import DataLoader
-from rate_limiter import RateLimiter
-from retrieval_chain import RetrievalChain
-from steam_scraper import SteamScraper
+from typing import TYPE_CHECKING, Any, Dict, List
+from async_runtime import runtime
+from config import Config
+from refresh_worker import latest_snapshot
+from shared_resources import (get_aggregates, get_rag_chain, get_rate_limiter, start_metrics_server,
+                              start_refresh_worker, warm_rag_chain)
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from retrieval_chain import RetrievalChain
+
 
 class GameInsightApp:
     """Sets up the Streamlit App."""
@@ -15,12 +18,6 @@ class GameInsightApp:
 
     def __init__(self):
 
-        self.rate_limiter = RateLimiter(
-            redis_url=st.secrets["UPSTASH_REDIS_URL"],
-            redis_token=st.secrets["UPSTASH_REDIS_TOKEN"]
-        )
-
-
         st.set_page_config(
             page_title="GameInsight Chat",
             page_icon="🎮",
@@ -62,130 +59,152 @@ class GameInsightApp:
                 """, unsafe_allow_html=True)
 
 
-        self.scraper = SteamScraper()
+        self.data_path = None
         self.ensure_data()
+        if Config.METRICS_PORT:
+            start_metrics_server()
 
         # Initialise session state variables
         if 'messages' not in st.session_state:
             st.session_state.messages = []
-        if 'rag_chain' not in st.session_state:
-            st.session_state.rag_chain = self.load_rag_chain()
-        if 'suggested_questions' not in st.session_state:
-            st.session_state.suggested_questions = []
+
+        # The RAG chain is shared by all sessions and rebuilt only when the data changes. It is
+        # built in the background so the page renders at once; the first question waits for it
+        self.rag_chain_ready = warm_rag_chain(self.data_path)
+
+    @property
+    def rag_chain(self) -> "RetrievalChain":
+        return self.load_rag_chain()
+
+    @property
+    def aggregates(self) -> Dict[str, Any]:
+        return get_aggregates(self.data_path)
 
     def analyse_data(self) -> List[str]:
-        """Analyse the CSV data and generate relevant questions."""
-        df = pd.read_csv(self.scraper.output_path)
-        questions = []
-
-        # Analyse player counts
-        max_players = df['current_players'].max()
-        if max_players > 100000:
-            questions.append(f"What game has the highest current player count and why might it be so popular?")
-
-        # Analyse price distributions
-        free_games = df[df['price'] == 0].shape[0]
-        if free_games > 0:
-            questions.append(f"What are the most popular free-to-play games right now?")
-
-        # Analyse player trends
-        peak_vs_current = df[df['peak_players_today'] > df['current_players'] * 2]
-        if not peak_vs_current.empty:
-            questions.append("Which games show the biggest difference between peak and current players today?")
-
-        # Add general analytical questions
-        questions.extend([
-            "What are the current trending games based on player count growth?",
-            "Which price range shows the highest player engagement?",
-            "What patterns do you notice in player activity across different game genres?",
-        ])
-
-        return questions
+        """Suggested questions for the current snapshot, computed once per snapshot and shared by all sessions."""
+        return self.aggregates["suggested_questions"]
 
     def ensure_data(self):
-        """Ensure valid game data is available."""
-
-        def is_valid_file(path):
-            if not path.is_file() or path.stat().st_size == 0:
-                return False
-
-            required_columns = ['name', 'price', 'current_players', 'peak_players_today', 'date']
-            try:
-                df = pd.read_csv(path, usecols=required_columns, nrows=5)
-                return not df.isnull().any().any()
-            except (ValueError, pd.errors.ParserError, FileNotFoundError):
-                return False
-
-        try:
-            self.scraper.scrape()
-            if is_valid_file(Path('games_fresh.csv')):
-                self.scraper.output_path = 'games_fresh.csv'
-                return
-        except Exception:
-            pass
-
-        if is_valid_file(Path('games_back-up.csv')):
-            self.scraper.output_path = 'games_back-up.csv'
-            return
-
-        raise RuntimeError("Unable to retrieve valid data: scraping and backup both failed.")
-
-    def load_rag_chain(self) -> RetrievalChain:
-        data_path = self.scraper.output_path
-        data = DataLoader.load_data(data_path)
-        documents = DataLoader.create_documents(data)
-        return RetrievalChain(documents)
+        """Serve the last good snapshot immediately and keep refreshing it in the background."""
+        if Config.REFRESH_ENABLED:
+            start_refresh_worker()
+        self.data_path = latest_snapshot()
+
+    def load_rag_chain(self) -> "RetrievalChain":
+        return get_rag_chain(self.data_path)
+
+    @staticmethod
+    def render_message(message: dict):
+        """Render a single chat message."""
+        avatar = "🤖" if message["role"] == "assistant" else "👤"
+        with st.chat_message(message["role"], avatar=avatar):
+            st.write(f"**{message['role'].capitalize()}** | {datetime.now().strftime('%H:%M:%S')}")
+            st.write(message["content"])
+
+    def answer(self, question: str, history):
+        """Stream the answer to a question into the chat history as it is generated."""
+        user_message = {"role": "user", "content": question}
+        st.session_state.messages.append(user_message)
+
+        def tokens(events):
+            for event in events:
+                if "token" in event:
+                    yield event["token"]
+                elif "source_documents" in event:
+                    st.session_state.current_sources = event["source_documents"]
+                elif "timings" in event:
+                    st.session_state.last_timings = event["timings"]
+
+        with history:
+            self.render_message(user_message)
+            with st.chat_message("assistant", avatar="🤖"):
+                st.write(f"**Assistant** | {datetime.now().strftime('%H:%M:%S')}")
+                try:
+                    rate_limiter = get_rate_limiter()
+                    if rate_limiter.is_allowed():
+                        with st.spinner("Loading the game index..."):
+                            rag_chain = self.rag_chain
+                        events = runtime.iterate(rag_chain.aquery_stream(question))
+                        response = st.write_stream(tokens(events))
+                        timings = st.session_state.last_timings
+                        st.caption(f"First token in {timings['time_to_first_token']:.2f}s · "
+                                   f"complete in {timings['total']:.2f}s")
+                    else:
+                        response = (f"You've used all {rate_limiter.max_requests} questions for now. "
+                                    f"Ask again after {rate_limiter.get_reset_time():%Y-%m-%d %H:%M}.")
+                        st.write(response)
+                except Exception as e:
+                    response = f"An error occurred: {e}"
+                    st.write(response)
+
+        st.session_state.messages.append({"role": "assistant", "content": response})
+
+    @staticmethod
+    def debug_enabled() -> bool:
+        return Config.DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+    @staticmethod
+    def render_debug_panel():
+        """Stage latencies of the last answer in this session and across the process."""
+        from metrics import metrics
+
+        with st.expander("🛠️ Debug: query stages"):
+            timings = st.session_state.get("last_timings")
+            if timings and timings.get("stages"):
+                st.write(f"Last answer: route **{timings['route']}**, {timings.get('prompt_tokens', 0)} prompt / "
+                         f"{timings.get('completion_tokens', 0)} completion tokens")
+                st.dataframe(pd.DataFrame(
+                    [{"stage": stage, "ms": seconds * 1000} for stage, seconds in timings["stages"].items()]
+                ), hide_index=True)
+            else:
+                st.caption("Ask a question to see its stage latencies.")
+            summary = metrics.stage_summary()
+            if summary:
+                st.write("All queries in this process")
+                st.dataframe(pd.DataFrame(summary).round(1), hide_index=True)
+
+    @staticmethod
+    def render_overview(aggregates: Dict[str, Any]):
+        """Top games and engagement by price range in the current snapshot."""
+        with st.expander(f"📊 Snapshot overview ({aggregates['games']} games, {aggregates['date']})"):
+            st.write("Most played right now")
+            st.dataframe(pd.DataFrame(aggregates["top_players"]), hide_index=True)
+            st.write("Engagement by price range")
+            st.dataframe(pd.DataFrame(aggregates["price_buckets"]).round(0), hide_index=True)
 
     def run(self):
 
         st.markdown("<h1 style='text-align: center;'>🎮 GameInsight Chat</h1>", unsafe_allow_html=True)
         st.markdown("<p style='text-align: center; color: #a3bffa;'>Explore gaming trends and stats in real-time!</p>", unsafe_allow_html=True)
+        if not self.rag_chain_ready:
+            st.caption("Loading the game index in the background; your first answer may take a little longer.")
 
         col1, col2 = st.columns([0.55, 0.45], gap="medium")
 
-        with col1:
+        # Render the history first so new answers can stream into it
+        with col2:
+            st.markdown("### 📜 Chat History")
+            history = st.container(height=500, border=True)
+            with history:
+                for message in st.session_state.messages:
+                    self.render_message(message)
 
-            # Generate and display suggested questions
-            if not st.session_state.suggested_questions:
-                st.session_state.suggested_questions = self.analyse_data()
+        with col1:
 
             with st.container():
                 st.subheader("🔍 Suggested Questions")
-                for question in st.session_state.suggested_questions:
+                for question in self.analyse_data():
                     if st.button(question, key=f"btn_{hash(question)}"):
-                        st.session_state.messages.append({"role": "user", "content": question})
-                        with st.spinner("Processing your query..."):
-                            try:
-                                result = st.session_state.rag_chain.query(question)
-                                response = result["result"]
-                                st.session_state.messages.append({"role": "assistant", "content": response})
-                                st.session_state.current_sources = result["source_documents"]
-                            except Exception as e:
-                                error_message = f"An error occurred: {e}"
-                                st.session_state.messages.append({"role": "assistant", "content": error_message})
+                        self.answer(question, history)
 
             # Handle user input
             if prompt := st.chat_input("Ask about game statistics..."):
-                st.session_state.messages.append({"role": "user", "content": prompt})
-                with st.spinner("Processing your query..."):
-                    try:
-                        result = st.session_state.rag_chain.query(prompt)
-                        response = result["result"]
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                        st.session_state.current_sources = result["source_documents"]
-                    except Exception as e:
-                        error_message = f"An error occurred: {e}"
-                        st.session_state.messages.append({"role": "assistant", "content": error_message})
+                self.answer(prompt, history)
 
-        with col2:
-            st.markdown("### 📜 Chat History")
-            with st.container(height=500, border=True):
-                for message in st.session_state.messages:
-                    avatar = "🤖" if message["role"] == "assistant" else "👤"
-                    with st.chat_message(message["role"], avatar=avatar):
-                        st.write(f"**{message['role'].capitalize()}** | {datetime.now().strftime('%H:%M:%S')}")
-                        st.write(message["content"])
+            self.render_overview(self.aggregates)
 
+            if self.debug_enabled():
+                self.render_debug_panel()
 
 if __name__ == "__main__":
     app = GameInsightApp()
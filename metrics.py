@@ -0,0 +1,280 @@
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached answer (milliseconds) to a slow scrape or index build (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exported to Prometheus, with interpolated quantiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by linear interpolation within its bucket, like histogram_quantile."""
+        if self.count == 0:
+            return float("nan")
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Trace:
+    """Stage durations of one query, each also observed into the registry's stage histogram."""
+
+    def __init__(self, registry: "MetricsRegistry"):
+        self.registry = registry
+        self.stages: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.registry.observe("stage_seconds", seconds, stage=stage)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms for the query, scrape and ingest paths.
+
+    Query stages are recorded per request through a Trace; scrape and ingest
+    functions are timed with the `timed` decorator. Everything lands in the
+    `stage_seconds` histogram labelled by stage, plus named counters, and
+    can be exported as Prometheus text or appended to a JSON lines log.
+    """
+
+    def __init__(self, namespace: str = "gameinsight", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Add value to a counter."""
+        with self._lock:
+            self._counters[name, self._labels(labels)] += value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a value, usually a duration in seconds, in a histogram."""
+        key = name, self._labels(labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def trace(self) -> Trace:
+        """Start collecting the stage durations of one query."""
+        return Trace(self)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time a block into the stage histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorator timing every call of a function or coroutine function as stage."""
+        def decorator(function: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(stage):
+                        return await function(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def stage_summary(self) -> List[Dict[str, Any]]:
+        """Count and p50/p95/p99 latency in milliseconds per stage, slowest p95 first."""
+        with self._lock:
+            rows = [
+                {"stage": dict(labels).get("stage", ""), "count": h.count,
+                 "p50_ms": h.quantile(0.5) * 1000, "p95_ms": h.quantile(0.95) * 1000,
+                 "p99_ms": h.quantile(0.99) * 1000, "mean_ms": h.sum / h.count * 1000}
+                for (name, labels), h in self._histograms.items() if name == "stage_seconds"
+            ]
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All counters and histograms as plain data."""
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self._counters.items()],
+                "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                                "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                               for (name, labels), h in self._histograms.items()],
+            }
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = defaultdict(list)
+            for (name, labels), value in self._counters.items():
+                counters[name].append((labels, value))
+            for name, series in sorted(counters.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{self._format_labels(labels)} {value:g}" for labels, value in series)
+
+            histograms = defaultdict(list)
+            for (name, labels), histogram in self._histograms.items():
+                histograms[name].append((labels, histogram))
+            for name, series in sorted(histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, h in series:
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{self._format_labels(labels)} {h.sum:g}")
+                    lines.append(f"{metric}_count{self._format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def log(self, path: str, record: Dict[str, Any]) -> None:
+        """Append one JSON record, e.g. a query's stage timings, to a JSON lines file."""
+        line = json.dumps({"time": time.time(), **record}, default=str)
+        with self._lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics in the Prometheus text format from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+        return server
+
+    def reset(self) -> None:
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler recording LLM and retriever stages into a query's trace.
+
+    Records time to first token and total generation time of LLM runs, and
+    the duration of retriever runs. Runs inline so async runs report from
+    the event loop instead of hopping to an executor thread.
+    """
+
+    run_inline = True
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self._starts: Dict[UUID, float] = {}
+        self._first_token: Dict[UUID, bool] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        if token and run_id in self._starts and not self._first_token.get(run_id):
+            self._first_token[run_id] = True
+            self.trace.record("llm_first_token", time.perf_counter() - self._starts[run_id])
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._starts.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+        if start is not None:
+            self.trace.record("llm_generate", time.perf_counter() - start)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+        self.trace.registry.inc("errors_total", stage="llm")
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.trace.record("retriever", time.perf_counter() - start)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts.pop(run_id, None)
+        self.trace.registry.inc("errors_total", stage="retriever")
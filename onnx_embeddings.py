@@ -0,0 +1,69 @@
+import json
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers model run from its ONNX export with ONNX Runtime.
+
+    Loads the tokenizer with `tokenizers` and the model with `onnxruntime`,
+    so neither torch nor sentence-transformers is imported. Mean pooling
+    over the attention mask and L2 normalisation reproduce the
+    sentence-transformers pipeline of the mpnet and MiniLM models; vectors
+    match the torch backend up to float error, or quantization error for
+    the int8 exports.
+    """
+
+    def __init__(self, model_name: str, file_name: str = "onnx/model.onnx", batch_size: int = 64,
+                 threads: Optional[int] = None):
+        import onnxruntime
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        with open(hf_hub_download(model_name, "sentence_bert_config.json")) as f:
+            max_length = json.load(f).get("max_seq_length", 512)
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            hf_hub_download(model_name, file_name), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.zeros((len(texts), max(len(e.ids) for e in encodings)), dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for i, encoding in enumerate(encodings):
+            ids[i, :len(encoding.ids)] = encoding.ids
+            mask[i, :len(encoding.ids)] = 1
+
+        inputs = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(ids)
+        tokens = self.session.run(None, inputs)[0]
+
+        weights = mask[..., None].astype(np.float32)
+        pooled = (tokens * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts in batches of similar length, so little of each batch is padding."""
+        if not texts:
+            return []
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        vectors = np.concatenate([self._encode([texts[i] for i in order[start:start + self.batch_size]])
+                                  for start in range(0, len(texts), self.batch_size)])
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Encode a single query."""
+        return self._encode([text])[0].tolist()
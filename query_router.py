@@ -0,0 +1,306 @@
+import operator
+import re
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from config import Config
+from forecasting import Forecaster
+
+
+class QueryRouter:
+    """Routes questions to the cheapest path that can answer them.
+
+    Ranking, aggregate and counting questions ("highest current player
+    count", "which price range shows the highest engagement") are answered
+    exactly with vectorized pandas queries on the snapshot, and questions
+    about the future from precomputed forecasts when there are any. Questions that
+    only narrow the data ("free games with a good story") run MMR over the
+    FAISS index restricted to the matching rows. Everything else falls
+    through to plain MMR retrieval. RetrievalChain answers filtered and
+    semantic questions that name a game from that game's history summary
+    (the named route) when hybrid search is on, so questions about how a
+    game did in the past go there rather than to the forecasts.
+    """
+
+    STRUCTURED = "structured"
+    FILTERED = "filtered"
+    NAMED = "named"
+    SEMANTIC = "semantic"
+
+    PRICE_EDGES = [0.0, 10.0, 30.0, 60.0]
+    PRICE_BUCKET_LABELS = ["Free", "Under $10", "$10-$30", "$30-$60", "$60+"]
+
+    METRIC_PATTERNS = [
+        ("peak_gap", r"difference between (?:the )?peak and current|gap between (?:the )?peak and current"
+                     r"|peak (?:vs\.?|versus) current|drop[- ]?off"),
+        ("peak_players_today", r"\bpeak"),
+        ("price", r"\bprice|expensive|cheap|\bcost"),
+        ("current_players", r"player|popular|played|engagement"),
+    ]
+    DESCENDING = r"\b(?:highest|most|biggest|largest|best|greatest|max(?:imum)?)\b"
+    ASCENDING = r"\b(?:lowest|least|fewest|cheapest|smallest|min(?:imum)?)\b"
+    AGGREGATE = r"\b(?:average|mean|total|sum|median)\b"
+    COUNT = r"\bhow many\b"
+    FORECAST = (r"forecast|predict|projection|next (?:week|month|few days|\d+ days)|\bwill\b|going to"
+                r"|\bexpect|\btrend|growth|growing")
+    # "trend" and "growth" look ahead unless the question is about the past; these words always do
+    FUTURE = r"forecast|predict|projection|next (?:week|month|few days|\d+ days)|\bwill\b|going to|\bexpect"
+    PAST = (r"\b(?:did|was|were|has been|have been|so far|since)\b"
+            r"|\b(?:last|past|previous|this)\s+(?:\d+\s+)?(?:days?|weeks?|months?|years?)\b")
+    DECLINE = r"\b(?:drop|decline|fall|falling|lose|losing|shrink|cheaper|discount)"
+    PRICE_RANGE = r"price (?:range|bracket|tier|band|bucket)s?"
+    NUMBER = r"\$?(\d[\d,]*(?:\.\d+)?)\s*([km])?\b"
+    THRESHOLD = (r"\b(under|below|less than|cheaper than|over|above|more than|at least)\s+"
+                 + NUMBER + r"\s*(\w+)?")
+
+    def __init__(self, data: pd.DataFrame, forecasts: Optional[Dict[str, pd.DataFrame]] = None):
+        self.data = data.copy()
+        self.data['price'] = pd.to_numeric(self.data['price'], errors='coerce').fillna(0.0)
+        self.data['peak_gap'] = self.data['peak_players_today'] - self.data['current_players']
+        dates = pd.to_datetime(self.data['date'], errors='coerce')
+        self.data['date'] = dates.dt.normalize()
+        self.latest_date = dates.max().normalize() if dates.notna().any() else None
+        # Most questions are about "now", so the latest snapshot is kept pre-sliced
+        self.latest = self.data[self.data['date'] == self.latest_date] if self.latest_date is not None else self.data
+
+        # Forecast frames per column, and game names longest first for mention matching
+        self.forecasts = forecasts or {}
+        self._names = sorted(((self._normalize(name), name) for name in self.data['name'].dropna().unique()
+                              if len(str(name)) >= 3), key=lambda item: -len(item[0]))
+
+        self._index_metadata: Optional[pd.DataFrame] = None
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return re.sub(r"[™®©]", "", str(name).lower())
+
+    def mentioned_games(self, question: str) -> List[str]:
+        """Games named in the question, longest names first so "Dota 2" is not read as "Dota"."""
+        q = self._normalize(question)
+        found = []
+        for normalized, name in self._names:
+            if normalized in q:
+                found.append(name)
+                q = q.replace(normalized, " ")
+        return found
+
+    @staticmethod
+    def _number(value: str, suffix: Optional[str]) -> float:
+        number = float(value.replace(',', ''))
+        return number * {"k": 1e3, "m": 1e6}.get((suffix or "").lower(), 1)
+
+    def parse_filters(self, question: str) -> Dict[str, Any]:
+        """Extract price, player and date constraints from a question."""
+        q = question.lower()
+        filters: Dict[str, Any] = {}
+        if re.search(r"free[- ]to[- ]play|\bfree\b", q):
+            filters["price"] = ("==", 0.0)
+        elif re.search(r"\bpaid\b", q):
+            filters["price"] = (">", 0.0)
+
+        for match in re.finditer(self.THRESHOLD, q):
+            op = "<" if match.group(1) in ("under", "below", "less than", "cheaper than") else ">="
+            number = self._number(match.group(2), match.group(3))
+            unit = match.group(4) or ""
+            is_price = "$" in match.group(0) or unit in ("dollars", "usd", "eur", "euros", "bucks")
+            column = "price" if is_price or (not unit.startswith("player") and number < 1000) else "current_players"
+            filters[column] = (op, number)
+
+        date = re.search(r"\d{4}-\d{2}-\d{2}", q)
+        if date:
+            filters["date"] = ("==", pd.Timestamp(date.group(0)))
+        return filters
+
+    def parse(self, question: str) -> Dict[str, Any]:
+        """Classify a question into a route and the parameters needed to answer it."""
+        q = question.lower()
+        filters = self.parse_filters(question)
+        metric = next((name for name, pattern in self.METRIC_PATTERNS if re.search(pattern, q)), None)
+        if metric == "price" and re.search(self.PRICE_RANGE, q):
+            # "which price range has the most players" ranks buckets by players, not by price
+            metric = "current_players"
+
+        # Counts and aggregates run over the whole table, so questions about named games skip them
+        games = self.mentioned_games(question)
+        intent = None
+        looks_ahead = re.search(self.FUTURE, q) or (re.search(self.FORECAST, q) and not re.search(self.PAST, q))
+        if self.forecasts and looks_ahead:
+            intent = "forecast"
+        elif re.search(self.PRICE_RANGE, q):
+            intent = "price_buckets"
+        elif re.search(self.COUNT, q) and not games:
+            intent = "count"
+        elif re.search(self.AGGREGATE, q) and metric and not games:
+            intent = "aggregate"
+
+        # "at least 50k players" is a filter, not a request to rank by fewest players
+        ordering = re.sub(self.THRESHOLD, " ", q)
+        top = re.search(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:most|least|highest|lowest|biggest|cheapest)", ordering)
+        descending = re.search(self.DESCENDING, ordering)
+        ascending = re.search(self.ASCENDING, ordering)
+        if intent is None and metric and (top or descending or ascending):
+            intent = "rank"
+
+        if top:
+            limit = int(top.group(1) or top.group(2))
+        elif re.search(r"\b(?:what|which) game\b(?!s)", q):
+            limit = 1
+        else:
+            limit = 10
+
+        if intent:
+            route = self.STRUCTURED
+        elif filters:
+            route = self.FILTERED
+        else:
+            route = self.SEMANTIC
+        ascending = bool(ascending) and not descending
+        if intent == "forecast":
+            ascending = bool(re.search(self.DECLINE, q))
+            metric = "price" if metric == "price" else "current_players"
+        return {"route": route, "intent": intent, "metric": metric or "current_players",
+                "ascending": ascending, "limit": limit, "filters": filters,
+                "games": games if intent == "forecast" else []}
+
+    @staticmethod
+    def _mask(frame: pd.DataFrame, filters: Dict[str, Any]) -> np.ndarray:
+        ops = {"==": operator.eq, "<": operator.lt, ">": operator.gt, ">=": operator.ge}
+        mask = np.ones(len(frame), dtype=bool)
+        for column, (op, value) in filters.items():
+            mask &= ops[op](frame[column], value).to_numpy()
+        return mask
+
+    def select(self, filters: Dict[str, Any]) -> pd.DataFrame:
+        """Rows matching filters, restricted to the latest snapshot unless a date is given."""
+        frame = self.data if "date" in filters else self.latest
+        return frame[self._mask(frame, filters)] if filters else frame
+
+    @staticmethod
+    def row_documents(rows: pd.DataFrame) -> List[Document]:
+        """Format result rows the same way DataLoader formats snapshot documents."""
+        return [
+            Document(
+                page_content=(f"Game: {row.name}, Price: {row.price}, Current Players: {row.current_players}, "
+                              f"Peak Players Today: {row.peak_players_today}, Date: {row.date:%Y-%m-%d}"),
+                metadata={"name": row.name, "date": f"{row.date:%Y-%m-%dT%H:%M:%S}", "price": row.price,
+                          "current_players": row.current_players, "peak_players_today": row.peak_players_today}
+            )
+            for row in rows.itertuples(index=False)
+        ]
+
+    @staticmethod
+    def _label(column: str) -> str:
+        return {"peak_gap": "peak minus current players"}.get(column, column.replace("_", " "))
+
+    def answer(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a structured plan with pandas, returning a text answer and its supporting documents."""
+        if plan["intent"] == "forecast":
+            return self.forecast_answer(plan)
+
+        rows = self.select(plan["filters"])
+        metric = plan["metric"]
+
+        if plan["intent"] == "rank":
+            ranked = rows.sort_values(metric, ascending=plan["ascending"], kind="stable")[:plan["limit"]]
+            fmt = "${:,.2f}" if metric == "price" else "{:,.0f} " + self._label(metric)
+            lines = [f"{i}. {row.name}: {fmt.format(getattr(row, metric))}"
+                     for i, row in enumerate(ranked.itertuples(index=False), 1)]
+            return {"answer": "\n".join(lines), "documents": self.row_documents(ranked)}
+
+        if plan["intent"] == "price_buckets":
+            # Right-closed buckets: Free is price <= 0, then (0, 10], (10, 30], ...
+            codes = np.searchsorted(self.PRICE_EDGES, rows["price"].to_numpy(), side="left")
+            players = rows["current_players"].to_numpy(dtype=float)
+            counts = np.bincount(codes, minlength=len(self.PRICE_BUCKET_LABELS))
+            totals = np.bincount(codes, weights=players, minlength=len(self.PRICE_BUCKET_LABELS))
+            order = np.argsort(totals / np.maximum(counts, 1), kind="stable")
+            lines = [f"{self.PRICE_BUCKET_LABELS[b]}: {counts[b]} games, {totals[b]:,.0f} current players in total, "
+                     f"{totals[b] / counts[b]:,.0f} on average, median {np.median(players[codes == b]):,.0f}"
+                     for b in (order if plan["ascending"] else order[::-1]) if counts[b]]
+            text = "Player engagement by price range:\n" + "\n".join(lines)
+            return {"answer": text, "documents": [Document(page_content=text, metadata={"route": "price_buckets"})]}
+
+        if plan["intent"] == "count":
+            text = f"{len(rows)} games match."
+            return {"answer": text, "documents": [Document(page_content=text, metadata={"route": "count"})]}
+
+        values = rows[metric]
+        text = (f"{self._label(metric).capitalize()} across {len(rows)} games: average {values.mean():,.2f}, "
+                f"median {values.median():,.2f}, total {values.sum():,.2f}")
+        return {"answer": text, "documents": [Document(page_content=text, metadata={"route": "aggregate"})]}
+
+    def forecast_answer(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Forecasts for the games named in the question, or the games with the largest forecast change."""
+        names = plan.get("games") or []
+        if not names:
+            frame = self.forecasts.get(plan["metric"], next(iter(self.forecasts.values())))
+            if plan["filters"]:
+                frame = frame[frame["name"].isin(self.select(plan["filters"])["name"])]
+            names = frame.sort_values("change", ascending=plan["ascending"], kind="stable")["name"][:plan["limit"]]
+        documents = Forecaster.to_documents(self.forecasts, names)
+        return {"answer": "\n".join(doc.page_content for doc in documents), "documents": documents}
+
+    def index_metadata(self, vectorstore: FAISS) -> pd.DataFrame:
+        """Metadata of every indexed document, aligned with FAISS vector positions."""
+        with self._index_lock:
+            if self._index_metadata is None or len(self._index_metadata) != vectorstore.index.ntotal:
+                ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+                frame = pd.DataFrame([vectorstore.docstore.search(_id).metadata for _id in ids])
+                frame["price"] = pd.to_numeric(frame["price"], errors="coerce").fillna(0.0)
+                frame["date"] = pd.to_datetime(frame["date"], errors="coerce").dt.normalize()
+                self._index_metadata = frame
+            return self._index_metadata
+
+    def filtered_search(
+            self,
+            vectorstore: FAISS,
+            embeddings: Embeddings,
+            question: str,
+            filters: Dict[str, Any],
+            k: int = 8,
+            fetch_k: int = 20,
+            lambda_mult: float = 0.7,
+            embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        """MMR restricted to documents matching filters.
+
+        The filter is applied before the vector search, so selective filters
+        still return k documents, unlike LangChain's post-filter over the top
+        fetch_k hits. Up to FILTER_EXACT_MAX_ROWS matching rows are ranked
+        exactly from their stored vectors; larger sets go through the index
+        with a FAISS ID selector, which on IVF and HNSW indexes only sees
+        the probed lists or visited graph nodes. Pass the question's
+        embedding when it is already computed, e.g. by a batched call.
+        """
+        import faiss
+        import vector_index
+
+        metadata = self.index_metadata(vectorstore)
+        filters = dict(filters)
+        if "date" not in filters and metadata["date"].notna().any():
+            filters["date"] = ("==", metadata["date"].max())
+        positions = np.flatnonzero(self._mask(metadata, filters))
+        if len(positions) == 0:
+            return []
+
+        query = np.array([embedding if embedding is not None else embeddings.embed_query(question)], dtype=np.float32)
+        index = vectorstore.index
+        if len(positions) > max(fetch_k, Config.FILTER_EXACT_MAX_ROWS):
+            params = vector_index.search_parameters(index, faiss.IDSelectorBatch(positions.astype(np.int64)))
+            _, indices = index.search(query, fetch_k, params=params)
+            positions = indices[0][indices[0] != -1]
+            if len(positions) == 0:
+                return []
+        candidates = vector_index.vectors(index, positions)
+        if len(positions) > fetch_k:
+            # Exact top fetch_k by L2 distance over the matching rows
+            nearest = np.argpartition(((candidates - query) ** 2).sum(axis=1), fetch_k)[:fetch_k]
+            positions, candidates = positions[nearest], candidates[nearest]
+        selected = maximal_marginal_relevance(query, candidates, k=k, lambda_mult=lambda_mult)
+        return [vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(positions[i])]) for i in selected]
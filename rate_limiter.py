@@ -1,83 +1,169 @@
-from upstash_redis import Redis
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import streamlit as st
-from datetime import datetime, timedelta
+
+# Check-and-consume in one atomic step: the window starts at a key's first
+# request and the counter expires with it. Returns {count, ttl_seconds}.
+CONSUME_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return {count, redis.call('TTL', KEYS[1])}
+"""
+
+# Decision: (allowed, remaining requests, unix time the window resets)
+Decision = Tuple[bool, int, float]
+
+
+def script_decision(result, limit: int, window: int) -> Decision:
+    """Turn CONSUME_SCRIPT's {count, ttl_seconds} into a Decision."""
+    count, ttl = int(result[0]), int(result[1])
+    return count <= limit, max(0, limit - count), time.time() + (ttl if ttl > 0 else window)
+
+
+class InMemoryBackend:
+    """In-process sliding-window limiter, for a single app process or local development.
+
+    Keys are dropped once their window is empty, and every key is pruned
+    at most once per window, so per-session keys do not accumulate.
+    """
+
+    def __init__(self):
+        self._requests: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.time()
+
+    def _prune(self, key: str, window: int, now: float) -> deque:
+        requests = self._requests.pop(key, None) or deque()
+        while requests and requests[0] <= now - window:
+            requests.popleft()
+        if requests:
+            self._requests[key] = requests
+        return requests
+
+    def _sweep(self, window: int, now: float) -> None:
+        """Prune every key, dropping sessions that have not been seen for a whole window."""
+        if now - self._swept_at < window:
+            return
+        self._swept_at = now
+        for key in list(self._requests):
+            self._prune(key, window, now)
+
+    def consume(self, key: str, limit: int, window: int) -> Decision:
+        now = time.time()
+        with self._lock:
+            self._sweep(window, now)
+            requests = self._prune(key, window, now)
+            allowed = len(requests) < limit
+            if allowed:
+                requests.append(now)
+                self._requests[key] = requests
+            reset_at = requests[0] + window if requests else now
+            return allowed, limit - len(requests), reset_at
+
+    def consume_many(self, keys: List[str], limit: int, window: int) -> List[Decision]:
+        return [self.consume(key, limit, window) for key in keys]
+
+    def peek(self, key: str, limit: int, window: int) -> Decision:
+        now = time.time()
+        with self._lock:
+            requests = self._prune(key, window, now)
+            reset_at = requests[0] + window if requests else now
+            return len(requests) < limit, limit - len(requests), reset_at
+
+
+class RedisBackend:
+    """Redis limiter that checks and consumes with one atomic Lua script per request."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.redis = client
+        self._consume = self.redis.register_script(CONSUME_SCRIPT)
+
+    def consume(self, key: str, limit: int, window: int) -> Decision:
+        return script_decision(self._consume(keys=[key], args=[window]), limit, window)
+
+    def consume_many(self, keys: List[str], limit: int, window: int) -> List[Decision]:
+        """Decide for many keys in a single pipelined round-trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            self._consume(keys=[key], args=[window], client=pipe)
+        return [script_decision(result, limit, window) for result in pipe.execute()]
+
+    def peek(self, key: str, limit: int, window: int) -> Decision:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        count, ttl = pipe.execute()
+        return script_decision([int(count or 0), ttl], limit, window)
+
+
+class UpstashBackend:
+    """Upstash Redis over REST, using the same atomic script (one HTTP round-trip per decision)."""
+
+    def __init__(self, url: str, token: str):
+        from upstash_redis import Redis
+        self.redis = Redis(url=url, token=token)
+
+    def consume(self, key: str, limit: int, window: int) -> Decision:
+        return script_decision(self.redis.eval(CONSUME_SCRIPT, keys=[key], args=[str(window)]), limit, window)
+
+    def consume_many(self, keys: List[str], limit: int, window: int) -> List[Decision]:
+        pipe = self.redis.pipeline()
+        for key in keys:
+            pipe.eval(CONSUME_SCRIPT, keys=[key], args=[str(window)])
+        return [script_decision(result, limit, window) for result in pipe.exec()]
+
+    def peek(self, key: str, limit: int, window: int) -> Decision:
+        pipe = self.redis.pipeline()
+        pipe.get(key)
+        pipe.ttl(key)
+        count, ttl = pipe.exec()
+        return script_decision([int(count or 0), ttl], limit, window)
 
 
 class RateLimiter:
-    """Implements a rate-limiting mechanism using Upstash Redis."""
+    """Implements a rate-limiting mechanism with a pluggable storage backend."""
 
-    def __init__(self, redis_url: str, redis_token: str):
-        """Initialises the rate limiter with Upstash Redis credentials."""
-        self.redis = Redis(url=redis_url, token=redis_token)
-        self.max_requests = 3
-        self.window_seconds = 24 * 60 * 60  # 24-hour time window
+    def __init__(self, redis_url: Optional[str] = None, redis_token: Optional[str] = None, backend=None,
+                 max_requests: int = 3, window_seconds: int = 24 * 60 * 60):
+        """Initialises the rate limiter; Upstash credentials select the Upstash backend."""
+        if backend is None:
+            backend = UpstashBackend(redis_url, redis_token) if redis_url and redis_token else InMemoryBackend()
+        self.backend = backend
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds  # 24-hour time window by default
 
     def _get_user_key(self) -> str:
         """Generates a unique key for identifying the current user."""
-        # Uses Streamlit's session ID to track individual users
+        # Uses a per-session ID to track individual users
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         return f"rate_limit:{st.session_state.session_id}"
 
-    async def is_allowed(self) -> bool:
-        """Checks if the user is permitted to make another request."""
-        user_key = self._get_user_key()
-
-        # Retrieve the current request count and timestamp
-        current_data = await self.redis.get(user_key)
-        current_time = datetime.now()
-
-        if not current_data:
-            # User's first request in this time window
-            await self.redis.set(
-                user_key,
-                {"count": 1, "first_request": current_time.timestamp()},
-                ex=self.window_seconds
-            )
-            return True
-
-        # Check if the time window has expired
-        first_request = datetime.fromtimestamp(current_data["first_request"])
-        if current_time - first_request > timedelta(seconds=self.window_seconds):
-            # Reset the counter for a new time window
-            await self.redis.set(
-                user_key,
-                {"count": 1, "first_request": current_time.timestamp()},
-                ex=self.window_seconds
-            )
-            return True
-
-        # Allow request if the user is still within the limit
-        if current_data["count"] < self.max_requests:
-            await self.redis.set(
-                user_key,
-                {"count": current_data["count"] + 1, "first_request": current_data["first_request"]},
-                ex=self.window_seconds
-            )
-            return True
-
-        return False
-
-    async def get_remaining_requests(self) -> int:
-        """Returns the number of requests the user can still make."""
-        user_key = self._get_user_key()
-        current_data = await self.redis.get(user_key)
-
-        if not current_data:
-            return self.max_requests
+    def is_allowed(self, user_key: Optional[str] = None) -> bool:
+        """Checks if the user may make another request, counting it if so."""
+        key = user_key or self._get_user_key()
+        return self.backend.consume(key, self.max_requests, self.window_seconds)[0]
 
-        # Check if the time window has expired
-        first_request = datetime.fromtimestamp(current_data["first_request"])
-        if datetime.now() - first_request > timedelta(seconds=self.window_seconds):
-            return self.max_requests
+    def is_allowed_many(self, user_keys: List[str]) -> List[bool]:
+        """Checks and counts one request for each of many users in one batch."""
+        decisions = self.backend.consume_many(user_keys, self.max_requests, self.window_seconds)
+        return [allowed for allowed, _, _ in decisions]
 
-        return self.max_requests - current_data["count"]
+    def get_remaining_requests(self, user_key: Optional[str] = None) -> int:
+        """Returns the number of requests the user can still make."""
+        key = user_key or self._get_user_key()
+        return self.backend.peek(key, self.max_requests, self.window_seconds)[1]
 
-    async def get_reset_time(self) -> datetime:
+    def get_reset_time(self, user_key: Optional[str] = None) -> datetime:
         """Returns the time when the rate limit will reset for the user."""
-        user_key = self._get_user_key()
-        current_data = await self.redis.get(user_key)
-
-        if not current_data:
-            return datetime.now()
-
-        first_request = datetime.fromtimestamp(current_data["first_request"])
-        return first_request + timedelta(seconds=self.window_seconds)
\ No newline at end of file
+        key = user_key or self._get_user_key()
+        return datetime.fromtimestamp(self.backend.peek(key, self.max_requests, self.window_seconds)[2])
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+import pandas as pd
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['name', 'price', 'current_players', 'peak_players_today', 'date']
+# Kept when present, but may be missing, e.g. for chart rows without a store link
+OPTIONAL_COLUMNS = ['appid']
+
+
+def read_valid_snapshot(path, min_rows: int = 1, nrows: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """Read a snapshot CSV's required and optional columns, or None unless it has enough rows and no missing values.
+
+    nrows checks only the first rows, which is enough for files that were
+    fully validated before they were published.
+    """
+    path = Path(path)
+    if not path.is_file() or path.stat().st_size == 0:
+        return None
+
+    try:
+        df = pd.read_csv(path, usecols=lambda column: column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS, nrows=nrows)
+    except (ValueError, pd.errors.ParserError, FileNotFoundError):
+        return None
+    if set(REQUIRED_COLUMNS) - set(df.columns):
+        return None
+    if len(df) < min_rows or df[REQUIRED_COLUMNS].isnull().any().any():
+        return None
+    players = df[['current_players', 'peak_players_today']].apply(pd.to_numeric, errors='coerce')
+    return None if players.isnull().any().any() else df
+
+
+def is_valid_snapshot(path, min_rows: int = 1, nrows: Optional[int] = None) -> bool:
+    """Check that a snapshot CSV has the required columns, enough rows and no missing values."""
+    return read_valid_snapshot(path, min_rows, nrows) is not None
+
+
+def latest_snapshot() -> str:
+    """Return the last good published snapshot, falling back to the bundled backup."""
+    for path in (Config.DATA_PATH, Config.BACKUP_DATA_PATH):
+        # Runs on every app rerun; the worker fully validates snapshots before publishing them
+        if is_valid_snapshot(path, nrows=5):
+            return path
+    raise RuntimeError("Unable to retrieve valid data: no published snapshot and the backup is invalid.")
+
+
+def read_data_version() -> int:
+    """Return the number of snapshots published so far."""
+    try:
+        with open(Config.DATA_VERSION_PATH) as f:
+            return json.load(f)["version"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return 0
+
+
+class RefreshWorker(threading.Thread):
+    """Background thread that scrapes on a schedule and publishes validated snapshots.
+
+    Each scrape is written to a temporary file, validated, and then moved over
+    the published snapshot with an atomic rename, so readers only ever see a
+    complete file. Every publish appends the snapshot to the history store
+    under history_dir, bumps the persisted data-version counter and calls
+    on_publish, which the app uses to warm the new RAG index.
+    """
+
+    def __init__(
+            self,
+            interval: float = Config.REFRESH_INTERVAL,
+            min_rows: int = Config.MIN_SNAPSHOT_ROWS,
+            on_publish: Optional[Callable[[str], None]] = None,
+            history_dir: Optional[str] = Config.HISTORY_DIR,
+    ):
+        super().__init__(name="refresh-worker", daemon=True)
+        self.interval = interval
+        self.min_rows = min_rows
+        self.on_publish = on_publish
+        self.history_dir = history_dir
+        self._stop_event = threading.Event()
+        self._scraper = None
+
+    def _publish(self, tmp_path: str, snapshot: pd.DataFrame) -> int:
+        os.replace(tmp_path, Config.DATA_PATH)
+        if self.history_dir:
+            # pyarrow is only imported once there is something to store, keeping it off the app's startup path
+            from history_store import HistoryStore
+
+            # Keep every day's snapshot; a re-scrape on the same day replaces that day
+            try:
+                HistoryStore(self.history_dir).append(snapshot, if_exists="replace")
+            except Exception as e:
+                logger.warning("Could not append the snapshot to the history store: %s", e)
+        version = read_data_version() + 1
+        os.makedirs(os.path.dirname(Config.DATA_VERSION_PATH) or '.', exist_ok=True)
+        tmp_version_path = f"{Config.DATA_VERSION_PATH}.tmp"
+        with open(tmp_version_path, 'w') as f:
+            json.dump({"version": version, "path": Config.DATA_PATH, "published_at": time.time()}, f)
+        os.replace(tmp_version_path, Config.DATA_VERSION_PATH)
+        return version
+
+    def refresh_once(self) -> bool:
+        """Scrape, validate and publish one snapshot. Returns True if a new snapshot was published."""
+        # Selenium is only imported by the worker, keeping it off the app's startup path
+        from steam_scraper import SteamScraper
+
+        tmp_path = f"{Config.DATA_PATH}.tmp"
+        try:
+            if self._scraper is None:
+                self._scraper = SteamScraper(output_path=tmp_path)
+            self._scraper.scrape()
+        except Exception as e:
+            logger.warning("Scheduled scrape failed, keeping the last good snapshot: %s", e)
+            return False
+
+        snapshot = read_valid_snapshot(tmp_path, self.min_rows)
+        if snapshot is None:
+            logger.warning("Scraped snapshot failed validation, keeping the last good snapshot")
+            Path(tmp_path).unlink(missing_ok=True)
+            return False
+
+        version = self._publish(tmp_path, snapshot)
+        logger.info("Published snapshot version %d", version)
+        if self.on_publish is not None:
+            try:
+                self.on_publish(Config.DATA_PATH)
+            except Exception as e:
+                logger.warning("Post-publish hook failed: %s", e)
+        return True
+
+    def seconds_until_due(self) -> float:
+        """Seconds until the published snapshot is older than the refresh interval."""
+        try:
+            age = time.time() - os.path.getmtime(Config.DATA_PATH)
+        except FileNotFoundError:
+            return 0.0
+        return max(0.0, self.interval - age)
+
+    def run(self):
+        while not self._stop_event.wait(self.seconds_until_due()):
+            if not self.refresh_once():
+                # Retry failed scrapes sooner than a full interval
+                self._stop_event.wait(min(self.interval, Config.REFRESH_RETRY_INTERVAL))
+
+        if self._scraper is not None:
+            self._scraper.close()
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class MemoryBackend:
+    """In-process LRU store with a per-entry time to live."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Local SQLite store, shared by every process on the host and kept across restarts."""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE expires_at < ? OR key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (now, self.max_entries)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+# A question's embedding, or a function that computes it on demand
+QuestionVector = Union[Sequence[float], Callable[[], Sequence[float]]]
+
+
+class ResponseCache:
+    """Two-tier cache of RAG answers.
+
+    The exact tier is keyed on the normalised question together with the data
+    version, model and temperature the answer was produced with. The optional
+    semantic tier reuses the retrieval embeddings to serve answers for
+    paraphrased questions whose similarity reaches semantic_threshold.
+    Callers that embed the question anyway pass its vector to get and set,
+    or a function returning it that is only called if the semantic tier is
+    consulted, so the cache never embeds it a second time; semantic=False
+    keeps a question to the exact tier.
+    """
+
+    def __init__(
+            self,
+            backend=None,
+            ttl: float = 6 * 60 * 60,
+            embeddings: Optional[Embeddings] = None,
+            semantic_threshold: Optional[float] = None,
+    ):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.embeddings = embeddings
+        self.semantic_threshold = semantic_threshold if embeddings is not None else None
+
+        self._semantic_keys: List[Tuple[Hashable, str]] = []
+        self._semantic_vectors: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Lowercase, collapse whitespace and drop trailing punctuation."""
+        return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+    @classmethod
+    def make_key(cls, question: str, scope: Hashable) -> str:
+        """Build the exact-tier key for a question within a (data version, model, temperature) scope."""
+        payload = json.dumps([cls.normalize(question), scope], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _serialize(response: Dict[str, Any]) -> Dict:
+        return {
+            "result": response["result"],
+            "source_documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in response.get("source_documents", [])
+            ],
+        }
+
+    @staticmethod
+    def _deserialize(value: Dict) -> Dict[str, Any]:
+        return {
+            "result": value["result"],
+            "source_documents": [Document(**doc) for doc in value["source_documents"]],
+        }
+
+    def _embed(self, question: str, vector: Optional[QuestionVector] = None) -> np.ndarray:
+        if vector is None:
+            vector = self.embeddings.embed_query(self.normalize(question))
+        elif callable(vector):
+            vector = vector()
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, question: str, scope: Hashable, vector: Optional[QuestionVector] = None,
+            semantic: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a cached response for the question, or None on a miss."""
+        value = self.backend.get(self.make_key(question, scope))
+        if value is not None:
+            self._count("exact_hits")
+            return self._deserialize(value)
+
+        if semantic and self.semantic_threshold is not None and self._semantic_vectors:
+            with self._lock:
+                candidates = [(i, key) for i, (entry_scope, key) in enumerate(self._semantic_keys)
+                              if entry_scope == scope]
+                matrix = np.stack([self._semantic_vectors[i] for i, _ in candidates]) if candidates else None
+            if matrix is not None:
+                similarities = matrix @ self._embed(question, vector)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.semantic_threshold:
+                    value = self.backend.get(candidates[best][1])
+                    if value is not None:
+                        self._count("semantic_hits")
+                        return self._deserialize(value)
+
+        self._count("misses")
+        return None
+
+    def set(self, question: str, scope: Hashable, response: Dict[str, Any],
+            vector: Optional[QuestionVector] = None, semantic: bool = True) -> None:
+        """Store a response for the question."""
+        key = self.make_key(question, scope)
+        self.backend.set(key, self._serialize(response), self.ttl)
+
+        if semantic and self.semantic_threshold is not None:
+            vector = self._embed(question, vector)
+            with self._lock:
+                if (scope, key) not in self._semantic_keys:
+                    self._semantic_keys.append((scope, key))
+                    self._semantic_vectors.append(vector)
+                # Drop the oldest vectors once the index outgrows the backend
+                max_entries = getattr(self.backend, "max_entries", 1024)
+                del self._semantic_keys[:-max_entries]
+                del self._semantic_vectors[:-max_entries]
+
+    def clear(self) -> None:
+        """Remove every cached response and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self._semantic_keys.clear()
+            self._semantic_vectors.clear()
+            self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
@@ -1,12 +1,26 @@
-from typing import Dict, Any, List
-from langchain_huggingface import HuggingFaceEmbeddings
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+import pandas as pd
 from langchain_community.vectorstores.faiss import FAISS
-from langchain_core.prompts import PromptTemplate
 from langchain_core.documents import Document
-from langchain.chains import RetrievalQA
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
 from llm_client import NvidiaLLM
+from context_builder import ContextBuilder, count_tokens
+from index_cache import IndexCache
+from lexical_index import LexicalIndex
+from metrics import MetricsCallbackHandler, Trace, metrics
+import vector_index
+from query_router import QueryRouter
+from response_cache import ResponseCache
+from time_series import TimeSeriesStore
 from config import Config
 
+logger = logging.getLogger(__name__)
 
 class GamingBuddyPrompt:
 
@@ -26,44 +40,37 @@ class GamingBuddyPrompt:
     Right, let's crack into it:
     """
 
-    @classmethod
-    def get_template_with_examples(cls):
-        """Returns the template with example responses style guide."""
-        return {
-            "template": cls.TEMPLATE,
-            "response_style_guide": """
-            Response Style Examples:
-            - Use playful, offbeat humour with a touch of chaos
-            - Throw in some unexpected but charming metaphors
-            - Keep it breezy: "Right, here’s the deal…"
-            - Sprinkle in dramatic storytelling: "Picture this… you’re in the middle of an epic battle..."
-            - Make use of quirky enthusiasm: "Mate, this is bonkers!"
-            - Keep it casual but sneakily insightful
-            """,
-            "example_response": """
-            Oi, listen to this – this is like discovering a secret boss battle when you thought the game was over!
-
-            Looking at the data, I can tell you that [specific insight]. It’s like uncovering that last piece of the puzzle in a detective RPG – totally satisfying, right?
-
-            But wait – *plot twist!* The numbers ALSO reveal [unexpected finding]. Absolute madness. It’s like thinking you’ve mastered a game, and then BAM! - new DLC drops and turns everything on its head! 😆
-
-            Wild stuff, my friend. Want me to dig deeper? I can ramble on about this all day – like an NPC stuck in a dialogue loop!
-            """
-        }
-
 
 class RetrievalChain:
     """Sets up the Retrieval Augmented Generation (RAG) chain."""
 
-    def __init__(self, documents: List[Document]):
-        # Initialize embeddings with specific model
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-mpnet-base-v2",
-            model_kwargs={'device': 'cpu'}
-        )
+    def __init__(
+            self,
+            documents: List[Document],
+            source_path: Optional[str] = None,
+            cache_dir: Optional[str] = None,
+            embeddings: Optional[Embeddings] = None,
+            llm: Optional[LLM] = None,
+            response_cache: Optional[ResponseCache] = None,
+            data: Optional[pd.DataFrame] = None,
+            forecasts: Optional[Dict[str, pd.DataFrame]] = None,
+            time_series: Optional[TimeSeriesStore] = None,
+    ):
+        # Initialize embeddings with specific model, unless a shared instance is provided
+        self.embeddings = embeddings or Config.create_embeddings()
 
-        # Create vector store
-        self.vectorstore = FAISS.from_documents(documents, self.embeddings)
+        # Create vector store, reusing a cached index for the same data and model
+        # and embedding only rows that are new since the last cached snapshot
+        self.data_version = IndexCache.file_digest(source_path) if source_path else None
+        if source_path and cache_dir:
+            cache = IndexCache(cache_dir)
+            self.embeddings = cache.cached_embeddings(self.embeddings, Config.embedding_id())
+            key = IndexCache.make_key(source_path, Config.embedding_id())
+            self.vectorstore = cache.get_or_build(key, documents, self.embeddings)
+            self.lexical = cache.get_or_build_lexical(key, self.vectorstore) if Config.HYBRID_SEARCH else None
+        else:
+            self.vectorstore = vector_index.fit_index(FAISS.from_documents(documents, self.embeddings))
+            self.lexical = LexicalIndex.from_vectorstore(self.vectorstore) if Config.HYBRID_SEARCH else None
         self.retriever = self.vectorstore.as_retriever(
             search_type="mmr",  # Changed from similarity to MMR
             search_kwargs={
@@ -73,33 +80,586 @@ class RetrievalChain:
             }
         )
 
-        # Enhanced prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["context", "question"],
-            template=GamingBuddyPrompt.TEMPLATE
-        )
+        # Aggregate, ranking and forecast questions are answered from precomputed frames instead of by MMR
+        if data is None:
+            data = pd.DataFrame([doc.metadata for doc in documents])
+        self.router = QueryRouter(data, forecasts)
+        # Questions naming a game get a summary of its history rather than its raw daily rows
+        self.time_series = time_series if time_series is not None else TimeSeriesStore(data)
+        self._route_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "retrieval": 0.0, "total": 0.0})
+        self._route_stats_lock = threading.Lock()
 
-        # Optional: Add style guide to the chain's metadata
-        self.style_guide = GamingBuddyPrompt.get_template_with_examples()
+        # Merges retrieved rows per game into a compact table that fits the prompt token budget
+        self.context_builder = ContextBuilder(GamingBuddyPrompt.TEMPLATE)
 
         # Initialize LLM and chain
-        self.llm = NvidiaLLM(
+        self.llm = llm or NvidiaLLM(
             model_name=Config.MODEL_NAME,
             temperature=Config.COMPLETION_PARAMS["temperature"],
             max_tokens=Config.COMPLETION_PARAMS["max_tokens"]
         )
 
-        self.chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": self.prompt_template}
+        # Bounds the number of in-flight async queries; created lazily on the running loop
+        self._query_slots: Optional[asyncio.Semaphore] = None
+
+        # Answers are only reused for the same data, model and temperature
+        self.response_cache = response_cache
+        self.cache_scope = (
+            self.data_version,
+            getattr(self.llm, "model_name", self.llm._llm_type),
+            getattr(self.llm, "temperature", None)
         )
 
     def query(self, question: str) -> Dict[str, Any]:
-        """Query the RAG chain with error handling."""
+        """Query the RAG chain with error handling, serving repeated questions from the cache."""
+        start = time.perf_counter()
+        trace = metrics.trace()
+        cached, lookup = self._cache_lookup(question, trace)
+        if cached is not None:
+            metrics.inc("queries_total", route="cache")
+            return {"query": question, **cached}
+
+        try:
+            retrieved = self.retrieve(question, lookup["plan"], trace, lookup["embed"])
+            retrieval = time.perf_counter() - start
+            answer = retrieved["answer"]
+            assembly = None
+            if answer is None or Config.ROUTER_LLM_ANSWERS:
+                assembly = self.assemble(question, retrieved, trace)
+                answer = self.llm.invoke(assembly["prompt"], self._callbacks(trace),
+                                         max_tokens=assembly["max_tokens"]).strip()
+        except Exception as e:
+            metrics.inc("errors_total", stage="query")
+            raise RuntimeError(f"Error during RAG chain query: {str(e)}")
+        return self._finish_query(question, retrieved, assembly, answer, retrieval,
+                                  time.perf_counter() - start, trace, lookup)
+
+    def semantic_cache_applies(self, question: str, plan: Dict[str, Any]) -> bool:
+        """Whether the semantic cache tier may answer the question.
+
+        Structured and named questions stay in the exact tier: they are
+        answered without an embedding, and their answers hinge on numbers
+        and game names that a close paraphrase can change.
+        """
+        if plan["route"] == QueryRouter.STRUCTURED:
+            return False
+        return not (self.lexical is not None and self.lexical.match_names(question))
+
+    def _question_vector(self, question: str, trace: Trace) -> Callable[[], List[float]]:
+        """Embed the question on first use only, for the semantic cache tier and retrieval to share."""
+        vector: List[List[float]] = []
+
+        def embed() -> List[float]:
+            if not vector:
+                with trace.stage("embed_question"):
+                    vector.append(self.embeddings.embed_query(question))
+            return vector[0]
+
+        return embed
+
+    def _batch_embedder(self, questions: List[str], traces: List[Trace],
+                        indices: List[int]) -> List[Callable[[], List[float]]]:
+        """_question_vector for many questions, embedding questions[i] for every i in indices in one call.
+
+        The call happens the first time any of their vectors is needed;
+        questions outside indices are embedded on their own if ever needed.
+        """
+        vectors: Dict[int, List[float]] = {}
+
+        def embed_all() -> None:
+            # Skip the embedding cache's document store: questions are not worth persisting next to the rows
+            embeddings = getattr(self.embeddings, "underlying_embeddings", self.embeddings)
+            start = time.perf_counter()
+            vectors.update(zip(indices, embeddings.embed_documents([questions[i] for i in indices])))
+            for i in indices:
+                traces[i].record("embed_question", (time.perf_counter() - start) / len(indices))
+
+        def vector(i: int) -> Callable[[], List[float]]:
+            def embed() -> List[float]:
+                if not vectors:
+                    embed_all()
+                return vectors[i]
+            return embed
+
+        wanted = set(indices)
+        return [vector(i) if i in wanted else self._question_vector(question, trace)
+                for i, (question, trace) in enumerate(zip(questions, traces))]
+
+    def _plan(self, question: str, trace: Trace) -> Dict[str, Any]:
+        """Route a question and decide how the response cache treats it.
+
+        Returns what the cache lookup, retrieve and the cache store share:
+        the plan, whether the semantic tier applies and the question's
+        lazily computed embedding, so it is embedded at most once.
+        """
+        with trace.stage("route"):
+            plan = self.router.parse(question)
+        return {"plan": plan, "semantic": self.semantic_cache_applies(question, plan),
+                "embed": self._question_vector(question, trace)}
+
+    def _cache_get(self, question: str, lookup: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(question, self.cache_scope, vector=lookup["embed"],
+                                       semantic=lookup["semantic"])
+
+    def _cache_lookup(self, question: str, trace: Trace) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Route a question and look it up in the response cache; returns the cached answer or None, and _plan's result."""
+        lookup = self._plan(question, trace)
+        return self._cache_get(question, lookup), lookup
+
+    def _cache_store(self, question: str, result: Dict[str, Any], lookup: Dict[str, Any]) -> None:
+        if self.response_cache is not None:
+            self.response_cache.set(question, self.cache_scope, result, vector=lookup["embed"],
+                                    semantic=lookup["semantic"])
+
+    def _finish_query(self, question: str, retrieved: Dict[str, Any], assembly: Optional[Dict[str, Any]],
+                      answer: str, retrieval: float, total: float, trace: Trace,
+                      lookup: Dict[str, Any]) -> Dict[str, Any]:
+        """Record and cache a completed answer and return it in the shape of query's result."""
+        self._record_route(retrieved["route"], retrieval, total)
+        usage = self._log_usage(retrieved["route"], assembly, answer)
+        timings = self._record_trace(retrieved["route"], trace, total, usage)
+        result = {"query": question, "result": answer, "source_documents": retrieved["documents"],
+                  "route": retrieved["route"], "timings": {"retrieval": retrieval, **timings}}
+
+        self._cache_store(question, result, lookup)
+        return result
+
+    def retrieve(self, question: str, plan: Optional[Dict[str, Any]] = None,
+                 trace: Optional[Trace] = None, embed: Optional[Callable[[], List[float]]] = None) -> Dict[str, Any]:
+        """Fetch the context for a question along the route the router picks.
+
+        Returns {"route", "documents", "answer"}, where answer is the exact
+        pandas answer for structured questions and None otherwise. Stage
+        durations are recorded in trace. embed returns the question's
+        embedding when the caller already has, or will reuse, it.
+        """
+        trace = trace or metrics.trace()
+        embed = embed or self._question_vector(question, trace)
+        if plan is None:
+            with trace.stage("route"):
+                plan = self.router.parse(question)
+        if plan["route"] == QueryRouter.STRUCTURED:
+            with trace.stage("structured_answer"):
+                return {"route": plan["route"], "intent": plan["intent"], **self.router.answer(plan)}
+        with trace.stage("name_match"):
+            documents = self.named_documents(question)
+        if documents:
+            return {"route": QueryRouter.NAMED, "intent": QueryRouter.NAMED, "documents": documents, "answer": None}
+        if plan["route"] == QueryRouter.FILTERED:
+            with trace.stage("filtered_search"):
+                documents = self.router.filtered_search(
+                    self.vectorstore, self.embeddings, question, plan["filters"], embedding=embed(),
+                    **self.retriever.search_kwargs
+                )
+            if documents:
+                return {"route": plan["route"], "intent": plan["route"], "documents": documents, "answer": None}
+
+        # The retriever's MMR search, split so embedding and FAISS search are timed separately
+        embedding = embed()
+        with trace.stage("vector_search"):
+            documents = self.vectorstore.max_marginal_relevance_search_by_vector(
+                embedding, **self.retriever.search_kwargs
+            )
+        with trace.stage("lexical_search"):
+            documents = self.fuse(question, documents)
+        return {"route": QueryRouter.SEMANTIC, "intent": QueryRouter.SEMANTIC, "documents": documents, "answer": None}
+
+    def named_documents(self, question: str) -> List[Document]:
+        """Context for each game the question names, found without an embedding call; [] if none.
+
+        A game is summarised from the time-series store over the period the
+        question asks about (see TimeSeriesStore.period); games without
+        history there fall back to their latest indexed rows.
+        """
+        if self.lexical is None:
+            return []
+        matches = self.lexical.name_matches(question)
+        if not matches:
+            return []
+        start, end = self.time_series.period(question)
+        per_game = max(1, self.retriever.search_kwargs["k"] // len(matches))
+        documents = []
+        for doc_ids in matches:
+            rows = [self.vectorstore.docstore.search(doc_id) for doc_id in doc_ids]
+            rows.sort(key=lambda doc: str(doc.metadata.get("date", "")), reverse=True)
+            summary = self.time_series.to_documents([rows[0].metadata.get("name")], start, end)
+            documents.extend(summary or rows[:per_game])
+        return documents
+
+    def fuse(self, question: str, documents: List[Document]) -> List[Document]:
+        """Merge MMR results with the question's BM25 hits by reciprocal rank fusion, keeping k documents."""
+        if self.lexical is None:
+            return documents
+        hits = self.lexical.search(question, self.retriever.search_kwargs["fetch_k"])
+        if not hits:
+            return documents
+        ranked = [documents, [self.vectorstore.docstore.search(doc_id) for doc_id, _ in hits]]
+        scores: Dict[str, float] = defaultdict(float)
+        by_content: Dict[str, Document] = {}
+        for ranking in ranked:
+            for rank, document in enumerate(ranking, 1):
+                scores[document.page_content] += 1 / (Config.HYBRID_RRF_K + rank)
+                by_content.setdefault(document.page_content, document)
+        best = sorted(scores, key=scores.get, reverse=True)[:self.retriever.search_kwargs["k"]]
+        return [by_content[content] for content in best]
+
+    def retrieve_many(self, questions: List[str], traces: Optional[List[Trace]] = None,
+                      plans: Optional[List[Dict[str, Any]]] = None,
+                      embeds: Optional[List[Callable[[], List[float]]]] = None) -> List[Dict[str, Any]]:
+        """retrieve for many questions, with one embedding call and one FAISS search for all of them.
+
+        Structured questions are answered from the router's frames and
+        questions naming a game from its rows, as in retrieve. The others are
+        embedded together; filtered ones keep their pre-filtered search and
+        the rest share one batched MMR search. Each trace gets its
+        question's share of the batched stages. Callers that already routed
+        the questions, or share their embeddings with the response cache,
+        pass plans and embeds (see _batch_embedder).
+        """
+        traces = traces or [metrics.trace() for _ in questions]
+        if plans is None:
+            plans = []
+            for question, trace in zip(questions, traces):
+                with trace.stage("route"):
+                    plans.append(self.router.parse(question))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        pending = []
+        for i, plan in enumerate(plans):
+            if plan["route"] == QueryRouter.STRUCTURED:
+                results[i] = self.retrieve(questions[i], plan, traces[i])
+                continue
+            with traces[i].stage("name_match"):
+                documents = self.named_documents(questions[i])
+            if documents:
+                results[i] = {"route": QueryRouter.NAMED, "intent": QueryRouter.NAMED,
+                              "documents": documents, "answer": None}
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+
+        embeds = embeds or self._batch_embedder(questions, traces, pending)
+        vectors = [embeds[i]() for i in pending]
+
+        semantic = []
+        for i, vector in zip(pending, vectors):
+            if plans[i]["route"] == QueryRouter.FILTERED:
+                with traces[i].stage("filtered_search"):
+                    documents = self.router.filtered_search(
+                        self.vectorstore, self.embeddings, questions[i], plans[i]["filters"],
+                        embedding=vector, **self.retriever.search_kwargs
+                    )
+                if documents:
+                    results[i] = {"route": QueryRouter.FILTERED, "intent": QueryRouter.FILTERED,
+                                  "documents": documents, "answer": None}
+                    continue
+            semantic.append((i, vector))
+
+        if semantic:
+            start = time.perf_counter()
+            found = vector_index.mmr_search_batch(self.vectorstore, [vector for _, vector in semantic],
+                                                  **self.retriever.search_kwargs)
+            for i, _ in semantic:
+                traces[i].record("vector_search", (time.perf_counter() - start) / len(semantic))
+            for (i, _), documents in zip(semantic, found):
+                with traces[i].stage("lexical_search"):
+                    documents = self.fuse(questions[i], documents)
+                results[i] = {"route": QueryRouter.SEMANTIC, "intent": QueryRouter.SEMANTIC,
+                              "documents": documents, "answer": None}
+        return results
+
+    async def aretrieve(self, question: str, trace: Optional[Trace] = None,
+                        lookup: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Asynchronous variant of retrieve; lookup is what _cache_lookup returned for the question."""
+        trace = trace or metrics.trace()
+        if lookup is None:
+            with trace.stage("route"):
+                plan = self.router.parse(question)
+            embed = None
+        else:
+            plan, embed = lookup["plan"], lookup["embed"]
+        if plan["route"] == QueryRouter.STRUCTURED:
+            return self.retrieve(question, plan, trace)
+        # Embedding the question and searching FAISS are CPU-bound, so keep them off the event loop
+        return await asyncio.to_thread(self.retrieve, question, plan, trace, embed)
+
+    def _record_route(self, route: str, retrieval: float, total: float) -> None:
+        with self._route_stats_lock:
+            stats = self._route_stats[route]
+            stats["count"] += 1
+            stats["retrieval"] += retrieval
+            stats["total"] += total
+
+    def route_stats(self) -> Dict[str, Dict[str, float]]:
+        """Number of queries and mean retrieval and total latency in seconds, per route."""
+        with self._route_stats_lock:
+            return {
+                route: {"count": s["count"], "mean_retrieval": s["retrieval"] / s["count"],
+                        "mean_total": s["total"] / s["count"]}
+                for route, s in self._route_stats.items()
+            }
+
+    def build_prompt(self, question: str, documents: List[Document]) -> str:
+        """Fill the prompt template with the compacted, budgeted context."""
+        return self.context_builder.build(question, documents)["prompt"]
+
+    def assemble(self, question: str, retrieved: Dict[str, Any], trace: Optional[Trace] = None) -> Dict[str, Any]:
+        """Build the prompt for retrieved context and pick max_tokens for the question type."""
+        with (trace or metrics.trace()).stage("assemble"):
+            assembly = self.context_builder.build(question, retrieved["documents"])
+        assembly["max_tokens"] = self.context_builder.max_tokens(retrieved.get("intent"))
+        return assembly
+
+    @staticmethod
+    def _callbacks(trace: Trace) -> Dict[str, Any]:
+        """Runnable config that records the LLM call's stages in trace."""
+        return {"callbacks": [MetricsCallbackHandler(trace)]}
+
+    @staticmethod
+    def _record_trace(route: str, trace: Trace, total: float, usage: Dict[str, int]) -> Dict[str, Any]:
+        """Count a finished query and return its per-stage timings, logging them if configured."""
+        trace.record("total", total)
+        metrics.inc("queries_total", route=route)
+        metrics.inc("tokens_total", usage["prompt_tokens"], kind="prompt")
+        metrics.inc("tokens_total", usage["completion_tokens"], kind="completion")
+        timings = {"route": route, "total": total, "stages": dict(trace.stages), **usage}
+        if Config.METRICS_LOG_PATH:
+            metrics.log(Config.METRICS_LOG_PATH, timings)
+        return timings
+
+    @staticmethod
+    def _log_usage(route: str, assembly: Optional[Dict[str, Any]], answer: str) -> Dict[str, int]:
+        """Log and return the prompt and completion token counts of one answer."""
+        usage = {
+            "prompt_tokens": assembly["prompt_tokens"] if assembly else 0,
+            "completion_tokens": count_tokens(answer),
+            "max_tokens": assembly["max_tokens"] if assembly else 0,
+        }
+        if assembly:
+            logger.info("%s prompt: %d tokens from %d documents (%d context lines, %d dropped for the budget); "
+                        "completion: %d tokens of max %d", route, usage["prompt_tokens"], assembly["documents"],
+                        assembly["context_lines"], assembly["dropped_lines"], usage["completion_tokens"],
+                        usage["max_tokens"])
+        return usage
+
+    @staticmethod
+    def _cached_events(cached: Dict[str, Any], start: float) -> List[Dict[str, Any]]:
+        """Return the stream events that replay a cached answer."""
+        metrics.inc("queries_total", route="cache")
+        elapsed = time.perf_counter() - start
+        return [
+            {"source_documents": cached["source_documents"]},
+            {"token": cached["result"]},
+            {"timings": {"route": "cache", "retrieval": 0.0, "time_to_first_token": elapsed, "total": elapsed}}
+        ]
+
+    def _finish_stream(self, question: str, route: str, assembly: Optional[Dict[str, Any]],
+                       documents: List[Document], tokens: List[str], start: float, retrieval: float,
+                       first_token: Optional[float], trace: Trace, lookup: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a completed streamed answer and return its timings event."""
+        total = time.perf_counter() - start
+        usage = self._log_usage(route, assembly, "".join(tokens))
+        timings = {
+            "retrieval": retrieval,
+            "time_to_first_token": first_token if first_token is not None else total,
+            **self._record_trace(route, trace, total, usage)
+        }
+        self._record_route(route, retrieval, total)
+        logger.info("Streamed %s answer: retrieval %.2fs, first token %.2fs, total %.2fs",
+                    route, timings["retrieval"], timings["time_to_first_token"], timings["total"])
+
+        self._cache_store(question, {"result": "".join(tokens).strip(), "source_documents": documents}, lookup)
+        return {"timings": timings}
+
+    def query_stream(self, question: str) -> Iterator[Dict[str, Any]]:
+        """Stream a RAG answer.
+
+        Yields {"source_documents": [...]} once retrieval finishes, then one
+        {"token": str} per generated chunk, and finally {"timings": {...}} with
+        retrieval time, time to first token and total latency in seconds.
+        """
+        start = time.perf_counter()
+        trace = metrics.trace()
+        cached, lookup = self._cache_lookup(question, trace)
+        if cached is not None:
+            yield from self._cached_events(cached, start)
+            return
+
+        tokens = []
+        first_token = None
         try:
-            return self.chain.invoke({"query": question})  # Changed from question to query
+            retrieved = self.retrieve(question, lookup["plan"], trace, lookup["embed"])
+            documents = retrieved["documents"]
+            retrieval = time.perf_counter() - start
+            yield {"source_documents": documents}
+
+            assembly = None
+            if retrieved["answer"] is not None and not Config.ROUTER_LLM_ANSWERS:
+                stream = iter([retrieved["answer"]])
+            else:
+                assembly = self.assemble(question, retrieved, trace)
+                stream = self.llm.stream(assembly["prompt"], self._callbacks(trace), max_tokens=assembly["max_tokens"])
+            for token in stream:
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                tokens.append(token)
+                yield {"token": token}
         except Exception as e:
-            raise RuntimeError(f"Error during RAG chain query: {str(e)}")
\ No newline at end of file
+            metrics.inc("errors_total", stage="query")
+            raise RuntimeError(f"Error during RAG chain query: {str(e)}")
+
+        yield self._finish_stream(question, retrieved["route"], assembly, documents, tokens, start, retrieval,
+                                  first_token, trace, lookup)
+
+    async def aquery_stream(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronous variant of query_stream, bounded by Config.MAX_CONCURRENT_QUERIES."""
+        start = time.perf_counter()
+        trace = metrics.trace()
+        # The cache backend may be SQLite or Redis and the semantic tier may embed, so keep them off the event loop
+        cached, lookup = await asyncio.to_thread(self._cache_lookup, question, trace)
+        if cached is not None:
+            for event in self._cached_events(cached, start):
+                yield event
+            return
+
+        if self._query_slots is None:
+            self._query_slots = asyncio.Semaphore(Config.MAX_CONCURRENT_QUERIES)
+
+        tokens = []
+        first_token = None
+        async with self._query_slots:
+            try:
+                retrieved = await self.aretrieve(question, trace, lookup)
+                documents = retrieved["documents"]
+                retrieval = time.perf_counter() - start
+                yield {"source_documents": documents}
+
+                assembly = None
+                if retrieved["answer"] is not None and not Config.ROUTER_LLM_ANSWERS:
+                    first_token = time.perf_counter() - start
+                    tokens.append(retrieved["answer"])
+                    yield {"token": retrieved["answer"]}
+                else:
+                    assembly = self.assemble(question, retrieved, trace)
+                    async for token in self.llm.astream(assembly["prompt"], self._callbacks(trace),
+                                                        max_tokens=assembly["max_tokens"]):
+                        if not token:
+                            continue
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        tokens.append(token)
+                        yield {"token": token}
+            except Exception as e:
+                metrics.inc("errors_total", stage="query")
+                raise RuntimeError(f"Error during RAG chain query: {str(e)}")
+
+        yield await asyncio.to_thread(self._finish_stream, question, retrieved["route"], assembly, documents,
+                                      tokens, start, retrieval, first_token, trace, lookup)
+
+    async def aquery(self, question: str) -> Dict[str, Any]:
+        """Asynchronously query the RAG chain, returning the same shape as query."""
+        result = {"query": question, "result": "", "source_documents": []}
+        tokens = []
+        async for event in self.aquery_stream(question):
+            if "token" in event:
+                tokens.append(event["token"])
+            elif "source_documents" in event:
+                result["source_documents"] = event["source_documents"]
+            elif "timings" in event:
+                result["timings"] = event["timings"]
+        result["result"] = "".join(tokens).strip()
+        return result
+
+    async def _answer_with_retries(self, question: str, retrieved: Dict[str, Any], retrieval: float,
+                                   trace: Trace, lookup: Dict[str, Any], slots: asyncio.Semaphore,
+                                   retries: int) -> Dict[str, Any]:
+        """Generate the answer for one retrieved question, retrying failed LLM calls with backoff."""
+        start = time.perf_counter()
+        answer = retrieved["answer"]
+        assembly = None
+        if answer is None or Config.ROUTER_LLM_ANSWERS:
+            assembly = self.assemble(question, retrieved, trace)
+            async with slots:
+                for attempt in range(retries + 1):
+                    try:
+                        answer = await self.llm.ainvoke(assembly["prompt"], self._callbacks(trace),
+                                                        max_tokens=assembly["max_tokens"])
+                        break
+                    except Exception as e:
+                        if attempt == retries:
+                            raise
+                        delay = Config.BATCH_RETRY_BACKOFF * 2 ** attempt
+                        metrics.inc("retries_total", stage="llm")
+                        logger.warning("LLM call failed (%s), retry %d of %d in %.1fs", e, attempt + 1, retries, delay)
+                        await asyncio.sleep(delay)
+            answer = answer.strip()
+        # Stores the answer in the response cache, so keep it off the event loop
+        return await asyncio.to_thread(self._finish_query, question, retrieved, assembly, answer, retrieval,
+                                       retrieval + time.perf_counter() - start, trace, lookup)
+
+    async def abatch_query(self, questions: List[str], concurrency: int = Config.BATCH_CONCURRENCY,
+                           retries: int = Config.BATCH_MAX_RETRIES) -> AsyncIterator[Dict[str, Any]]:
+        """Answer many questions, yielding each result in query's shape as soon as it completes.
+
+        Cached answers are yielded first. The remaining questions are
+        retrieved together with retrieve_many, then at most `concurrency`
+        LLM calls run at a time, each retried up to `retries` times. A
+        question that still fails yields {"query", "error"} instead of
+        stopping the batch. Questions the semantic cache tier may answer are
+        embedded in one call, shared by the cache lookup, retrieval and the
+        cache store.
+        """
+        traces = [metrics.trace() for _ in questions]
+        lookups = [self._plan(question, trace) for question, trace in zip(questions, traces)]
+        embeds = self._batch_embedder(questions, traces, [i for i, lookup in enumerate(lookups) if lookup["semantic"]])
+        for lookup, embed in zip(lookups, embeds):
+            lookup["embed"] = embed
+
+        # The cache backend may be SQLite or Redis and the semantic tier may embed, so keep them off the event loop
+        cached_answers = await asyncio.to_thread(
+            lambda: [self._cache_get(question, lookup) for question, lookup in zip(questions, lookups)]
+        )
+        pending = []
+        for i, (question, cached) in enumerate(zip(questions, cached_answers)):
+            if cached is not None:
+                metrics.inc("queries_total", route="cache")
+                yield {"query": question, **cached}
+            else:
+                pending.append(i)
+        if not pending:
+            return
+
+        start = time.perf_counter()
+        try:
+            # Embedding and FAISS search are CPU-bound, so keep them off the event loop
+            retrieved = await asyncio.to_thread(
+                self.retrieve_many, [questions[i] for i in pending], [traces[i] for i in pending],
+                [lookups[i]["plan"] for i in pending], [lookups[i]["embed"] for i in pending]
+            )
+        except Exception as e:
+            metrics.inc("errors_total", len(pending), stage="query")
+            raise RuntimeError(f"Error during RAG chain batch retrieval: {str(e)}")
+        retrieval = (time.perf_counter() - start) / len(pending)
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def answer(i: int, result: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return await self._answer_with_retries(questions[i], result, retrieval, traces[i], lookups[i],
+                                                       slots, retries)
+            except Exception as e:
+                metrics.inc("errors_total", stage="query")
+                return {"query": questions[i], "error": f"Error during RAG chain query: {str(e)}"}
+
+        tasks = [asyncio.ensure_future(answer(i, result)) for i, result in zip(pending, retrieved)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
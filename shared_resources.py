@@ -0,0 +1,251 @@
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple
+import streamlit as st
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Heavy modules (langchain, FAISS, torch, openai, Redis clients) are imported by the
+# builders below on first use, so importing this module keeps the app's cold start fast
+if TYPE_CHECKING:
+    import pandas as pd
+    from langchain_core.embeddings import Embeddings
+    from llm_client import NvidiaLLM
+    from rate_limiter import RateLimiter
+    from response_cache import ResponseCache
+    from refresh_worker import RefreshWorker
+    from retrieval_chain import RetrievalChain
+    from time_series import TimeSeriesStore
+
+
+class ResourceRegistry:
+    """Process-wide registry of expensive resources shared read-only by all sessions.
+
+    Each resource is stored under a name together with the version it was
+    built for. A lookup with the same version returns the shared instance;
+    a new version rebuilds it once. While a rebuild is in progress other
+    callers keep getting the previous instance, or wait for the build if
+    there is none yet, instead of starting their own.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, Tuple[Hashable, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str, version: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the resource for name, building it with factory if the version changed."""
+        entry = self._resources.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        # One lock per name, so building the RAG chain can itself fetch the shared embeddings
+        lock = self._lock_for(name)
+        if not lock.acquire(blocking=entry is None):
+            # Another thread is building the new version; hot-swap once it is ready
+            return entry[1]
+        try:
+            entry = self._resources.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            resource = factory()
+            self._resources[name] = (version, resource)
+            return resource
+        finally:
+            lock.release()
+
+    def warm(self, name: str, version: Hashable, factory: Callable[[], Any]) -> bool:
+        """Build the resource for version in a background thread unless it is built or being built.
+
+        Returns True if the resource for version is ready.
+        """
+        entry = self._resources.get(name)
+        if entry is not None and entry[0] == version:
+            return True
+        if not self._lock_for(name).locked():
+            threading.Thread(target=self.get, args=(name, version, factory), name=f"warm-{name}", daemon=True).start()
+        return False
+
+    def clear(self) -> None:
+        """Drop all shared resources."""
+        self._resources.clear()
+
+
+registry = ResourceRegistry()
+
+
+def data_version(data_path: str) -> Tuple[str, int, int]:
+    """Return a cheap version stamp for a data file that changes whenever it is rewritten."""
+    stat = os.stat(data_path)
+    return os.path.abspath(data_path), stat.st_mtime_ns, stat.st_size
+
+
+def get_embeddings() -> "Embeddings":
+    """Return the process-wide embedding model."""
+    return registry.get("embeddings", Config.embedding_id(), Config.create_embeddings)
+
+
+def get_llm() -> "NvidiaLLM":
+    """Return the process-wide Nvidia LLM client."""
+    from llm_client import NvidiaLLM
+
+    return registry.get("llm", Config.MODEL_NAME, lambda: NvidiaLLM(
+        model_name=Config.MODEL_NAME,
+        temperature=Config.COMPLETION_PARAMS["temperature"],
+        max_tokens=Config.COMPLETION_PARAMS["max_tokens"]
+    ))
+
+
+def get_response_cache() -> "ResponseCache":
+    """Return the process-wide LLM response cache."""
+    def build():
+        from response_cache import MemoryBackend, ResponseCache, SQLiteBackend
+
+        if Config.RESPONSE_CACHE_BACKEND == "sqlite":
+            os.makedirs(os.path.dirname(Config.RESPONSE_CACHE_PATH), exist_ok=True)
+            backend = SQLiteBackend(Config.RESPONSE_CACHE_PATH, Config.RESPONSE_CACHE_MAX_ENTRIES)
+        else:
+            backend = MemoryBackend(Config.RESPONSE_CACHE_MAX_ENTRIES)
+        return ResponseCache(
+            backend,
+            ttl=Config.RESPONSE_CACHE_TTL,
+            embeddings=get_embeddings(),
+            semantic_threshold=Config.RESPONSE_CACHE_SEMANTIC_THRESHOLD
+        )
+
+    return registry.get("response_cache", Config.RESPONSE_CACHE_BACKEND, build)
+
+
+def get_rate_limiter() -> "RateLimiter":
+    """Return the process-wide rate limiter for the configured backend."""
+    def build():
+        from rate_limiter import InMemoryBackend, RateLimiter, RedisBackend, UpstashBackend
+
+        if Config.RATE_LIMIT_BACKEND == "upstash":
+            backend = UpstashBackend(st.secrets["UPSTASH_REDIS_URL"], st.secrets["UPSTASH_REDIS_TOKEN"])
+        elif Config.RATE_LIMIT_BACKEND == "redis":
+            backend = RedisBackend(Config.REDIS_URL)
+        else:
+            backend = InMemoryBackend()
+        return RateLimiter(
+            backend=backend,
+            max_requests=Config.RATE_LIMIT_MAX_REQUESTS,
+            window_seconds=Config.RATE_LIMIT_WINDOW
+        )
+
+    return registry.get("rate_limiter", Config.RATE_LIMIT_BACKEND, build)
+
+
+def history_version(root: str) -> Tuple[Tuple[str, ...], int]:
+    """Return a version stamp for the history store that changes when a day is added or replaced."""
+    from history_store import HistoryStore
+
+    dates = HistoryStore(root).dates()
+    latest = os.path.join(root, f"date={dates[-1].isoformat()}") if dates else None
+    return tuple(d.isoformat() for d in dates), os.stat(latest).st_mtime_ns if latest else 0
+
+
+def get_forecasts() -> Optional[Dict[str, "pd.DataFrame"]]:
+    """Return the process-wide forecasts, recomputed when the snapshot history changes."""
+    from forecasting import forecast_history
+
+    return registry.get("forecasts", history_version(Config.HISTORY_DIR),
+                        lambda: forecast_history(Config.HISTORY_DIR))
+
+
+def get_time_series() -> Optional["TimeSeriesStore"]:
+    """Return the process-wide per-game time-series store, rebuilt when the snapshot history changes."""
+    from time_series import load_time_series
+
+    return registry.get("time_series", history_version(Config.HISTORY_DIR),
+                        lambda: load_time_series(Config.HISTORY_DIR))
+
+
+def _rag_chain_factory(data_path: str) -> Callable[[], "RetrievalChain"]:
+    def build():
+        from data_loader import DataLoader
+        from retrieval_chain import RetrievalChain
+
+        data = DataLoader.load_data(data_path)
+        documents = DataLoader.create_documents(data)
+        chain = RetrievalChain(
+            documents,
+            data=data,
+            forecasts=get_forecasts(),
+            time_series=get_time_series(),
+            source_path=data_path,
+            cache_dir=Config.INDEX_CACHE_DIR,
+            embeddings=get_embeddings(),
+            llm=get_llm(),
+            response_cache=get_response_cache()
+        )
+        if Config.AGGREGATES_PREWARM:
+            prewarm_responses(chain, get_aggregates(data_path)["suggested_questions"])
+        return chain
+
+    return build
+
+
+def get_aggregates(data_path: str) -> Dict[str, Any]:
+    """Return the dashboard aggregates and suggested questions for data_path, computed once per snapshot."""
+    from aggregates import load_or_compute_aggregates
+
+    return registry.get("aggregates", data_version(data_path), lambda: load_or_compute_aggregates(data_path))
+
+
+def prewarm_responses(rag_chain: "RetrievalChain", questions: List[str]) -> threading.Thread:
+    """Answer questions into the response cache in a background thread, skipping those already cached."""
+    from async_runtime import runtime
+
+    async def answer_all():
+        async for result in rag_chain.abatch_query(questions):
+            if "error" in result:
+                logger.warning("Could not prewarm %r: %s", result["query"], result["error"])
+
+    thread = threading.Thread(target=lambda: runtime.run(answer_all()), name="prewarm-responses", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_rag_chain(data_path: str) -> "RetrievalChain":
+    """Return the process-wide RAG chain for data_path, rebuilding it when the data changes."""
+    return registry.get("rag_chain", data_version(data_path), _rag_chain_factory(data_path))
+
+
+def warm_rag_chain(data_path: str) -> bool:
+    """Start building the RAG chain for data_path in the background; True once it is ready."""
+    return registry.warm("rag_chain", data_version(data_path), _rag_chain_factory(data_path))
+
+
+def start_metrics_server():
+    """Serve the process-wide metrics in the Prometheus text format on Config.METRICS_PORT, once."""
+    from metrics import metrics
+
+    return registry.get("metrics_server", Config.METRICS_PORT, lambda: metrics.serve(Config.METRICS_PORT))
+
+
+def start_refresh_worker() -> "RefreshWorker":
+    """Start the process-wide background refresh worker once.
+
+    Each published snapshot gets its aggregates computed and warms the RAG
+    chain for the new data, so sessions keep answering from the previous
+    chain until the new one is ready.
+    """
+    def on_publish(data_path: str):
+        get_aggregates(data_path)
+        get_rag_chain(data_path)
+
+    def build():
+        from refresh_worker import RefreshWorker
+
+        worker = RefreshWorker(on_publish=on_publish)
+        worker.start()
+        return worker
+
+    return registry.get("refresh_worker", Config.REFRESH_INTERVAL, build)
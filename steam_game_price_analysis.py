@@ -1,39 +1,14 @@
 from datetime import datetime
 import pandas as pd
-
-df = pd.read_csv('2024-11-02_Steam_top100_most_played_games_raw.csv')
-
-def clean_price(price):
-    if not isinstance(price, str):
-        return 0.0
-    if 'Free To Play' in price or 'Coming Soon' in price:
-        return 0.0
-    try:
-
-        price = price.split('\n')[-1].replace('€', '').replace(',', '.')
-        return float(price)
-    except:
-        return 0.0
-
-
-df['price'] = df['price'].apply(clean_price)
-
-
-df['current_players'] = pd.to_numeric(df['current_players'].str.replace(',', ''), errors='coerce')
-df['peak_players_today'] = pd.to_numeric(df['peak_players_today'].str.replace(',', ''), errors='coerce')
-
-
-df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
-
-
-print(df.head())
-
-paid_games = df[df['price'] > 0]
+from data_cleaning import clean_csv
 
 current_date = datetime.now().strftime('%Y-%m-%d')
+clean_path = f'{current_date}_Steam_top100_most_played_games_clean.csv'
 
-paid_games.to_csv(f'{current_date}_Steam_top100_most_played_games_clean.csv', index=False)
+# Streams the raw file in chunks, so backlogs of any size are cleaned in bounded memory
+stats = clean_csv('2024-11-02_Steam_top100_most_played_games_raw.csv', clean_path,
+                  keep=lambda chunk: chunk['price'] > 0)
 
-print(f"Found {len(paid_games)} paid games out of {len(df)} total games")
+print(f"Found {stats['rows_out']} paid games out of {stats['rows_in']} total games")
 
-print(paid_games.head())
\ No newline at end of file
+print(pd.read_csv(clean_path, nrows=5))
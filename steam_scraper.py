@@ -1,53 +1,159 @@
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Dict, List, Optional
 import pandas as pd
-import numpy as np
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from data_cleaning import clean_frame
+from metrics import metrics
+
+
+class BrowserPool:
+    """Pool of long-lived headless Chrome drivers reused across scrapes."""
+
+    def __init__(self, size: int = 1, options: Optional[Options] = None):
+        self.size = size
+        self.options = options or self.default_options()
+        self._idle: List[webdriver.Chrome] = []
+        self._created = 0
+        # Signalled whenever a driver is returned or a slot is freed, so waiting borrowers wake up
+        self._available = threading.Condition()
+
+    @staticmethod
+    def default_options() -> Options:
+        options = Options()
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        return options
+
+    def _acquire(self):
+        """Take an idle driver, start one if the pool is not yet full, or wait for either."""
+        with self._available:
+            while not self._idle and self._created >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return webdriver.Chrome(options=self.options)
+        except Exception:
+            self._free_slot()
+            raise
+
+    def _free_slot(self):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        finally:
+            self._free_slot()
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver, starting one if the pool is not yet full."""
+        driver = self._acquire()
+        healthy = True
+        try:
+            yield driver
+        except TimeoutException:
+            raise
+        except WebDriverException:
+            # A crashed browser is discarded; its slot goes to the next borrower, who starts a fresh one
+            healthy = False
+            raise
+        finally:
+            if healthy:
+                with self._available:
+                    self._idle.append(driver)
+                    self._available.notify()
+            else:
+                self._discard(driver)
+
+    def close(self):
+        """Quit every idle driver."""
+        with self._available:
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            self._discard(driver)
+
 
 class SteamScraper:
-    def __init__(self, output_path='games_fresh.csv'):
-        self.output_path = output_path
-        self.url = 'https://store.steampowered.com/charts/mostplayed'
-        self.options = Options()
-        self.options.add_argument('--headless=new')
+    URL = 'https://store.steampowered.com/charts/mostplayed'
+    ROW_CLASS = '_2-RN6nWOY56sNmcDHu069P'
+    COLUMN_CLASSES = {
+        'name': '_1n_4-zvf0n4aqGEksbgW9N',
+        'price': '_3j4dI1yA7cRfCvK8h406OB',
+        'current_players': '_3L0CDDIUaOKTGfqdpqmjcy',
+        'peak_players_today': 'yJB7DYKsuTG2AYhJdWTIk',
+    }
 
-        self.column_names = ['name', 'price', 'current_players', 'peak_players_today']
-        self.class_names = ['_1n_4-zvf0n4aqGEksbgW9N', '_3j4dI1yA7cRfCvK8h406OB', '_3L0CDDIUaOKTGfqdpqmjcy', 'yJB7DYKsuTG2AYhJdWTIk']
+    # Reads every row in one WebDriver round-trip instead of one find_element per cell. The appid
+    # comes from the row's store link (/app/<id>/) and identifies a game more stably than its name
+    EXTRACT_SCRIPT = """
+        const [rowClass, columns] = arguments;
+        return Array.from(document.getElementsByClassName(rowClass)).map(row => {
+            const values = {};
+            for (const [column, className] of Object.entries(columns)) {
+                const cell = row.getElementsByClassName(className)[0];
+                values[column] = cell ? cell.innerText : null;
+            }
+            const link = row.querySelector('a[href*="/app/"]');
+            const appid = link ? link.href.match(/\/app\/(\d+)/) : null;
+            values.appid = appid ? appid[1] : null;
+            return values;
+        });
+    """
 
-    def scrape(self):
-        driver = webdriver.Chrome(options=self.options)
-        driver.get(self.url)
-        time.sleep(2)
+    def __init__(self, output_path='games_fresh.csv', url=URL, pool: Optional[BrowserPool] = None, timeout: float = 15):
+        self.output_path = output_path
+        self.url = url
+        self.pool = pool or BrowserPool()
+        self.timeout = timeout
+        self.column_names = [*self.COLUMN_CLASSES, 'appid']
+
+    @metrics.timed("scrape_fetch")
+    def fetch(self, url: Optional[str] = None) -> List[Dict]:
+        """Load a chart page and return its rows as dicts of raw cell text."""
+        with self.pool.driver() as driver:
+            driver.get(url or self.url)
+            WebDriverWait(driver, self.timeout).until(
+                EC.presence_of_element_located((By.CLASS_NAME, self.ROW_CLASS))
+            )
+            return driver.execute_script(self.EXTRACT_SCRIPT, self.ROW_CLASS, self.COLUMN_CLASSES)
 
-        games = driver.find_elements(By.CLASS_NAME, "_2-RN6nWOY56sNmcDHu069P")
+    def to_frame(self, rows: List[Dict], scraped_at: datetime) -> pd.DataFrame:
+        """Raw cell text of fetched rows as a frame, stamped with the scrape time."""
+        frame = pd.DataFrame(rows, columns=self.column_names)
+        frame['date'] = scraped_at
+        return frame
 
-        data = {col: [] for col in self.column_names}
-        data['date'] = datetime.now()
+    @metrics.timed("scrape")
+    def scrape(self):
+        rows = self.fetch()
+        metrics.inc("scraped_rows_total", len(rows))
+        self.save_to_csv(self.to_frame(rows, datetime.now()))
 
-        for game in games:
-            for count, column in enumerate(self.column_names):
-                try:
-                    value = game.find_element(By.CLASS_NAME, self.class_names[count]).text
-                    data[column].append(value)
-                except NoSuchElementException:
-                    data[column].append(np.nan)
+    def scrape_many(self, urls: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """Scrape several charts or regions concurrently, one pooled browser per page in flight."""
+        scraped_at = datetime.now()
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = {label: executor.submit(self.fetch, url) for label, url in urls.items()}
+            return {label: self.to_frame(future.result(), scraped_at) for label, future in futures.items()}
 
-        driver.quit()
-        self.save_to_csv(data)
+    def close(self):
+        self.pool.close()
 
     def save_to_csv(self, data):
-        df = pd.DataFrame(data)
-        df['price'] = np.where(
-            df['price'].str.contains('Free To Play|Coming Soon', na=True),
-            0.0,
-            pd.to_numeric(df['price'].str.extract(r'(\d+,\d+|\d+\.\d+)')[0]
-                          .str.replace(',', '.'), errors='coerce').fillna(0.0)
-        )
-
-        df[['current_players', 'peak_players_today']] = df[['current_players', 'peak_players_today']].replace(',', '', regex=True).apply(pd.to_numeric, errors='coerce')
-
-        df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
-        df.to_csv(self.output_path, index=False)
\ No newline at end of file
+        df = clean_frame(pd.DataFrame(data))
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        df.to_csv(self.output_path, index=False)
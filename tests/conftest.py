@@ -0,0 +1,48 @@
+from pathlib import Path
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.llms.fake import FakeListLLM
+from data_loader import DataLoader
+
+BACKUP_CSV = str(Path(__file__).resolve().parent.parent / 'games_back-up.csv')
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic fake embeddings that count how many calls reach the model."""
+
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+@pytest.fixture(scope="session")
+def snapshot():
+    return DataLoader.load_data(BACKUP_CSV)
+
+
+@pytest.fixture(scope="session")
+def documents(snapshot):
+    return DataLoader.create_documents(snapshot)
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings(size=64)
+
+
+@pytest.fixture
+def make_chain(snapshot, documents, embeddings):
+    """Build a RetrievalChain over the backup snapshot with fake embeddings and LLM."""
+    from retrieval_chain import RetrievalChain
+
+    def build(**kwargs):
+        kwargs.setdefault("llm", FakeListLLM(responses=["ok"] * 100))
+        return RetrievalChain(documents, data=snapshot, embeddings=embeddings, **kwargs)
+
+    return build
@@ -0,0 +1,65 @@
+import threading
+import pytest
+from selenium.common.exceptions import WebDriverException
+import steam_scraper
+from steam_scraper import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self, options=None, fail_quit=False):
+        self.fail_quit = fail_quit
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+        if self.fail_quit:
+            raise WebDriverException("quit failed")
+
+
+@pytest.fixture
+def drivers(monkeypatch):
+    started = []
+
+    def chrome(options=None):
+        started.append(FakeDriver(options))
+        return started[-1]
+
+    monkeypatch.setattr(steam_scraper.webdriver, "Chrome", chrome)
+    return started
+
+
+def test_waiter_gets_a_fresh_driver_when_a_crashed_one_is_discarded(drivers):
+    pool = BrowserPool(size=1)
+    borrowed = threading.Event()
+    got = []
+
+    def waiter():
+        borrowed.wait()
+        with pool.driver() as driver:
+            got.append(driver)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    with pytest.raises(WebDriverException):
+        with pool.driver():
+            borrowed.set()
+            # Give the waiter time to block on the full pool
+            thread.join(0.2)
+            raise WebDriverException("browser crashed")
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert got == [drivers[1]] and drivers[0].quit_called
+
+
+def test_failing_quit_frees_the_slot(drivers):
+    pool = BrowserPool(size=1)
+    with pytest.raises(WebDriverException):
+        with pool.driver() as driver:
+            driver.fail_quit = True
+            raise WebDriverException("browser crashed")
+
+    with pool.driver() as driver:
+        assert driver is drivers[1]
+    pool.close()
+    assert drivers[1].quit_called
@@ -0,0 +1,33 @@
+import threading
+import pytest
+from langchain_core.documents import Document
+from embedding_pipeline import EmbeddingPipeline
+
+
+class FailingEmbeddings:
+    def embed_documents(self, texts):
+        raise RuntimeError("encoder crashed")
+
+
+def test_failed_embedding_stops_the_producer_and_closes_the_source():
+    closed = threading.Event()
+
+    def documents():
+        try:
+            for i in range(1000):
+                yield Document(page_content=f"game {i}")
+        finally:
+            closed.set()
+
+    pipeline = EmbeddingPipeline(FailingEmbeddings(), batch_size=1, prefetch=1)
+    with pytest.raises(RuntimeError, match="encoder crashed"):
+        pipeline.run(documents())
+
+    # run joins the producer, which closes the generator on its way out
+    assert closed.is_set()
+
+
+def test_pipeline_embeds_every_batch(embeddings):
+    documents = [[Document(page_content=f"game {i}") for i in range(start, start + 5)] for start in (0, 5, 10)]
+    vectorstore = EmbeddingPipeline(embeddings, batch_size=4, prefetch=1).run(iter(documents))
+    assert vectorstore.index.ntotal == 15
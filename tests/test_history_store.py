@@ -0,0 +1,29 @@
+from history_store import HistoryStore
+
+RAW_CSV = """name,price,current_players,peak_players_today,date
+Counter-Strike 2,Free To Play,"1,234,567","1,500,000",2024-01-01
+Elden Ring,"$59.99","12,345","20,000",2024-01-01
+Counter-Strike 2,Free To Play,"1,100,000","1,400,000",2024-01-02
+Elden Ring,"-20%
+$59.99
+$47.99","11,000","19,000",2024-01-02
+"""
+
+
+def test_import_csv_cleans_raw_exports_chunk_by_chunk(tmp_path):
+    source = tmp_path / "raw.csv"
+    source.write_text(RAW_CSV)
+    store = HistoryStore(tmp_path / "history")
+
+    # A chunk of one row splits every date across chunks
+    written = store.import_csv([source], chunksize=1)
+    assert [day.isoformat() for day in written] == ["2024-01-01", "2024-01-02"]
+
+    data = store.read().sort_values(["date", "name"], ignore_index=True)
+    assert len(data) == 4
+    assert data["price"].tolist() == [0.0, 59.99, 0.0, 47.99]
+    assert data["current_players"].tolist() == [1234567, 12345, 1100000, 11000]
+
+    # Dates already stored are skipped
+    assert store.import_csv([source]) == []
+    assert len(store.read()) == 4
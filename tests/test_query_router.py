@@ -0,0 +1,46 @@
+import pytest
+from query_router import QueryRouter
+
+NAMED_QUESTIONS = [
+    ("How many players does Dota 2 have right now?", "Dota 2"),
+    ("What is the total number of players for PUBG: BATTLEGROUNDS?", "PUBG: BATTLEGROUNDS"),
+]
+
+
+@pytest.mark.parametrize("question, name", NAMED_QUESTIONS)
+def test_named_game_is_not_counted_or_aggregated(snapshot, question, name):
+    plan = QueryRouter(snapshot).parse(question)
+    assert plan["route"] != QueryRouter.STRUCTURED
+    assert plan["intent"] not in ("count", "aggregate")
+
+
+@pytest.mark.parametrize("question, name", NAMED_QUESTIONS)
+def test_named_game_is_answered_from_its_rows(make_chain, question, name):
+    retrieved = make_chain().retrieve(question)
+    assert retrieved["route"] == QueryRouter.NAMED
+    assert {doc.metadata["name"] for doc in retrieved["documents"]} == {name}
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("How many free games are there?", "count"),
+    ("What is the average price of games?", "aggregate"),
+])
+def test_unnamed_counts_and_aggregates_stay_structured(snapshot, question, intent):
+    plan = QueryRouter(snapshot).parse(question)
+    assert (plan["route"], plan["intent"]) == (QueryRouter.STRUCTURED, intent)
+
+
+@pytest.mark.parametrize("question, players", [
+    ("Games with at least 50k players", 50_000),
+    ("Which games have at least 100,000 players?", 100_000),
+])
+def test_at_least_is_a_filter_not_a_ranking(snapshot, question, players):
+    plan = QueryRouter(snapshot).parse(question)
+    assert plan["route"] == QueryRouter.FILTERED
+    assert plan["intent"] is None
+    assert plan["filters"]["current_players"] == (">=", players)
+
+
+def test_least_still_ranks_ascending(snapshot):
+    plan = QueryRouter(snapshot).parse("Which games have the least players?")
+    assert (plan["intent"], plan["ascending"]) == ("rank", True)
@@ -0,0 +1,26 @@
+import time
+from rate_limiter import InMemoryBackend
+
+
+def test_in_memory_backend_limits_each_key():
+    backend = InMemoryBackend()
+    decisions = [backend.consume("session", limit=2, window=60)[0] for _ in range(3)]
+    assert decisions == [True, True, False]
+    assert backend.peek("session", limit=2, window=60)[:2] == (False, 0)
+
+
+def test_in_memory_backend_drops_expired_keys():
+    backend = InMemoryBackend()
+    backend.consume("a", limit=1, window=1)
+    assert backend.peek("never-seen", limit=1, window=1)[0]
+    assert list(backend._requests) == ["a"]
+
+    time.sleep(1.05)
+    # Pruning a key down to nothing removes it, and a later request sweeps the others
+    assert backend.peek("a", limit=1, window=1)[0]
+    assert backend._requests == {}
+    backend.consume("b", limit=1, window=1)
+    backend._requests["stale"] = backend._requests["b"].copy()
+    time.sleep(1.05)
+    backend.consume("c", limit=1, window=1)
+    assert list(backend._requests) == ["c"]
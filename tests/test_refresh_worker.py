@@ -0,0 +1,72 @@
+import shutil
+import pandas as pd
+import pytest
+from config import Config
+from conftest import BACKUP_CSV
+from history_store import HistoryStore
+from refresh_worker import RefreshWorker, latest_snapshot, read_data_version
+
+
+class CopyScraper:
+    """Stands in for SteamScraper, "scraping" by copying a CSV to the worker's temporary path."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def scrape(self):
+        shutil.copy(self.source, f"{Config.DATA_PATH}.tmp")
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_PATH", str(tmp_path / "games_fresh.csv"))
+    monkeypatch.setattr(Config, "DATA_VERSION_PATH", str(tmp_path / "data_version.json"))
+    return RefreshWorker(history_dir=str(tmp_path / "history"))
+
+
+def test_invalid_scrape_reaches_neither_the_snapshot_nor_the_history(worker, tmp_path):
+    invalid = tmp_path / "invalid.csv"
+    invalid.write_text("name,price,current_players,peak_players_today,date\nDota 2,0,,1000,2024-01-01\n")
+    worker._scraper = CopyScraper(invalid)
+
+    assert not worker.refresh_once()
+    assert not (tmp_path / "games_fresh.csv").exists()
+    assert HistoryStore(worker.history_dir).dates() == []
+
+
+def test_published_snapshot_is_appended_to_the_history(worker, tmp_path):
+    worker._scraper = CopyScraper(BACKUP_CSV)
+
+    assert worker.refresh_once()
+    assert read_data_version() == 1
+    assert HistoryStore(worker.history_dir).dates()
+
+
+def test_latest_snapshot_reads_only_the_first_rows(worker, tmp_path, monkeypatch):
+    worker._scraper = CopyScraper(BACKUP_CSV)
+    assert worker.refresh_once()
+
+    calls = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: calls.append(kwargs) or read_csv(*args, **kwargs))
+    assert latest_snapshot() == Config.DATA_PATH
+    assert [kwargs["nrows"] for kwargs in calls] == [5]
+
+
+def test_scraped_appids_reach_the_history(worker, tmp_path):
+    from datetime import datetime
+    from steam_scraper import SteamScraper
+
+    scraper = SteamScraper(output_path=str(tmp_path / "scraped.csv"))
+    rows = [{"name": "Dota 2", "price": "Free To Play", "current_players": "612,345",
+             "peak_players_today": "700,001", "appid": "570"},
+            {"name": "Some Bundle", "price": "$19.99", "current_players": "1,234",
+             "peak_players_today": "2,000", "appid": None}]
+    scraper.save_to_csv(scraper.to_frame(rows, datetime(2024, 1, 1)))
+    worker._scraper = CopyScraper(tmp_path / "scraped.csv")
+    worker.min_rows = 1
+
+    assert worker.refresh_once()
+    history = HistoryStore(worker.history_dir).read().set_index("name")
+    assert history.loc["Dota 2", "appid"] == 570
+    assert pd.isna(history.loc["Some Bundle", "appid"])
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from response_cache import MemoryBackend, ResponseCache
+
+SEMANTIC_QUESTIONS = [
+    "Which multiplayer shooters are popular right now?",
+    "What cheap strategy games do people play?",
+]
+
+
+def semantic_chain(make_chain, embeddings):
+    cache = ResponseCache(MemoryBackend(), embeddings=embeddings, semantic_threshold=0.95)
+    return make_chain(response_cache=cache)
+
+
+def test_named_and_structured_questions_skip_the_semantic_tier(make_chain, embeddings):
+    chain = semantic_chain(make_chain, embeddings)
+    # Give the semantic tier vectors to compare against
+    chain.query(SEMANTIC_QUESTIONS[0])
+
+    for question in ["How many players does Dota 2 have right now?",
+                     "Which are the top 5 games by current players?"]:
+        calls = embeddings.calls
+        result = chain.query(question)
+        assert result["route"] != "semantic"
+        assert embeddings.calls == calls, question
+
+
+def test_semantic_question_is_embedded_once(make_chain, embeddings):
+    chain = semantic_chain(make_chain, embeddings)
+    for question in SEMANTIC_QUESTIONS:
+        calls = embeddings.calls
+        chain.query(question)
+        assert embeddings.calls - calls == 1, question
+
+    calls = embeddings.calls
+    events = list(chain.query_stream("Are there any relaxing puzzle games worth trying?"))
+    assert "timings" in events[-1]
+    assert embeddings.calls - calls == 1
+
+
+def test_batch_embeds_its_questions_once(make_chain, embeddings):
+    chain = semantic_chain(make_chain, embeddings)
+    batches = [
+        SEMANTIC_QUESTIONS + ["How many players does Dota 2 have right now?",
+                              "Which are the top 5 games by current players?",
+                              "Are there any relaxing puzzle games worth trying?"],
+        # Now the semantic tier has vectors to compare these against
+        ["Which co-op survival games are worth buying?",
+         "What open world RPGs are people playing?",
+         "What is the total number of players for PUBG: BATTLEGROUNDS?"],
+    ]
+    for questions in batches:
+        calls = embeddings.calls
+
+        async def answer_all():
+            return [result async for result in chain.abatch_query(questions)]
+
+        results = asyncio.run(answer_all())
+        assert sorted(result["query"] for result in results) == sorted(questions)
+        assert all("error" not in result for result in results)
+        assert embeddings.calls - calls == 1
+
+
+class ThreadRecordingBackend(MemoryBackend):
+    """MemoryBackend that records which threads read and write it."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+def test_async_queries_use_the_cache_off_the_event_loop(make_chain, embeddings):
+    backend = ThreadRecordingBackend()
+    chain = make_chain(response_cache=ResponseCache(backend, embeddings=embeddings, semantic_threshold=0.95))
+    question = SEMANTIC_QUESTIONS[0]
+
+    async def ask():
+        first = await chain.aquery(question)
+        second = await chain.aquery(question)
+        batch = [result async for result in chain.abatch_query(SEMANTIC_QUESTIONS[1:])]
+        return first, second, batch, threading.get_ident()
+
+    first, second, batch, loop_thread = asyncio.run(ask())
+    assert first["timings"]["route"] == "semantic"
+    assert second["timings"]["route"] == "cache"
+    assert len(batch) == 1 and "error" not in batch[0]
+    assert backend.threads and loop_thread not in backend.threads
@@ -0,0 +1,192 @@
+import argparse
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from config import Config
+from data_loader import DataLoader
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+class TimeSeriesStore:
+    """Per-game daily history in flat, date-sorted arrays, with rolling player statistics precomputed.
+
+    Rows are sorted by game and then date into one array per column, so a
+    game is a contiguous slice and a date range within it is found by
+    binary search. Rolling means of current players over calendar windows
+    (Config.TIME_SERIES_WINDOWS), the change since the previous snapshot and
+    the peak-to-current ratio are computed for every row at once when the
+    store is built, so a summary only reads a few array cells.
+    """
+
+    COLUMNS = ("price", "current_players", "peak_players_today")
+
+    def __init__(self, history: pd.DataFrame, windows: Sequence[int] = Config.TIME_SERIES_WINDOWS):
+        self.windows = tuple(windows)
+        dates = pd.to_datetime(history["date"], errors="coerce").dt.normalize()
+        frame = pd.DataFrame({"name": history["name"], "date": dates})
+        for column in self.COLUMNS:
+            frame[column] = pd.to_numeric(history[column], errors="coerce").astype("float64")
+        frame = frame.dropna(subset=["name", "date"]).drop_duplicates(["name", "date"], keep="last")
+
+        codes, names = pd.factorize(frame["name"])
+        days = frame["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        order = np.lexsort((days, codes))
+        codes, days = codes[order], days[order]
+        self.dates = days.astype("datetime64[D]")
+        self.values: Dict[str, np.ndarray] = {column: frame[column].to_numpy()[order] for column in self.COLUMNS}
+
+        # Each game is one contiguous slice of the arrays
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+        ends = np.r_[starts[1:], len(codes)]
+        self.slices: Dict[str, Tuple[int, int]] = {names[codes[lo]]: (int(lo), int(hi)) for lo, hi in zip(starts, ends)}
+
+        current = self.values["current_players"]
+        # Sort key of (game, day), so a window's first row is one binary search away and never in another game
+        key = (codes.astype(np.int64) << 32) | (days - days.min() if len(days) else days)
+        valid = ~np.isnan(current)
+        totals = np.r_[0.0, np.cumsum(np.where(valid, current, 0.0))]
+        counts = np.r_[0, np.cumsum(valid)]
+        rows = np.arange(1, len(current) + 1)
+        self.rolling: Dict[int, np.ndarray] = {}
+        for window in self.windows:
+            first = np.searchsorted(key, key - (window - 1), side="left")
+            count = counts[rows] - counts[first]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.rolling[window] = np.where(count > 0, (totals[rows] - totals[first]) / count, np.nan)
+
+        previous = np.r_[np.nan, current[:-1]]
+        previous[starts] = np.nan
+        self.delta = current - previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.peak_ratio = np.where(current > 0, self.values["peak_players_today"] / current, np.nan)
+        self.latest_date = pd.Timestamp(self.dates.max()) if len(self.dates) else None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.slices
+
+    def window(self, name: str, start: Optional[pd.Timestamp] = None,
+               end: Optional[pd.Timestamp] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Rows of a game between start and end (inclusive) as array views, or None if it has none."""
+        if name not in self.slices:
+            return None
+        lo, hi = self.slices[name]
+        dates = self.dates[lo:hi]
+        first = lo + (np.searchsorted(dates, np.datetime64(start, "D"), side="left") if start is not None else 0)
+        last = lo + (np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end is not None else hi - lo)
+        if first >= last:
+            return None
+        rows = {"date": self.dates[first:last], "delta": self.delta[first:last], "peak_ratio": self.peak_ratio[first:last]}
+        rows.update({column: values[first:last] for column, values in self.values.items()})
+        rows.update({f"mean_{window}": values[first:last] for window, values in self.rolling.items()})
+        return rows
+
+    def period(self, question: str, default_days: int = Config.TIME_SERIES_DEFAULT_DAYS) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Date range a question asks about, ending at the latest snapshot unless it gives dates.
+
+        Understands "last 14 days", "past 2 weeks", "this month", "today",
+        "since 2024-10-01" and one or two explicit dates; anything else
+        covers the last default_days days.
+        """
+        latest = self.latest_date if self.latest_date is not None else pd.Timestamp.now().normalize()
+        q = question.lower()
+        dates = sorted(pd.Timestamp(d) for d in re.findall(r"\d{4}-\d{2}-\d{2}", q))
+        if dates:
+            if len(dates) == 1 and not re.search(r"\b(?:since|after|from)\s+\d{4}", q):
+                return dates[0], dates[0]
+            return dates[0], dates[-1] if len(dates) > 1 else latest
+        counted = re.search(r"\b(?:last|past|previous)\s+(\d+)\s+(day|week|month|year)s?\b", q)
+        single = re.search(r"\b(?:this|last|past|previous)\s+(day|week|month|year)\b", q)
+        if counted:
+            days = int(counted.group(1)) * UNIT_DAYS[counted.group(2)]
+        elif single:
+            days = UNIT_DAYS[single.group(1)]
+        elif re.search(r"\b(?:today|right now|currently)\b", q):
+            days = 1
+        else:
+            days = default_days
+        return latest - pd.Timedelta(days=days - 1), latest
+
+    @staticmethod
+    def _number(value: float, fmt: str = "{:,.0f}") -> str:
+        return "unknown" if np.isnan(value) else fmt.format(value)
+
+    def summary(self, name: str, start: Optional[pd.Timestamp] = None,
+                end: Optional[pd.Timestamp] = None) -> Optional[str]:
+        """One paragraph on a game's players and price between start and end, or None if it has no rows there."""
+        rows = self.window(name, start, end)
+        if rows is None:
+            return None
+        n = len(rows["date"])
+        first, last = (pd.Timestamp(d).strftime("%Y-%m-%d") for d in (rows["date"][0], rows["date"][-1]))
+        current = rows["current_players"]
+        text = [f"History of {name}, {first} to {last} ({n} daily snapshot{'s' if n > 1 else ''}): "
+                f"current players {self._number(current[-1])} on {last}"]
+        if not np.isnan(rows["delta"][-1]):
+            text.append(f" ({rows['delta'][-1]:+,.0f} vs the previous snapshot)")
+        text.extend(f", {window}-day mean {self._number(rows[f'mean_{window}'][-1])}" for window in self.windows)
+        if n > 1 and not np.isnan(current).all():
+            low, high = np.nanargmin(current), np.nanargmax(current)
+            if current[0] > 0 and not np.isnan(current[-1]):
+                text.append(f", {(current[-1] - current[0]) / current[0]:+.1%} over the period")
+            text.append(f", low {current[low]:,.0f} on {pd.Timestamp(rows['date'][low]):%Y-%m-%d}"
+                        f", high {current[high]:,.0f} on {pd.Timestamp(rows['date'][high]):%Y-%m-%d}")
+
+        ratio = rows["peak_ratio"]
+        text.append(f"; peak players today {self._number(rows['peak_players_today'][-1])}, "
+                    f"peak-to-current ratio {self._number(ratio[-1], '{:.2f}')}")
+        if n > 1 and not np.isnan(ratio).all():
+            text.append(f" ({np.nanmean(ratio):.2f} on average)")
+
+        price = rows["price"]
+        text.append(f"; price {self._number(price[-1], '${:,.2f}')}")
+        if n > 1 and not np.isnan(price).all() and np.nanmin(price) != np.nanmax(price):
+            text.append(f" (${np.nanmin(price):,.2f}-${np.nanmax(price):,.2f} over the period)")
+        return "".join(text) + "."
+
+    def to_documents(self, names: Sequence[str], start: Optional[pd.Timestamp] = None,
+                     end: Optional[pd.Timestamp] = None) -> List[Document]:
+        """Summary context documents, one per named game that has rows between start and end."""
+        documents = []
+        for name in names:
+            text = self.summary(name, start, end)
+            if text is not None:
+                documents.append(Document(page_content=text, metadata={"name": name, "route": "time_series"}))
+        return documents
+
+
+@metrics.timed("time_series_build")
+def load_time_series(root: str = Config.HISTORY_DIR) -> Optional[TimeSeriesStore]:
+    """Build the time-series store from the history store, or None if there is no history."""
+    try:
+        history = DataLoader.load_history(root, columns=["name", "date", *TimeSeriesStore.COLUMNS])
+    except ValueError as e:
+        logger.info("No time series: %s", e)
+        return None
+    if history.empty:
+        return None
+    return TimeSeriesStore(history)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarise games' history from the snapshot history store.")
+    parser.add_argument('names', nargs='+', help='Game names')
+    parser.add_argument('--root', default=Config.HISTORY_DIR)
+    parser.add_argument('--period', default='', help='e.g. "last 14 days" or "since 2024-10-01"')
+    args = parser.parse_args()
+
+    store = load_time_series(args.root)
+    if store is None:
+        raise SystemExit(f"No history under {args.root}")
+    start, end = store.period(args.period)
+    for document in store.to_documents(args.names, start, end):
+        print(document.page_content)
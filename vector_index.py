@@ -0,0 +1,226 @@
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+import faiss
+import numpy as np
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+QUANTIZATIONS = {None: None, "fp16": "SQfp16", "int8": "SQ8"}
+
+# Enough training points per centroid for k-means to be stable, and a cap on the training sample
+TRAINING_POINTS_PER_CENTROID = 39
+MAX_TRAINING_SAMPLE = 100_000
+
+
+def choose_index_type(n_vectors: int, index_type: str = Config.INDEX_TYPE) -> str:
+    """Resolve "auto" to an index type for a corpus of n_vectors."""
+    if index_type != "auto":
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES} or 'auto'")
+        return index_type
+    if n_vectors < Config.FLAT_INDEX_MAX_ROWS:
+        return "flat"
+    if n_vectors < Config.IVF_FLAT_INDEX_MAX_ROWS:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def index_spec(n_vectors: int, dimension: int, index_type: str = Config.INDEX_TYPE,
+               quantization: Optional[str] = Config.INDEX_QUANTIZATION) -> str:
+    """Return the faiss index_factory string for a corpus size and configuration."""
+    index_type = choose_index_type(n_vectors, index_type)
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantization!r}, expected one of {list(QUANTIZATIONS)}")
+    storage = QUANTIZATIONS[quantization]
+
+    if index_type == "flat":
+        return storage or "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{Config.HNSW_M}" + (f",{storage}" if storage else "")
+
+    # Powers of two around 4 * sqrt(n), so day-to-day growth keeps the same layout
+    nlist = 2 ** round(math.log2(max(4 * math.sqrt(n_vectors), 1)))
+    nlist = max(1, min(nlist, n_vectors // TRAINING_POINTS_PER_CENTROID))
+    if index_type == "ivf_flat":
+        return f"IVF{nlist}," + (storage or "Flat")
+    # About 16 dimensions per sub-quantizer, with fewer bits when there is too little data to train 256 codes
+    m = next(m for m in range(max(1, dimension // 16), 0, -1) if dimension % m == 0)
+    nbits = max(1, min(8, int(math.log2(max(n_vectors // TRAINING_POINTS_PER_CENTROID, 2)))))
+    return f"IVF{nlist},PQ{m}x{nbits}"
+
+
+def index_kind(index: faiss.Index) -> Tuple[str, Optional[str]]:
+    """Return (index type, quantization) of a built index."""
+    typed = faiss.downcast_index(index)
+    sq_types = {faiss.ScalarQuantizer.QT_fp16: "fp16", faiss.ScalarQuantizer.QT_8bit: "int8"}
+    if isinstance(typed, faiss.IndexHNSW):
+        storage = faiss.downcast_index(typed.storage)
+        return "hnsw", sq_types.get(storage.sq.qtype) if isinstance(storage, faiss.IndexScalarQuantizer) else None
+    if isinstance(typed, faiss.IndexIVFPQ):
+        return "ivf_pq", None
+    if isinstance(typed, faiss.IndexIVFScalarQuantizer):
+        return "ivf_flat", sq_types.get(typed.sq.qtype)
+    if isinstance(typed, faiss.IndexIVF):
+        return "ivf_flat", None
+    if isinstance(typed, faiss.IndexScalarQuantizer):
+        return "flat", sq_types.get(typed.sq.qtype)
+    return "flat", None
+
+
+def configure(index: faiss.Index) -> faiss.Index:
+    """Apply search-time settings and enable reconstruct(), which MMR needs, on IVF indexes.
+
+    Returns the index passed in: the downcast wrapper does not own the
+    underlying object, so it must not outlive the original.
+    """
+    typed = faiss.downcast_index(index)
+    if isinstance(typed, faiss.IndexIVF):
+        typed.nprobe = min(Config.IVF_NPROBE, typed.nlist)
+        if typed.direct_map.type == faiss.DirectMap.NoMap:
+            typed.make_direct_map()
+    elif isinstance(typed, faiss.IndexHNSW):
+        typed.hnsw.efSearch = Config.HNSW_EF_SEARCH
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """True if remove_ids compacts positions the way LangChain's FAISS.delete expects."""
+    return index_kind(index)[0] == "flat"
+
+
+def vectors(index: faiss.Index, positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """Read vectors back from an index; approximate for quantized indexes."""
+    if positions is None:
+        return index.reconstruct_n(0, index.ntotal)
+    return index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+
+
+def mmr_search_batch(vectorstore: FAISS, embeddings: np.ndarray, k: int = 8, fetch_k: int = 20,
+                     lambda_mult: float = 0.7) -> List[List[Document]]:
+    """MMR for many query vectors with one FAISS search and one batched reconstruct.
+
+    Selects the same documents as FAISS.max_marginal_relevance_search_by_vector
+    called once per query.
+    """
+    queries = np.asarray(embeddings, dtype=np.float32)
+    if len(queries) == 0:
+        return []
+    _, indices = vectorstore.index.search(queries, fetch_k)
+    positions = np.unique(indices[indices != -1])
+    candidates = vectors(vectorstore.index, positions) if len(positions) else np.empty((0, queries.shape[1]))
+    results = []
+    for query, row in zip(queries, indices):
+        row = row[row != -1]
+        if len(row) == 0:
+            results.append([])
+            continue
+        selected = maximal_marginal_relevance(query[None, :], candidates[np.searchsorted(positions, row)],
+                                              k=k, lambda_mult=lambda_mult)
+        results.append([vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(row[i])])
+                        for i in selected])
+    return results
+
+
+def train_index(spec: str, dimension: int, sample: np.ndarray, trained_dir: Optional[str] = None) -> faiss.Index:
+    """Return an empty trained index for spec, reusing a persisted trained index when there is one."""
+    path = None
+    if trained_dir is not None:
+        name = spec.replace(",", "_")
+        path = Path(trained_dir) / f"{name}-d{dimension}.faiss"
+        if path.is_file():
+            index = faiss.read_index(str(path))
+            if index.d == dimension and index.is_trained:
+                index.reset()
+                return index
+
+    index = faiss.index_factory(dimension, spec)
+    if not index.is_trained:
+        if len(sample) > MAX_TRAINING_SAMPLE:
+            rng = np.random.default_rng(0)
+            sample = sample[rng.choice(len(sample), MAX_TRAINING_SAMPLE, replace=False)]
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            faiss.write_index(index, str(tmp_path))
+            tmp_path.replace(path)
+    return index
+
+
+def build_index(data: np.ndarray, spec: str, trained_dir: Optional[str] = None) -> faiss.Index:
+    """Train (or reuse a trained) index for spec and add data to it."""
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    index = train_index(spec, data.shape[1], data, trained_dir)
+    index.add(data)
+    return configure(index)
+
+
+def needs_rebuild(index: faiss.Index) -> bool:
+    """True if the configuration calls for a different index type or quantization at this size."""
+    spec = index_spec(index.ntotal, index.d)
+    return index_kind(index) != index_kind(faiss.index_factory(index.d, spec))
+
+
+def fit_index(vectorstore: FAISS, trained_dir: Optional[str] = None) -> FAISS:
+    """Rebuild a vector store's index in place if its size now calls for a different index type.
+
+    Vectors are read back from the current index, so going from a
+    quantized index to another type carries its approximation along.
+    """
+    index = vectorstore.index
+    if not needs_rebuild(index):
+        vectorstore.index = configure(index)
+        return vectorstore
+
+    spec = index_spec(index.ntotal, index.d)
+    logger.info("Rebuilding %d-vector index as %s", index.ntotal, spec)
+    vectorstore.index = build_index(vectors(index), spec, trained_dir)
+    return vectorstore
+
+
+def remove(vectorstore: FAISS, doc_ids) -> None:
+    """Delete documents from a vector store of any index type.
+
+    Flat indexes delete in place. IVF and HNSW indexes keep their original
+    labels on removal, so they are emptied (keeping their training) and
+    refilled with the remaining vectors.
+    """
+    if supports_remove(vectorstore.index):
+        vectorstore.delete(list(doc_ids))
+        return
+
+    doc_ids = set(doc_ids)
+    keep = [i for i in range(vectorstore.index.ntotal) if vectorstore.index_to_docstore_id[i] not in doc_ids]
+    kept = vectors(vectorstore.index, np.asarray(keep))
+    index = faiss.clone_index(vectorstore.index)
+    index.reset()
+    index.add(kept)
+    vectorstore.index = configure(index)
+    vectorstore.docstore.delete(list(doc_ids))
+    vectorstore.index_to_docstore_id = {new: vectorstore.index_to_docstore_id[old] for new, old in enumerate(keep)}
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """Search parameters restricting a search to selector, typed for the index."""
+    typed = faiss.downcast_index(index)
+    if isinstance(typed, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=typed.nprobe)
+    if isinstance(typed, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=typed.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def memory_bytes(index: faiss.Index) -> int:
+    """Size of the index on disk, a close proxy for its in-memory footprint."""
+    with tempfile.NamedTemporaryFile(suffix=".faiss") as f:
+        faiss.write_index(index, f.name)
+        return os.path.getsize(f.name)